@@ -0,0 +1,353 @@
+"""
+load_generator.py
+Generador de carga sobre el servicio de transacciones.
+
+Toma las operaciones de transactions_generator (mix transferencia / retiro
+/ depósito, por defecto 30/20/50) y las ejecuta con concurrencia:
+
+  - Trabajadores: hilos (--mode threads, comparten el pool de conexiones)
+    o procesos (--mode processes, uno por núcleo, como varios servidores)
+  - Lazo cerrado (por defecto): cada trabajador encadena operaciones
+  - Lazo abierto (--rate N): N operaciones/s repartidas entre los
+    trabajadores a horarios fijos. La latencia se mide desde el horario
+    programado, así que un sistema saturado muestra la cola que acumula
+    (sin "coordinated omission").
+
+Reporta throughput, latencia p50/p95/p99 (total y por tipo), errores por
+tipo y reintentos por contención de bloqueos. Un error de bloqueo ("database
+is locked", "could not update; currently locked") revierte la transacción
+en el servicio, así que se reintenta con espera exponencial hasta
+--max-retries veces.
+
+Base local de prueba: --sqlite archivo.db usa el backend SQLite (se crea
+el esquema si falta) y, si hay menos de dos cuentas, crea --seed-accounts
+clientes con saldo inicial.
+
+Uso:
+    python -m benchmarks.load_generator --sqlite bench.db --operations 5000 \\
+        --concurrency 8 --mode threads --mix 30,20,50 --json resultados.json
+    python -m benchmarks.load_generator --sqlite bench.db --duration 30 --rate 200
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any
+
+
+DEFAULT_OPERATIONS  = 1000
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 3
+RETRY_BASE_DELAY    = 0.005                    # segundos; se duplica en cada intento
+
+SEED_PASSWORD      = "loadgen"
+SEED_HASH_ROUNDS   = 4                         # costo mínimo: solo cuentas de prueba
+
+_LOCK_MARKERS = ("database is locked", "locked", "bloquead", "busy")
+
+
+# ─────────────────────────────────────────────
+# Clasificación de resultados
+# ─────────────────────────────────────────────
+
+def classify_error(message: str) -> str:
+    """Tipo de error a partir del mensaje que retorna el servicio."""
+    text = (message or "").lower()
+    if any(marker in text for marker in _LOCK_MARKERS):
+        return "lock_contention"
+    if "fondos insuficientes" in text:
+        return "insufficient_funds"
+    if "no hay conexiones disponibles" in text:
+        return "pool_timeout"
+    if "inválid" in text or "debe ser" in text or "no pueden ser iguales" in text:
+        return "validation"
+    return "other"
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Percentil por rango más cercano sobre una lista ordenada."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, math.ceil(p * len(values)) - 1))
+    return values[rank]
+
+
+def latency_summary(latencies: list[float]) -> dict[str, float]:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50), 3),
+        "p95_ms": round(percentile(values, 0.95), 3),
+        "p99_ms": round(percentile(values, 0.99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0,
+    }
+
+
+# ─────────────────────────────────────────────
+# Preparación
+# ─────────────────────────────────────────────
+
+def use_sqlite(path: str) -> None:
+    """Apunta config.database a un archivo SQLite (antes de importarlo)."""
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["SQLITE_DB_PATH"] = path
+
+
+def seed_accounts(count: int, initial_balance: float, seed: int | None = None) -> int:
+    """
+    Crea `count` clientes de prueba (usuario + cuenta) y les deposita
+    `initial_balance`. Retorna las cuentas creadas.
+    """
+    from services.onboarding_service import onboard_customers_bulk
+    from services.transaction_service import ENTRY_CREDIT, create_simple_transaction
+    from utils.security import hash_password
+
+    password_hash = hash_password(SEED_PASSWORD, rounds=SEED_HASH_ROUNDS)
+    tag = f"{seed if seed is not None else random.randrange(10 ** 9)}-{time.time_ns()}"
+    report = onboard_customers_bulk(
+        ({"email": f"load{i}-{tag}@bench.local", "dui": f"LG{i}-{tag}", "full_name": f"Carga {i}",
+          "gender": "M", "password_hash": password_hash} for i in range(count)),
+        check_conflicts=False,
+    )
+    from transactions_generator import get_account_owners
+    owners = get_account_owners()
+    created = {r["user_id"] for r in report["results"] if r["success"]}
+    for account_id, user_id in owners.items():
+        if user_id in created and initial_balance > 0:
+            create_simple_transaction(account_id, initial_balance, ENTRY_CREDIT, "Saldo inicial", user_id)
+    return len(created)
+
+
+# ─────────────────────────────────────────────
+# Trabajador (hilo o proceso)
+# ─────────────────────────────────────────────
+
+def _run_worker(config: dict[str, Any], worker: int) -> dict[str, Any]:
+    """
+    Ejecuta la parte de la carga de un trabajador y retorna sus muestras
+    (tipo, latencia_ms, tipo_de_error | None, reintentos).
+    """
+    if config.get("sqlite"):
+        use_sqlite(config["sqlite"])
+    from transactions_generator import execute_operation, pick_operation
+
+    owners = config["owners"]
+    account_ids = config["account_ids"]
+    mix = config["mix"]
+    seed = config.get("seed")
+    rng = random.Random(None if seed is None else seed * 1000 + worker)
+
+    workers = config["concurrency"]
+    quota = config["operations"] // workers + (1 if worker < config["operations"] % workers else 0) \
+        if config.get("operations") else None
+    rate = config["rate"] / workers if config.get("rate") else None
+    interval = 1.0 / rate if rate else 0.0
+
+    # Todos los trabajadores arrancan al mismo tiempo (reloj de pared compartido)
+    delay = config["start_at"] - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    t0 = time.perf_counter()
+    stop_at = t0 + config["duration"] if config.get("duration") else None
+
+    samples = []
+    done = 0
+    while True:
+        if quota is not None and done >= quota:
+            break
+        scheduled = t0 + done * interval if rate else time.perf_counter()
+        if stop_at is not None and scheduled >= stop_at:
+            break
+        wait = scheduled - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+
+        kind, acc_id, to_id, amount = pick_operation(rng, account_ids, mix)
+        retries = 0
+        error_type = None
+        while True:
+            try:
+                res = execute_operation(kind, acc_id, to_id, amount, owners[acc_id])
+                error = None if res and res.get("success") else (res or {}).get("error", "Respuesta nula")
+            except Exception as e:
+                error = str(e)
+            error_type = classify_error(error) if error else None
+            if error_type != "lock_contention" or retries >= config["max_retries"]:
+                break
+            retries += 1
+            time.sleep(RETRY_BASE_DELAY * (2 ** (retries - 1)) * (1 + rng.random()))
+
+        samples.append((kind, (time.perf_counter() - scheduled) * 1000, error_type, retries))
+        done += 1
+
+    return {"worker": worker, "samples": samples, "elapsed": time.perf_counter() - t0}
+
+
+# ─────────────────────────────────────────────
+# Corrida completa
+# ─────────────────────────────────────────────
+
+def run_load(operations: int | None = DEFAULT_OPERATIONS, duration: float | None = None,
+             concurrency: int = DEFAULT_CONCURRENCY, mode: str = "threads",
+             rate: float | None = None, mix: dict[str, float] | None = None,
+             max_retries: int = DEFAULT_MAX_RETRIES, seed: int | None = None,
+             sqlite: str | None = None) -> dict[str, Any]:
+    """
+    Ejecuta la carga y retorna el resumen (mismo contenido que el JSON).
+
+    Con `duration` la corrida es por tiempo; si no, por `operations`.
+    """
+    from config.database import get_backend, get_pool_stats
+    from transactions_generator import DEFAULT_MIX, get_account_owners
+
+    if mode not in ("threads", "processes"):
+        raise ValueError("mode debe ser 'threads' o 'processes'.")
+    if concurrency < 1:
+        raise ValueError("concurrency debe ser al menos 1.")
+    if not operations and not duration:
+        raise ValueError("Indique operations o duration.")
+
+    mix = mix or DEFAULT_MIX
+    owners = get_account_owners()
+    if len(owners) < 2:
+        raise ValueError("Se necesitan al menos 2 cuentas (use --seed-accounts).")
+
+    config = {
+        "operations": None if duration else operations,
+        "duration": duration,
+        "concurrency": concurrency,
+        "rate": rate,
+        "mix": mix,
+        "max_retries": max_retries,
+        "seed": seed,
+        "sqlite": sqlite,
+        "owners": owners,
+        "account_ids": sorted(owners),
+        "start_at": time.time() + (2.0 if mode == "processes" else 0.05),
+    }
+
+    started_at = datetime.now()
+    if mode == "threads":
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outputs = list(pool.map(lambda w: _run_worker(config, w), range(concurrency)))
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=concurrency, mp_context=context) as pool:
+            outputs = list(pool.map(_run_worker, [config] * concurrency, range(concurrency)))
+
+    samples = [s for output in outputs for s in output["samples"]]
+    elapsed = max(output["elapsed"] for output in outputs)
+
+    errors: dict[str, int] = {}
+    by_kind: dict[str, list[float]] = {}
+    for kind, latency, error_type, _ in samples:
+        by_kind.setdefault(kind, []).append(latency)
+        if error_type:
+            errors[error_type] = errors.get(error_type, 0) + 1
+
+    failed = sum(errors.values())
+    retries = sum(s[3] for s in samples)
+    config_out = {k: v for k, v in config.items() if k not in ("owners", "account_ids", "start_at")}
+    config_out["accounts"] = len(owners)
+    config_out["mode"] = mode
+    config_out["backend"] = get_backend().name
+
+    return {
+        "tool": "load_generator",
+        "started_at": started_at.isoformat(sep=" "),
+        "host": {"platform": platform.platform(), "python": platform.python_version(),
+                 "cpus": os.cpu_count()},
+        "config": config_out,
+        "results": {
+            "operations": len(samples),
+            "elapsed": round(elapsed, 3),
+            "throughput": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+            "succeeded": len(samples) - failed,
+            "failed": failed,
+            "error_rate": round(failed / len(samples), 4) if samples else 0.0,
+            "errors_by_type": dict(sorted(errors.items(), key=lambda kv: -kv[1])),
+            "lock_retries": retries,
+            "operations_retried": sum(1 for s in samples if s[3]),
+            "latency": latency_summary([s[1] for s in samples]),
+            "latency_by_type": {kind: latency_summary(values) for kind, values in sorted(by_kind.items())},
+        },
+        "pool": get_pool_stats() if mode == "threads" else {},
+    }
+
+
+def format_report(report: dict[str, Any]) -> str:
+    config, results = report["config"], report["results"]
+    lat = results["latency"]
+    lines = [
+        f"[LOAD] {config['mode']} x{config['concurrency']} "
+        f"{'rate=' + str(config['rate']) + '/s' if config['rate'] else 'lazo cerrado'} "
+        f"backend={config['backend']} cuentas={config['accounts']}",
+        f"[LOAD] {results['operations']} operaciones en {results['elapsed']}s → "
+        f"{results['throughput']} ops/s",
+        f"[LOAD] latencia p50={lat['p50_ms']}ms p95={lat['p95_ms']}ms p99={lat['p99_ms']}ms "
+        f"max={lat['max_ms']}ms",
+    ]
+    for kind, s in results["latency_by_type"].items():
+        lines.append(f"[LOAD]   {kind:<10} n={s['count']:<6} p50={s['p50_ms']}ms "
+                     f"p95={s['p95_ms']}ms p99={s['p99_ms']}ms")
+    lines.append(f"[LOAD] errores={results['failed']} ({results['error_rate']:.2%}) "
+                 f"{results['errors_by_type']} reintentos por bloqueo={results['lock_retries']}")
+    return "\n".join(lines)
+
+
+def _parse_mix(text: str) -> dict[str, float]:
+    from transactions_generator import DEPOSIT, TRANSFER, WITHDRAWAL
+
+    weights = [float(w) for w in text.split(",")]
+    if len(weights) != 3 or any(w < 0 for w in weights) or not sum(weights):
+        raise argparse.ArgumentTypeError("--mix espera tres pesos: transferencia,retiro,depósito")
+    return dict(zip((TRANSFER, WITHDRAWAL, DEPOSIT), weights))
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Generador de carga de transacciones")
+    parser.add_argument("--operations", type=int, default=DEFAULT_OPERATIONS)
+    parser.add_argument("--duration", type=float, help="Segundos (en lugar de --operations)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--mode", choices=("threads", "processes"), default="threads")
+    parser.add_argument("--rate", type=float, help="Operaciones/s objetivo (lazo abierto)")
+    parser.add_argument("--mix", default="30,20,50", help="Pesos transferencia,retiro,depósito")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES)
+    parser.add_argument("--seed", type=int, help="Semilla para una secuencia reproducible")
+    parser.add_argument("--sqlite", help="Archivo SQLite local a usar como base")
+    parser.add_argument("--seed-accounts", type=int, default=100,
+                        help="Clientes a crear si hay menos de 2 cuentas")
+    parser.add_argument("--initial-balance", type=float, default=10000.0)
+    parser.add_argument("--json", help="Archivo donde guardar el resultado")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        use_sqlite(args.sqlite)
+    mix = _parse_mix(args.mix)
+
+    from transactions_generator import get_account_owners
+    if len(get_account_owners()) < 2:
+        created = seed_accounts(args.seed_accounts, args.initial_balance, args.seed)
+        print(f"[LOAD] {created} cuentas de prueba creadas")
+
+    report = run_load(operations=args.operations, duration=args.duration,
+                      concurrency=args.concurrency, mode=args.mode, rate=args.rate, mix=mix,
+                      max_retries=args.max_retries, seed=args.seed, sqlite=args.sqlite)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[LOAD] Resultado → {args.json}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+seed_users.py
+Carga masiva de clientes de prueba (usuario + cuenta) para benchmarks.
+
+crear_user+name.py sirve para unas decenas de usuarios; aquí el objetivo
+son cientos de miles:
+
+  - Datos Faker generados en un pool de procesos, por bloques de
+    --chunk-size, mientras el proceso principal inserta el bloque anterior
+  - Contraseñas: un pool de --hash-pool hashes calculados una sola vez (en
+    paralelo, con password_service). El usuario i recibe la contraseña
+    seed_password(i) y su hash, así que un benchmark de login puede
+    autenticarse con cualquier usuario sembrado
+  - Inserción por lotes con onboard_customers_bulk: usuarios y cuentas con
+    executemany y un commit por lote
+  - Progreso con filas/s y tiempo restante estimado
+
+Reproducible: con la misma --seed y --start se generan exactamente los
+mismos clientes. Email, DUI y teléfono se derivan del índice del cliente
+(permutación sobre el índice), así que son únicos sin consultar la base;
+para agregar más clientes a una base ya sembrada use --start.
+
+Uso:
+    python -m benchmarks.seed_users --count 100000 --sqlite bench.db
+    python -m benchmarks.seed_users --count 5000 --start 100000 --seed 42
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import random
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterator
+
+
+DEFAULT_SEED       = 1234
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_HASH_POOL  = 16
+DEFAULT_LOCALE     = "es_ES"
+EMAIL_DOMAIN       = "seed.synapse.test"
+
+# Multiplicadores primos con 10^7 y 9·10^7: recorren todo el espacio sin
+# repetir, así que índices distintos dan DUI / teléfonos distintos
+_DUI_STRIDE   = 7_919_993
+_PHONE_STRIDE = 3_203_431
+
+
+# ─────────────────────────────────────────────
+# Datos sintéticos (se ejecuta en los procesos del pool)
+# ─────────────────────────────────────────────
+
+def seed_password(index: int, hash_pool: int = DEFAULT_HASH_POOL) -> str:
+    """Contraseña del cliente sembrado número `index`."""
+    return f"Seed{index % hash_pool}!"
+
+
+def _dui_check_digit(digits: str) -> int:
+    total = sum(int(d) * w for d, w in zip(digits, range(9, 1, -1)))
+    return (10 - total % 10) % 10
+
+
+def _synthetic_dui(index: int, seed: int) -> str:
+    number = f"{(index * _DUI_STRIDE + seed) % 90_000_000 + 10_000_000:08d}"
+    return f"{number}-{_dui_check_digit(number)}"
+
+
+def _synthetic_phone(index: int, seed: int) -> str:
+    number = f"{'67'[index // 10_000_000 % 2]}{(index * _PHONE_STRIDE + seed) % 10_000_000:07d}"
+    return f"+503 {number[:4]}-{number[4:]}"
+
+
+def _slug(name: str) -> str:
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return ".".join(part for part in ascii_name.lower().split() if part.isalpha())[:40] or "cliente"
+
+
+def generate_customers(seed: int, start: int, count: int, locale: str = DEFAULT_LOCALE,
+                       hash_pool: int = DEFAULT_HASH_POOL) -> list[dict[str, Any]]:
+    """
+    Clientes start .. start+count-1. Cada bloque usa su propia semilla,
+    así que el resultado no depende de cuántos procesos lo generen.
+    """
+    from faker import Faker
+
+    fake = Faker(locale)
+    fake.seed_instance(seed * 1_000_003 + start)
+    rng = random.Random(seed * 1_000_003 + start)
+
+    customers = []
+    for index in range(start, start + count):
+        gender = rng.choice(("M", "F"))
+        full_name = fake.name_male() if gender == "M" else fake.name_female()
+        customers.append({
+            "index": index,
+            "email": f"{_slug(full_name)}.{index}@{EMAIL_DOMAIN}",
+            "dui": _synthetic_dui(index, seed),
+            "full_name": full_name,
+            "gender": gender,
+            "phone_number": _synthetic_phone(index, seed),
+            "nit": None,
+            "role_id": 2,
+            "hash_slot": index % hash_pool,
+        })
+    return customers
+
+
+# ─────────────────────────────────────────────
+# Siembra
+# ─────────────────────────────────────────────
+
+def build_hash_pool(size: int = DEFAULT_HASH_POOL, rounds: int | None = None) -> list[str]:
+    """
+    Hashes de seed_password(0 .. size-1), calculados en paralelo con el
+    pool de password_service (o en línea si se fija `rounds`).
+    """
+    passwords = [seed_password(i, size) for i in range(size)]
+    if rounds is not None:
+        from utils.security import hash_password
+        return [hash_password(p, rounds=rounds) for p in passwords]
+
+    from services.password_service import hash_passwords
+    return hash_passwords(passwords)
+
+
+def _chunks(start: int, count: int, chunk_size: int) -> Iterator[tuple[int, int]]:
+    for offset in range(0, count, chunk_size):
+        yield start + offset, min(chunk_size, count - offset)
+
+
+def seed_users(count: int, seed: int = DEFAULT_SEED, start: int = 0,
+               chunk_size: int = DEFAULT_CHUNK_SIZE, batch_size: int | None = None,
+               workers: int | None = None, hash_pool: int = DEFAULT_HASH_POOL,
+               hash_rounds: int | None = None, locale: str = DEFAULT_LOCALE,
+               check_conflicts: bool = True, progress: bool = True) -> dict[str, Any]:
+    """
+    Crea `count` clientes sintéticos con su cuenta.
+
+    Returns:
+        dict con 'total', 'succeeded', 'failed', 'conflicts', 'elapsed',
+        'rows_per_second' y 'errors' (primeros mensajes de error).
+    """
+    from services.onboarding_service import ONBOARD_BATCH_SIZE, onboard_customers_bulk
+
+    if count < 1 or chunk_size < 1 or hash_pool < 1:
+        raise ValueError("count, chunk_size y hash_pool deben ser al menos 1.")
+    batch_size = batch_size or ONBOARD_BATCH_SIZE
+    workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+
+    t0 = time.perf_counter()
+    hashes = build_hash_pool(hash_pool, hash_rounds)
+    hash_time = time.perf_counter() - t0
+
+    summary = {"total": 0, "succeeded": 0, "failed": 0, "conflicts": 0, "errors": []}
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        # Se encolan unos pocos bloques por delante: la generación se
+        # superpone con la inserción sin tener todo el dataset en memoria
+        pending = _chunks(start, count, chunk_size)
+        window = [pool.submit(generate_customers, seed, s, n, locale, hash_pool)
+                  for s, n in itertools.islice(pending, workers * 2)]
+        while window:
+            customers = window.pop(0).result()
+            for s, n in itertools.islice(pending, 1):
+                window.append(pool.submit(generate_customers, seed, s, n, locale, hash_pool))
+
+            for customer in customers:
+                customer["password_hash"] = hashes[customer.pop("hash_slot")]
+                customer.pop("index")
+            report = onboard_customers_bulk(customers, batch_size=batch_size,
+                                            check_conflicts=check_conflicts)
+
+            summary["total"] += report["total"]
+            summary["succeeded"] += report["succeeded"]
+            for result in report["results"]:
+                if result["success"]:
+                    continue
+                if "conflicts" in result:
+                    summary["conflicts"] += 1
+                else:
+                    summary["failed"] += 1
+                    if len(summary["errors"]) < 10:
+                        summary["errors"].append(result["error"])
+
+            if progress:
+                elapsed = time.perf_counter() - t0
+                rate = summary["total"] / elapsed if elapsed else 0.0
+                eta = (count - summary["total"]) / rate if rate else 0.0
+                print(f"[SEED] {summary['total']}/{count} ({summary['total'] / count:.0%}) "
+                      f"creados={summary['succeeded']} {rate:,.0f} filas/s "
+                      f"restante≈{eta:.0f}s")
+
+    elapsed = time.perf_counter() - t0
+    summary["elapsed"] = round(elapsed, 3)
+    summary["hash_pool_seconds"] = round(hash_time, 3)
+    summary["rows_per_second"] = round(summary["succeeded"] / elapsed, 1) if elapsed else 0.0
+    return summary
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Carga masiva de clientes de prueba")
+    parser.add_argument("--count", type=int, required=True, help="Clientes a crear")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--start", type=int, default=0, help="Primer índice de cliente")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, help="Clientes por commit")
+    parser.add_argument("--workers", type=int, help="Procesos que generan datos")
+    parser.add_argument("--hash-pool", type=int, default=DEFAULT_HASH_POOL,
+                        help="Contraseñas / hashes distintos")
+    parser.add_argument("--hash-rounds", type=int, help="Costo bcrypt (por defecto BCRYPT_ROUNDS)")
+    parser.add_argument("--locale", default=DEFAULT_LOCALE)
+    parser.add_argument("--no-check", action="store_true",
+                        help="No verificar duplicados (base vacía o --start nuevo)")
+    parser.add_argument("--sqlite", help="Archivo SQLite local a usar como base")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_DB_PATH"] = args.sqlite
+
+    summary = seed_users(args.count, seed=args.seed, start=args.start, chunk_size=args.chunk_size,
+                         batch_size=args.batch_size, workers=args.workers,
+                         hash_pool=args.hash_pool, hash_rounds=args.hash_rounds,
+                         locale=args.locale, check_conflicts=not args.no_check)
+    print(f"[SEED] {summary['succeeded']} clientes en {summary['elapsed']}s "
+          f"({summary['rows_per_second']:,.0f} filas/s; hashes {summary['hash_pool_seconds']}s) "
+          f"duplicados={summary['conflicts']} errores={summary['failed']}")
+    for error in summary["errors"]:
+        print(f"[SEED]   {error}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
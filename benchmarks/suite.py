@@ -0,0 +1,419 @@
+"""
+suite.py
+Benchmarks de las rutas críticas, con resultados en JSON comparables.
+
+Cubre:
+    is_luhn_valid            utils.card_validator (CPU puro)
+    generate_account_number  models.account_model (id_allocator + permutación)
+    hash_password            utils.security (bcrypt con BCRYPT_ROUNDS)
+    create_ledger_entry      models.ledger_model (INSERT + saldo + commit)
+    create_transfer          services.transaction_service
+    login                    services.auth_service (búsqueda + bcrypt)
+
+Para cada uno mide:
+  - latency    : --iterations llamadas de a una, en un hilo (p50/p95/p99)
+  - throughput : ops/s con 1, 4, ... hilos (--threads) durante --duration s
+
+La base es un archivo SQLite nuevo en un directorio temporal (o --sqlite),
+sembrado con --accounts clientes de benchmarks.seed_users: los resultados
+no dependen de los datos de la base de desarrollo. La caché de lecturas
+de los modelos (config.cache) se desactiva: cada llamada mide la consulta
+a la base, no un acierto en memoria.
+
+Formato del JSON (estable, FORMAT_VERSION):
+    {"format": ..., "created_at": ..., "host": {...}, "config": {...},
+     "benchmarks": {nombre: {"latency": {...},
+                             "throughput": {"<hilos>": {"ops_per_sec": ...}}}}}
+
+compare marca como regresión un p50/p95 que sube, o un throughput que
+baja, más de --threshold % entre dos corridas, y sale con código 1.
+
+Uso:
+    python -m benchmarks.suite run --output base.json
+    python -m benchmarks.suite run --only login,create_transfer --output nuevo.json
+    python -m benchmarks.suite compare base.json nuevo.json --threshold 10
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable
+
+from benchmarks.load_generator import latency_summary
+
+
+FORMAT_VERSION = "synapse-bench/1"
+
+DEFAULT_ITERATIONS = 200
+DEFAULT_DURATION   = 2.0
+DEFAULT_THREADS    = (1, 4)
+DEFAULT_ACCOUNTS   = 200
+DEFAULT_THRESHOLD  = 10.0                      # % de empeoramiento tolerado
+WARMUP_FRACTION    = 0.1
+
+# Métricas de latencia comparadas: (métrica, True si más alto es mejor)
+_LATENCY_METRICS = (("p50_ms", False), ("p95_ms", False))
+
+
+class Benchmark:
+    """
+    Una operación a medir. `op(rng)` hace una llamada; un resultado
+    {"success": False} o una excepción cuenta como error. `heavy` reduce
+    las iteraciones de latencia (operaciones de cientos de ms).
+    """
+
+    def __init__(self, name: str, op: Callable[[random.Random], Any], heavy: bool = False):
+        self.name = name
+        self.op = op
+        self.heavy = heavy
+
+    def call(self, rng: random.Random) -> bool:
+        try:
+            result = self.op(rng)
+        except Exception:
+            return False
+        if isinstance(result, dict):
+            return bool(result.get("success"))
+        if isinstance(result, tuple):
+            return bool(result[0])
+        return True
+
+
+# ─────────────────────────────────────────────
+# Base de prueba y benchmarks
+# ─────────────────────────────────────────────
+
+def _prepare_database(accounts: int, seed: int) -> dict[str, Any]:
+    """
+    Siembra `accounts` clientes con saldo y retorna los datos que usan
+    los benchmarks (cuentas, emails, una transacción para el ledger).
+    """
+    from benchmarks.seed_users import EMAIL_DOMAIN, seed_password, seed_users
+    from config.database import get_cursor
+    from services.transaction_service import ENTRY_CREDIT, create_simple_transaction
+
+    hash_pool = 4
+    summary = seed_users(accounts, seed=seed, hash_pool=hash_pool, progress=False)
+    if summary["failed"]:
+        raise Exception(f"No se pudo sembrar la base de benchmarks: {summary['errors'][:1]}")
+
+    with get_cursor() as cursor:
+        cursor.execute("SELECT a.[Id_account], a.[user_id], u.[email] FROM [account] a "
+                       "INNER JOIN [user] u ON u.[Id_user] = a.[user_id] WHERE u.[email] LIKE ? "
+                       "ORDER BY a.[Id_account]", (f"%@{EMAIL_DOMAIN}",))
+        rows = [tuple(row) for row in cursor.fetchall()][:accounts]
+    if len(rows) < 2:
+        raise Exception("La base de benchmarks no tiene cuentas sembradas.")
+
+    transaction_id = None
+    for account_id, user_id, _ in rows:
+        result = create_simple_transaction(account_id, 1_000_000.0, ENTRY_CREDIT, "Saldo benchmark", user_id)
+        transaction_id = transaction_id or result.get("transaction_id")
+
+    # seed_users asigna la contraseña por el índice del cliente, que va al final del email
+    logins = [(email, seed_password(int(email.split("@")[0].rsplit(".", 1)[1]), hash_pool))
+              for _, _, email in rows]
+    return {
+        "accounts": [(account_id, user_id) for account_id, user_id, _ in rows],
+        "logins": logins,
+        "transaction_id": transaction_id,
+    }
+
+
+def build_benchmarks(fixture: dict[str, Any]) -> list[Benchmark]:
+    from config.database import get_connection
+    from config.id_allocator import next_id
+    from models.account_model import generate_account_number
+    from models.ledger_model import CREDIT, LEDGER_TABLE, create_ledger_entry
+    from services.auth_service import login
+    from services.transaction_service import create_transfer
+    from utils.card_validator import is_luhn_valid
+    from utils.security import hash_password
+
+    accounts = fixture["accounts"]
+    logins = fixture["logins"]
+    transaction_id = fixture["transaction_id"]
+    cards = [f"{random.Random(i).randrange(10 ** 15, 10 ** 16)}" for i in range(1024)]
+
+    def luhn(rng: random.Random) -> bool:
+        is_luhn_valid(cards[rng.randrange(len(cards))])
+        return True
+
+    def ledger_entry(rng: random.Random) -> bool:
+        account_id, _ = accounts[rng.randrange(len(accounts))]
+        entry_id = next_id(LEDGER_TABLE)            # antes de abrir la transacción
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            create_ledger_entry(cursor, transaction_id, account_id, 1.0, CREDIT, entry_id=entry_id)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+        return True
+
+    def transfer(rng: random.Random) -> dict[str, Any]:
+        index = rng.randrange(len(accounts))
+        from_id, user_id = accounts[index]
+        to_id, _ = accounts[(index + rng.randrange(1, len(accounts))) % len(accounts)]
+        return create_transfer(from_id, to_id, 1.0, "Benchmark", user_id)
+
+    def authenticate(rng: random.Random) -> tuple:
+        return login(*logins[rng.randrange(len(logins))])
+
+    return [
+        Benchmark("is_luhn_valid", luhn),
+        Benchmark("generate_account_number", lambda rng: generate_account_number()),
+        Benchmark("hash_password", lambda rng: hash_password("Benchmark123!"), heavy=True),
+        Benchmark("create_ledger_entry", ledger_entry),
+        Benchmark("create_transfer", transfer),
+        Benchmark("login", authenticate, heavy=True),
+    ]
+
+
+# ─────────────────────────────────────────────
+# Medición
+# ─────────────────────────────────────────────
+
+def measure_latency(bench: Benchmark, iterations: int, seed: int) -> dict[str, Any]:
+    """Llamadas de a una en el hilo actual, tras un calentamiento."""
+    rng = random.Random(seed)
+    for _ in range(max(1, int(iterations * WARMUP_FRACTION))):
+        bench.call(rng)
+
+    latencies = []
+    errors = 0
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        if not bench.call(rng):
+            errors += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+    elapsed = time.perf_counter() - t0
+
+    summary = latency_summary(latencies)
+    summary["min_ms"] = round(min(latencies), 3)
+    summary["errors"] = errors
+    summary["ops_per_sec"] = round(iterations / elapsed, 2) if elapsed else 0.0
+    return summary
+
+
+def measure_throughput(bench: Benchmark, threads: int, duration: float, seed: int) -> dict[str, Any]:
+    """`threads` hilos llamando sin pausa durante `duration` segundos."""
+    counts = [0] * threads
+    errors = [0] * threads
+    barrier = threading.Barrier(threads + 1)
+    deadline = [0.0]
+
+    def worker(slot: int) -> None:
+        rng = random.Random(seed * 1000 + slot)
+        barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            if not bench.call(rng):
+                errors[slot] += 1
+            counts[slot] += 1
+
+    pool = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    t0 = time.perf_counter()
+    barrier.wait()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - t0
+
+    operations = sum(counts)
+    return {
+        "threads": threads,
+        "operations": operations,
+        "errors": sum(errors),
+        "elapsed": round(elapsed, 3),
+        "ops_per_sec": round(operations / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def run_suite(only: list[str] | None = None, iterations: int = DEFAULT_ITERATIONS,
+              duration: float = DEFAULT_DURATION, threads: tuple[int, ...] = DEFAULT_THREADS,
+              accounts: int = DEFAULT_ACCOUNTS, seed: int = 1234,
+              sqlite: str | None = None, progress: bool = True) -> dict[str, Any]:
+    """
+    Prepara la base, corre los benchmarks y retorna el documento JSON.
+    """
+    workdir = None
+    if sqlite is None:
+        workdir = tempfile.mkdtemp(prefix="synapse-bench-")
+        sqlite = os.path.join(workdir, "bench.db")
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["SQLITE_DB_PATH"] = sqlite
+    # Antes de importar los modelos: config.cache lee la variable al cargarse
+    os.environ["MODEL_CACHE_ENABLED"] = "0"
+
+    try:
+        fixture = _prepare_database(accounts, seed)
+        benchmarks = build_benchmarks(fixture)
+        unknown = set(only or ()) - {b.name for b in benchmarks}
+        if unknown:
+            raise ValueError(f"Benchmarks desconocidos: {', '.join(sorted(unknown))}.")
+
+        from config.cache import CACHE_ENABLED
+        from utils.security import BCRYPT_ROUNDS
+
+        results = {}
+        for bench in benchmarks:
+            if only and bench.name not in only:
+                continue
+            count = max(5, iterations // 20) if bench.heavy else iterations
+            entry = {"latency": measure_latency(bench, count, seed), "throughput": {}}
+            for n in threads:
+                entry["throughput"][str(n)] = measure_throughput(bench, n, duration, seed)
+            results[bench.name] = entry
+            if progress:
+                print(_format_entry(bench.name, entry))
+
+        return {
+            "format": FORMAT_VERSION,
+            "created_at": datetime.now().isoformat(sep=" ", timespec="seconds"),
+            "host": {"platform": platform.platform(), "python": platform.python_version(),
+                     "cpus": os.cpu_count()},
+            "config": {"iterations": iterations, "duration": duration, "threads": list(threads),
+                       "accounts": len(fixture["accounts"]), "seed": seed,
+                       "bcrypt_rounds": BCRYPT_ROUNDS, "backend": "sqlite",
+                       "model_cache": CACHE_ENABLED},
+            "benchmarks": results,
+        }
+    finally:
+        if workdir:
+            from config.database import close_pool
+            from services.last_login_buffer import shutdown_last_login_buffer
+            shutdown_last_login_buffer()
+            close_pool()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _format_entry(name: str, entry: dict[str, Any]) -> str:
+    lat = entry["latency"]
+    tput = "  ".join(f"{n}h={r['ops_per_sec']:,.0f}/s" for n, r in entry["throughput"].items())
+    return (f"[BENCH] {name:<24} p50={lat['p50_ms']}ms p95={lat['p95_ms']}ms "
+            f"p99={lat['p99_ms']}ms errores={lat['errors']}  {tput}")
+
+
+# ─────────────────────────────────────────────
+# Comparación
+# ─────────────────────────────────────────────
+
+def compare(base: dict[str, Any], new: dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> list[dict[str, Any]]:
+    """
+    Compara dos corridas métrica por métrica.
+
+    Returns:
+        Una fila por métrica presente en ambas: benchmark, metric, base,
+        new, change_pct (positivo = peor) y status ('regression',
+        'improvement' u 'ok').
+    """
+    for doc in (base, new):
+        if doc.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Formato no soportado: {doc.get('format')!r} (se espera {FORMAT_VERSION}).")
+
+    rows = []
+
+    def add(name: str, metric: str, old: float, current: float, higher_is_better: bool) -> None:
+        if not old:
+            return
+        change = (current - old) / old * 100
+        worse = -change if higher_is_better else change
+        status = "regression" if worse > threshold else "improvement" if worse < -threshold else "ok"
+        rows.append({"benchmark": name, "metric": metric, "base": old, "new": current,
+                     "change_pct": round(worse, 2), "status": status})
+
+    for name, old in sorted(base["benchmarks"].items()):
+        current = new["benchmarks"].get(name)
+        if current is None:
+            continue
+        for metric, higher_is_better in _LATENCY_METRICS:
+            add(name, f"latency.{metric}", old["latency"][metric], current["latency"][metric],
+                higher_is_better)
+        for threads, result in sorted(old["throughput"].items(), key=lambda kv: int(kv[0])):
+            if threads in current["throughput"]:
+                add(name, f"throughput.{threads}.ops_per_sec", result["ops_per_sec"],
+                    current["throughput"][threads]["ops_per_sec"], True)
+    return rows
+
+
+def _load(path: str) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de rutas críticas")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Correr los benchmarks")
+    run.add_argument("--only", help="Lista separada por comas de benchmarks")
+    run.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    run.add_argument("--duration", type=float, default=DEFAULT_DURATION,
+                     help="Segundos por medición de throughput")
+    run.add_argument("--threads", default=",".join(map(str, DEFAULT_THREADS)))
+    run.add_argument("--accounts", type=int, default=DEFAULT_ACCOUNTS)
+    run.add_argument("--seed", type=int, default=1234)
+    run.add_argument("--bcrypt-rounds", type=int, help="Costo bcrypt (por defecto BCRYPT_ROUNDS)")
+    run.add_argument("--sqlite", help="Archivo SQLite a usar (por defecto uno temporal)")
+    run.add_argument("--output", help="Archivo JSON de resultados")
+
+    cmp = commands.add_parser("compare", help="Comparar dos corridas")
+    cmp.add_argument("base")
+    cmp.add_argument("new")
+    cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                     help="% de empeoramiento tolerado")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        base, new = _load(args.base), _load(args.new)
+        rows = compare(base, new, args.threshold)
+        differing = sorted(k for k in set(base["config"]) | set(new["config"])
+                           if base["config"].get(k) != new["config"].get(k))
+        if differing:
+            print(f"[BENCH] Atención: configuración distinta en {', '.join(differing)}")
+        marks = {"regression": "❌", "improvement": "✅", "ok": "  "}
+        print(f"   {'benchmark':<24} {'métrica':<30} {'base':>12}   {'nuevo':<12} cambio (+ = peor)")
+        for row in rows:
+            print(f"{marks[row['status']]} {row['benchmark']:<24} {row['metric']:<30} "
+                  f"{row['base']:>12} → {row['new']:<12} {row['change_pct']:+.1f}%")
+        regressions = [r for r in rows if r["status"] == "regression"]
+        print(f"[BENCH] {len(regressions)} regresiones (umbral {args.threshold}%)")
+        return 1 if regressions else 0
+
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    report = run_suite(
+        only=args.only.split(",") if args.only else None,
+        iterations=args.iterations,
+        duration=args.duration,
+        threads=tuple(int(n) for n in args.threads.split(",")),
+        accounts=args.accounts,
+        seed=args.seed,
+        sqlite=args.sqlite,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"[BENCH] Resultado → {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
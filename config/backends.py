@@ -0,0 +1,260 @@
+"""
+backends.py
+Motores de base de datos intercambiables detrás de config.database.
+
+Cada backend expone:
+  - name                       : identificador ('access' o 'sqlite')
+  - connect()                  : abre una conexión física nueva
+  - table_exists(cursor, name) : True si la tabla ya existe
+  - column_types               : tipos SQL por tipo lógico (ver config.schema)
+
+El backend se elige con la variable de entorno DB_BACKEND:
+  - access (por defecto): Microsoft Access vía pyodbc, ACCESS_DB_PATH
+  - sqlite              : archivo SQLite local, SQLITE_DB_PATH
+
+Las conexiones SQLite traducen el SQL de Access al vuelo (config.dialect),
+así que modelos y servicios no necesitan saber sobre qué motor corren.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Iterable
+
+from config.dialect import access_to_sqlite
+
+
+# ─────────────────────────────────────────────
+# Access (pyodbc)
+# ─────────────────────────────────────────────
+
+class AccessBackend:
+    """Microsoft Access a través del driver ODBC de Access."""
+
+    name = "access"
+
+    column_types = {
+        "pk":       "COUNTER PRIMARY KEY",
+        "key":      "TEXT(64) PRIMARY KEY",
+        "intkey":   "LONG PRIMARY KEY",
+        "int":      "LONG",
+        "text":     "TEXT(255)",
+        "money":    "CURRENCY",
+        "datetime": "DATETIME",
+        "bool":     "YESNO",
+    }
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.getenv("ACCESS_DB_PATH")
+        if not self.path:
+            raise ValueError("La variable de entorno ACCESS_DB_PATH no está definida.")
+
+    def connect(self) -> Any:
+        import pyodbc
+
+        try:
+            connection_string = (
+                r"DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};"
+                rf"DBQ={self.path};"
+            )
+            return pyodbc.connect(connection_string)
+        except pyodbc.Error as e:
+            raise Exception(f"Error conectando a la base de datos: {e}")
+
+    def table_exists(self, cursor: Any, table: str) -> bool:
+        return cursor.tables(table=table, tableType="TABLE").fetchone() is not None
+
+    def table_indexes(self, cursor: Any, table: str) -> dict[str, list[str]]:
+        """Índices de la tabla: nombre → columnas en orden."""
+        indexes: dict[str, list[tuple[int, str]]] = {}
+        for row in cursor.statistics(table).fetchall():
+            index_name, position, column = row[5], row[7], row[8]
+            if index_name is None or column is None:     # fila SQL_TABLE_STAT
+                continue
+            indexes.setdefault(index_name, []).append((position, column))
+        return {name: [c for _, c in sorted(cols)] for name, cols in indexes.items()}
+
+
+# ─────────────────────────────────────────────
+# SQLite
+# ─────────────────────────────────────────────
+
+def _adapt_datetime(value: datetime) -> str:
+    return value.isoformat(" ")
+
+
+def _convert_timestamp(value: bytes) -> datetime:
+    return datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+
+
+class SQLiteCursor:
+    """
+    Cursor SQLite que acepta SQL con sintaxis de Access.
+
+    Imita la parte de la API de pyodbc.Cursor que usan los modelos:
+    execute() retorna el propio cursor para permitir encadenar fetchone().
+    """
+
+    __slots__ = ("_cursor",)
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    def execute(self, sql: str, params: Iterable[Any] = ()) -> "SQLiteCursor":
+        self._cursor.execute(access_to_sqlite(sql), tuple(params))
+        return self
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Iterable[Any]]) -> "SQLiteCursor":
+        self._cursor.executemany(access_to_sqlite(sql), seq_of_params)
+        return self
+
+    def fetchone(self) -> Any:
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        if size is None:
+            return self._cursor.fetchmany()
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self) -> list[Any]:
+        return self._cursor.fetchall()
+
+    def close(self) -> None:
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+
+class SQLiteConnection:
+    """Conexión SQLite cuyos cursores traducen SQL de Access."""
+
+    __slots__ = ("_conn",)
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def cursor(self) -> SQLiteCursor:
+        return SQLiteCursor(self._conn.cursor())
+
+    def execute(self, sql: str, params: Iterable[Any] = ()) -> SQLiteCursor:
+        return self.cursor().execute(sql, params)
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def rollback(self) -> None:
+        self._conn.rollback()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+class SQLiteBackend:
+    """
+    Archivo SQLite local, para desarrollo, pruebas de carga y benchmarks.
+
+    La primera conexión crea el esquema y sus índices (config.migrations)
+    si faltan, salvo que SQLITE_BOOTSTRAP=0.
+    """
+
+    name = "sqlite"
+
+    column_types = {
+        "pk":       "INTEGER PRIMARY KEY AUTOINCREMENT",
+        "key":      "TEXT PRIMARY KEY",
+        "intkey":   "INTEGER PRIMARY KEY",
+        "int":      "INTEGER",
+        "text":     "TEXT",
+        "money":    "REAL",
+        "datetime": "TIMESTAMP",
+        "bool":     "BOOLEAN",
+    }
+
+    def __init__(self, path: str | None = None, bootstrap: bool | None = None,
+                 busy_timeout: float | None = None):
+        self.path = path or os.getenv("SQLITE_DB_PATH", "synapse.db")
+        if bootstrap is None:
+            bootstrap = os.getenv("SQLITE_BOOTSTRAP", "1") != "0"
+        if busy_timeout is None:
+            busy_timeout = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+        self.bootstrap = bootstrap
+        self.busy_timeout = busy_timeout
+        self._bootstrapped = False
+        self._bootstrap_lock = threading.Lock()
+
+    def _open(self) -> SQLiteConnection:
+        raw = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,     # el pool garantiza un único usuario a la vez
+            uri=self.path.startswith("file:"),
+        )
+        raw.row_factory = sqlite3.Row
+        if self.path != ":memory:" and "mode=memory" not in self.path:
+            raw.execute("PRAGMA journal_mode=WAL")
+        raw.execute("PRAGMA foreign_keys=ON")
+        return SQLiteConnection(raw)
+
+    def connect(self) -> SQLiteConnection:
+        try:
+            conn = self._open()
+        except sqlite3.Error as e:
+            raise Exception(f"Error conectando a la base de datos: {e}")
+
+        if self.bootstrap and not self._bootstrapped:
+            with self._bootstrap_lock:
+                if not self._bootstrapped:
+                    from config.migrations import migrate
+                    migrate(conn, self)
+                    self._bootstrapped = True
+        return conn
+
+    def table_exists(self, cursor: Any, table: str) -> bool:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        )
+        return cursor.fetchone() is not None
+
+    def table_indexes(self, cursor: Any, table: str) -> dict[str, list[str]]:
+        """Índices de la tabla: nombre → columnas en orden."""
+        cursor.execute(f"PRAGMA index_list(\"{table}\")")
+        names = [row[1] for row in cursor.fetchall()]
+        indexes = {}
+        for name in names:
+            cursor.execute(f"PRAGMA index_info(\"{name}\")")
+            indexes[name] = [row[2] for row in sorted(cursor.fetchall(), key=lambda r: r[0])]
+        return indexes
+
+
+# ─────────────────────────────────────────────
+# Selección por configuración
+# ─────────────────────────────────────────────
+BACKENDS = {
+    AccessBackend.name: AccessBackend,
+    SQLiteBackend.name: SQLiteBackend,
+}
+
+
+def create_backend(name: str | None = None) -> Any:
+    """
+    Instancia el backend indicado (o el de DB_BACKEND, 'access' por defecto).
+    """
+    name = (name or os.getenv("DB_BACKEND", "access")).strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(
+            f"DB_BACKEND inválido: '{name}'. Opciones: {', '.join(sorted(BACKENDS))}."
+        )
+    return BACKENDS[name]()
@@ -0,0 +1,201 @@
+"""
+cache.py
+Caché de lecturas en memoria del proceso, con TTL y desalojo LRU.
+
+Streamlit vuelve a ejecutar la página completa en cada interacción, así
+que lecturas como get_user_by_id o get_account_by_user se repetirían
+contra la base en cada clic aunque el dato casi nunca cambie. Los modelos
+envuelven esas lecturas con ReadCache.get_or_load() y, en sus propias
+escrituras, invalidan las entradas afectadas.
+
+  - Cada entrada vence a los TTL segundos (cambios hechos por otros
+    procesos se ven, a lo sumo, con ese atraso).
+  - Con la caché llena se descarta la entrada usada hace más tiempo.
+  - Los resultados None no se guardan: "no existe" siempre se consulta.
+  - Una carga en curso no se guarda si su clave se invalidó mientras
+    consultaba la base; invalidar otras claves no la afecta.
+  - Contadores de aciertos / fallos / desalojos por caché
+    (get_cache_stats()).
+
+Configuración:
+  - MODEL_CACHE_ENABLED=0  desactiva la caché (cada lectura va a la base)
+  - MODEL_CACHE_TTL        segundos de vida de una entrada (por defecto 30)
+  - MODEL_CACHE_SIZE       entradas por caché (por defecto 1024)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+CACHE_ENABLED = os.getenv("MODEL_CACHE_ENABLED", "1") != "0"
+CACHE_TTL     = float(os.getenv("MODEL_CACHE_TTL", "30"))
+CACHE_SIZE    = int(os.getenv("MODEL_CACHE_SIZE", "1024"))
+
+
+class _Loading:
+    """Estado de las cargas en curso de una clave."""
+
+    __slots__ = ("count", "generation", "predicates")
+
+    def __init__(self):
+        self.count = 0
+        self.generation = 0
+        self.predicates: list[Callable[[Hashable, Any], bool]] = []
+
+
+class ReadCache:
+    """
+    Mapa clave → valor con vencimiento por TTL y desalojo LRU, seguro
+    entre hilos.
+    """
+
+    def __init__(self, name: str, ttl: float = CACHE_TTL, max_size: int = CACHE_SIZE):
+        if max_size < 1:
+            raise ValueError("max_size debe ser al menos 1.")
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Cargas en curso por clave: solo se registran invalidaciones de
+        # claves que alguien está cargando, así que no crece con la caché
+        self._loading: dict[Hashable, _Loading] = {}
+        # Aumenta con clear(): ninguna carga que empezó antes se guarda
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Retorna el valor en caché para `key` o lo carga con `loader()`.
+        """
+        if not CACHE_ENABLED:
+            return loader()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            loading = self._loading.get(key)
+            if loading is None:
+                loading = self._loading[key] = _Loading()
+            loading.count += 1
+            ticket = (self._generation, loading.generation, len(loading.predicates))
+
+        # La consulta se hace fuera del lock: otra lectura no espera por ella
+        value = None
+        try:
+            value = loader()
+        finally:
+            with self._lock:
+                if value is not None and self._still_valid(key, value, loading, ticket):
+                    self._store(key, value)
+                loading.count -= 1
+                if not loading.count:
+                    del self._loading[key]
+        return value
+
+    def _still_valid(self, key: Hashable, value: Any, loading: "_Loading",
+                     ticket: tuple[int, int, int]) -> bool:
+        """False si la clave se invalidó después de empezar la carga (con el lock tomado)."""
+        generation, key_generation, seen = ticket
+        if generation != self._generation or key_generation != loading.generation:
+            return False
+        return not any(predicate(key, value) for predicate in loading.predicates[seen:])
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                loading = self._loading.get(key)
+                if loading is not None:
+                    loading.generation += 1
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        """
+        Descarta las entradas para las que predicate(clave, valor) es True.
+        Las cargas en curso se evalúan con el mismo predicado al terminar.
+        """
+        with self._lock:
+            for loading in self._loading.values():
+                loading.predicates.append(predicate)
+            stale = [key for key, (_, value) in self._entries.items() if predicate(key, value)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+
+# ─────────────────────────────────────────────
+# Registro de cachés del proceso
+# ─────────────────────────────────────────────
+
+_caches: dict[str, ReadCache] = {}
+_registry_lock = threading.Lock()
+
+
+def get_cache(name: str, ttl: float = CACHE_TTL, max_size: int = CACHE_SIZE) -> ReadCache:
+    """Caché con nombre, creada en el primer uso."""
+    with _registry_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = _caches[name] = ReadCache(name, ttl, max_size)
+        return cache
+
+
+def get_cache_stats() -> dict[str, dict[str, Any]]:
+    """Contadores de cada caché registrada."""
+    with _registry_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+
+def clear_caches() -> None:
+    with _registry_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.clear()
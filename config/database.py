@@ -1,33 +1,426 @@
-import pyodbc
+"""
+database.py
+Acceso a la base de datos con un pool de conexiones acotado.
+
+El motor se elige con DB_BACKEND (ver config.backends): Access vía pyodbc
+por defecto, o SQLite para correr modelos, servicios y pruebas de carga
+en cualquier máquina. Ambos cumplen el mismo contrato de
+get_connection() / get_cursor().
+
+Abrir una conexión ODBC contra Access cuesta más que las consultas que
+se ejecutan sobre ella, así que get_connection() y get_cursor() toman
+prestada una conexión del pool y la devuelven al cerrarla:
+
+  - Tamaño mínimo/máximo configurable (DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE)
+  - Tiempo máximo de espera al pedir una conexión (DB_POOL_TIMEOUT)
+  - Validación de vida al entregar una conexión ociosa
+  - Reciclaje por antigüedad máxima (DB_POOL_MAX_LIFETIME)
+  - Estadísticas: esperas, préstamos, creaciones, descartes
+
+DB_POOL_MAX_SIZE=0 desactiva el pool: cada llamada abre y cierra su
+propia conexión, como antes.
+
+Con DB_QUERY_STATS=1 los cursores se instrumentan (ver config.query_stats).
+"""
+
+import atexit
 import os
+import threading
+import time
+from collections import deque
 from contextlib import contextmanager
-from typing import Generator
+from typing import Any, Generator
+
 from dotenv import load_dotenv
 
+from config import query_stats
+from config.backends import create_backend
+
 load_dotenv()
 
-DATABASE_PATH = os.getenv("ACCESS_DB_PATH")
 
-if not DATABASE_PATH:
-    raise ValueError("La variable de entorno ACCESS_DB_PATH no está definida.")
+# ─────────────────────────────────────────────
+# Configuración del pool
+# ─────────────────────────────────────────────
+POOL_MIN_SIZE         = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE         = int(os.getenv("DB_POOL_MAX_SIZE", "5"))
+POOL_TIMEOUT          = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_MAX_LIFETIME     = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+POOL_VALIDATION_QUERY = os.getenv("DB_POOL_VALIDATION_QUERY", "SELECT 1")
+
+
+class PoolTimeoutError(Exception):
+    """No se liberó ninguna conexión dentro del tiempo de espera."""
+
 
+_backend = None
+_backend_lock = threading.Lock()
 
-def get_connection() -> pyodbc.Connection:
+
+def get_backend() -> Any:
+    """
+    Retorna el backend activo (según DB_BACKEND), creándolo la primera vez.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def _connect() -> Any:
     """
-    Retorna una conexión activa a la base de datos Access.
+    Abre una conexión física nueva con el backend activo.
     """
+    return get_backend().connect()
+
+
+def _close_quietly(conn: Any) -> None:
     try:
-        connection_string = (
-            r"DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};"
-            rf"DBQ={DATABASE_PATH};"
-        )
-        return pyodbc.connect(connection_string)
-    except pyodbc.Error as e:
-        raise Exception(f"Error conectando a la base de datos: {e}")
+        conn.close()
+    except Exception:
+        pass
+
+
+# ─────────────────────────────────────────────
+# Pool de conexiones
+# ─────────────────────────────────────────────
+
+class ConnectionPool:
+    """
+    Pool de conexiones thread-safe.
+
+    Las conexiones ociosas se guardan en una pila (LIFO) para reutilizar
+    primero las más recientes; las que exceden max_lifetime o fallan la
+    validación se cierran y se reemplazan por una nueva.
+    """
+
+    def __init__(self, connect=_connect, min_size: int = POOL_MIN_SIZE,
+                 max_size: int = POOL_MAX_SIZE, timeout: float = POOL_TIMEOUT,
+                 max_lifetime: float = POOL_MAX_LIFETIME,
+                 validation_query: str | None = POOL_VALIDATION_QUERY):
+        if max_size < 1:
+            raise ValueError("max_size debe ser al menos 1.")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size debe estar entre 0 y max_size.")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.validation_query = validation_query
+
+        self._lock = threading.Condition()
+        self._idle: deque[tuple[Any, float]] = deque()   # (conexión, creada_en)
+        self._created_at: dict[int, float] = {}          # id(conn) → creada_en
+        self._size = 0                                   # conexiones abiertas o reservadas
+        self._closed = False
+        self._prefilled = False
+
+        self._stats = {
+            "checkouts":     0,
+            "waits":         0,
+            "wait_time":     0.0,
+            "timeouts":      0,
+            "creations":     0,
+            "recycled":      0,
+            "invalidated":   0,
+            "discarded":     0,
+        }
+
+    # ── Internos ────────────────────────────────────────────────────────
+
+    def _create(self) -> Any:
+        """Abre una conexión física. El llamador ya reservó su lugar en _size."""
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+        now = time.monotonic()
+        with self._lock:
+            self._created_at[id(conn)] = now
+            self._stats["creations"] += 1
+        return conn
+
+    def _drop(self, conn: Any, reason: str) -> None:
+        """Cierra una conexión y libera su lugar en el pool."""
+        _close_quietly(conn)
+        with self._lock:
+            self._created_at.pop(id(conn), None)
+            self._size -= 1
+            self._stats[reason] += 1
+            self._lock.notify()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.max_lifetime > 0 and time.monotonic() - created_at > self.max_lifetime
+
+    def _is_alive(self, conn: Any) -> bool:
+        if not self.validation_query:
+            return True
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(self.validation_query)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _prefill(self) -> None:
+        """Abre las conexiones mínimas la primera vez que se usa el pool."""
+        with self._lock:
+            if self._prefilled:
+                return
+            self._prefilled = True
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+
+        for _ in range(missing):
+            try:
+                conn = self._create()
+            except Exception:
+                # El préstamo en curso reportará el error si persiste
+                continue
+            with self._lock:
+                self._idle.append((conn, self._created_at[id(conn)]))
+                self._lock.notify()
+
+    # ── API pública ─────────────────────────────────────────────────────
+
+    def acquire(self, timeout: float | None = None) -> Any:
+        """
+        Toma prestada una conexión del pool.
+
+        Si todas están en uso y el pool llegó a max_size, espera hasta
+        `timeout` segundos (por defecto el del pool) a que se libere una.
+
+        Raises:
+            PoolTimeoutError: Si no se liberó ninguna a tiempo.
+            Exception: Si el pool está cerrado o la conexión falla.
+        """
+        if not self._prefilled:
+            self._prefill()
+
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        wait_started = 0.0
+
+        while True:
+            candidate = None
+            create = False
+
+            with self._lock:
+                while True:
+                    if self._closed:
+                        raise Exception("El pool de conexiones está cerrado.")
+                    if self._idle:
+                        candidate = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"No hay conexiones disponibles tras esperar {timeout} s "
+                            f"(max_size={self.max_size})."
+                        )
+                    if not waited:
+                        waited = True
+                        wait_started = time.monotonic()
+                        self._stats["waits"] += 1
+                    self._lock.wait(remaining)
+
+                if waited:
+                    self._stats["wait_time"] += time.monotonic() - wait_started
+
+            if create:
+                conn = self._create()
+            else:
+                conn, created_at = candidate
+                if self._expired(created_at):
+                    self._drop(conn, "recycled")
+                    continue
+                if not self._is_alive(conn):
+                    self._drop(conn, "invalidated")
+                    continue
+
+            with self._lock:
+                self._stats["checkouts"] += 1
+            return conn
+
+    def release(self, conn: Any, discard: bool = False) -> None:
+        """
+        Devuelve una conexión al pool.
+
+        Cualquier trabajo sin commit se descarta con rollback(); si el
+        rollback falla, la conexión se considera rota y se cierra.
+        """
+        if discard:
+            self._drop(conn, "discarded")
+            return
+
+        try:
+            conn.rollback()
+        except Exception:
+            self._drop(conn, "discarded")
+            return
+
+        with self._lock:
+            created_at = self._created_at.get(id(conn))
+            if created_at is None:
+                # No pertenece a este pool (o ya fue descartada)
+                _close_quietly(conn)
+                return
+            if not self._closed and not self._expired(created_at):
+                self._idle.append((conn, created_at))
+                self._lock.notify()
+                return
+
+        self._drop(conn, "recycled")
+
+    def close(self) -> None:
+        """Cierra todas las conexiones ociosas y rechaza préstamos futuros."""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            self._drop(conn, "discarded")
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Retorna una copia de las estadísticas del pool.
+
+        Incluye contadores acumulados (checkouts, waits, wait_time, timeouts,
+        creations, recycled, invalidated, discarded) y el estado actual
+        (size, idle, in_use).
+        """
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["size"] = self._size
+            snapshot["idle"] = len(self._idle)
+            snapshot["in_use"] = self._size - len(self._idle)
+            snapshot["min_size"] = self.min_size
+            snapshot["max_size"] = self.max_size
+        return snapshot
+
+
+class PooledConnection:
+    """
+    Envoltura de una conexión prestada por el pool.
+
+    Se comporta como la conexión original, pero close() la devuelve al
+    pool en vez de cerrarla. Así el código que ya hace conn.close() en
+    su bloque finally reutiliza conexiones sin cambios.
+    """
+
+    __slots__ = ("_conn", "_pool")
+
+    def __init__(self, conn: Any, pool: ConnectionPool):
+        self._conn = conn
+        self._pool = pool
+
+    def __getattr__(self, name: str) -> Any:
+        conn = object.__getattribute__(self, "_conn")
+        if conn is None:
+            raise Exception("La conexión ya fue devuelta al pool.")
+        return getattr(conn, name)
+
+    def cursor(self) -> Any:
+        conn = self._conn
+        if conn is None:
+            raise Exception("La conexión ya fue devuelta al pool.")
+        if query_stats.ENABLED:
+            return query_stats.InstrumentedCursor(conn.cursor())
+        return conn.cursor()
+
+    def __enter__(self) -> "PooledConnection":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+    def discard(self) -> None:
+        """Cierra la conexión física en lugar de devolverla al pool."""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn, discard=True)
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool | None:
+    """
+    Retorna el pool global, creándolo la primera vez.
+    Retorna None si el pool está desactivado (DB_POOL_MAX_SIZE=0).
+    """
+    global _pool
+    if POOL_MAX_SIZE <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def close_pool() -> None:
+    """Cierra el pool global (se llama automáticamente al salir)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+def get_pool_stats() -> dict[str, Any]:
+    """Estadísticas del pool global ({} si está desactivado)."""
+    pool = get_pool()
+    return pool.stats() if pool else {}
+
+
+atexit.register(close_pool)
+
+
+# ─────────────────────────────────────────────
+# API de conexión
+# ─────────────────────────────────────────────
+
+def get_connection() -> Any:
+    """
+    Retorna una conexión activa a la base de datos.
+
+    La conexión sale del pool; al llamar conn.close() vuelve a él.
+    """
+    pool = get_pool()
+    if pool is None:
+        if query_stats.ENABLED:
+            return query_stats.InstrumentedConnection(_connect())
+        return _connect()
+    return PooledConnection(pool.acquire(), pool)
 
 
 @contextmanager
-def get_cursor(commit: bool = False) -> Generator[pyodbc.Cursor, None, None]:
+def get_cursor(commit: bool = False) -> Generator[Any, None, None]:
     """
     Context manager para manejar cursor y conexión automáticamente.
 
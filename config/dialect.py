@@ -0,0 +1,48 @@
+"""
+dialect.py
+Traducción de SQL escrito para Access (Jet/ACE) a otros motores.
+
+Los modelos escriben SQL con los modismos de Access:
+  - Identificadores entre corchetes: [user], [transaction]
+  - SELECT @@IDENTITY para obtener el último ID autonumérico
+  - Now() para la fecha/hora actual
+  - SELECT TOP n para limitar filas
+
+Este módulo los reescribe para SQLite, de modo que el mismo código de
+modelos y servicios corre sin cambios sobre cualquiera de los dos. El
+texto entre comillas simples (literales, con '' como comilla escapada)
+se deja intacto: '[nota]' sigue siendo el mismo valor.
+"""
+
+import re
+from functools import lru_cache
+
+
+_LITERAL   = re.compile(r"('(?:[^']|'')*')")
+_BRACKETED = re.compile(r"\[([^\[\]]+)\]")
+_IDENTITY  = re.compile(r"@@IDENTITY", re.IGNORECASE)
+_NOW       = re.compile(r"\bNow\(\s*\)", re.IGNORECASE)
+# Admite el prefijo EXPLAIN QUERY PLAN de migrations.verify
+_TOP       = re.compile(r"^(\s*(?:EXPLAIN\s+QUERY\s+PLAN\s+)?SELECT\s+)TOP\s+(\d+)\s+", re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def access_to_sqlite(sql: str) -> str:
+    """
+    Reescribe una sentencia SQL de Access al dialecto de SQLite.
+
+    El resultado se cachea: los modelos usan un conjunto pequeño de
+    sentencias constantes, así que la traducción se hace una sola vez.
+    """
+    # split con grupo: posiciones impares = literales entre comillas
+    parts = _LITERAL.split(sql)
+    for i in range(0, len(parts), 2):
+        part = _BRACKETED.sub(r'"\1"', parts[i])
+        part = _IDENTITY.sub("last_insert_rowid()", part)
+        parts[i] = _NOW.sub("datetime('now', 'localtime')", part)
+    sql = "".join(parts)
+
+    top = _TOP.match(sql)
+    if top:
+        sql = f"{top.group(1)}{sql[top.end():].rstrip().rstrip(';')} LIMIT {top.group(2)}"
+    return sql
@@ -0,0 +1,233 @@
+"""
+id_allocator.py
+Asignación de IDs por bloques (hi/lo) sin SELECT @@IDENTITY.
+
+Cada tabla con clave autonumérica tiene una fila en id_sequence con el
+próximo valor libre. Reservar un bloque es un único UPDATE + SELECT con
+commit propio; los IDs del bloque se reparten luego desde memoria, así
+que insertar una fila ya no necesita una segunda consulta para conocer
+su ID y los INSERT de varias filas pasan a ser posibles.
+
+Seguridad entre procesos: el UPDATE ... SET next_value = next_value + n
+toma el bloqueo de escritura de la fila, de modo que dos procesos nunca
+reciben el mismo bloque. Un bloque no usado (reinicio del proceso,
+rollback del llamador) solo deja huecos en la numeración.
+
+IMPORTANTE:
+  - Todos los escritores de una tabla administrada deben usar este módulo;
+    mezclarlo con el autonumérico del motor puede generar colisiones.
+  - Reserve los IDs ANTES de empezar a escribir en su transacción
+    (next_ids). En SQLite la reserva usa otra conexión y esperaría al
+    bloqueo de escritura que la propia transacción del llamador retiene.
+
+Secuencias con nombre: un nombre que no es una tabla del esquema (p. ej.
+"account_number") es un contador libre que empieza en 0.
+
+Configuración: ID_BLOCK_SIZE (por defecto 100).
+"""
+
+import os
+import threading
+from typing import Any
+
+from config.schema import TABLES, create_table_sql
+
+
+ID_BLOCK_SIZE = int(os.getenv("ID_BLOCK_SIZE", "100"))
+
+SEQUENCE_TABLE = "id_sequence"
+
+
+def _primary_key(table: str) -> str:
+    for name, kind in TABLES[table]:
+        if kind == "pk":
+            return name
+    raise ValueError(f"La tabla '{table}' no tiene clave autonumérica.")
+
+
+class IdAllocator:
+    """
+    Reparte IDs desde bloques reservados en id_sequence, uno por tabla.
+
+    Usa una conexión dedicada (fuera del pool) para que reservar un
+    bloque nunca compita por el pool con el llamador que ya tiene una
+    conexión prestada.
+    """
+
+    def __init__(self, block_size: int = ID_BLOCK_SIZE, backend: Any = None):
+        if block_size < 1:
+            raise ValueError("block_size debe ser al menos 1.")
+        self.block_size = block_size
+        self._backend = backend
+        self._conn = None
+        self._lock = threading.Lock()
+        self._blocks: dict[str, list[int]] = {}    # tabla → [siguiente, límite)
+        self._table_ready = False
+        self.reservations = 0
+
+    # ── Internos ────────────────────────────────────────────────────────
+
+    def _get_backend(self) -> Any:
+        if self._backend is None:
+            from config.database import get_backend
+            self._backend = get_backend()
+        return self._backend
+
+    def _get_conn(self) -> Any:
+        if self._conn is None:
+            self._conn = self._get_backend().connect()
+        return self._conn
+
+    def _ensure_table(self, conn: Any) -> None:
+        if self._table_ready:
+            return
+        backend = self._get_backend()
+        cursor = conn.cursor()
+        try:
+            if not backend.table_exists(cursor, SEQUENCE_TABLE):
+                cursor.execute(create_table_sql(SEQUENCE_TABLE, backend))
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            # Otro proceso pudo crearla en paralelo
+            if not backend.table_exists(cursor, SEQUENCE_TABLE):
+                raise
+        finally:
+            cursor.close()
+        self._table_ready = True
+
+    def _reserve(self, table: str, count: int) -> int:
+        """
+        Reserva `count` IDs consecutivos para `table` y retorna el primero.
+        Hace commit en su propia conexión.
+        """
+        conn = self._get_conn()
+        self._ensure_table(conn)
+        cursor = conn.cursor()
+        try:
+            for _ in range(3):
+                cursor.execute(
+                    f"UPDATE [{SEQUENCE_TABLE}] SET [next_value] = [next_value] + ? "
+                    f"WHERE [table_name] = ?",
+                    (count, table),
+                )
+                if cursor.rowcount:
+                    cursor.execute(
+                        f"SELECT [next_value] FROM [{SEQUENCE_TABLE}] WHERE [table_name] = ?",
+                        (table,),
+                    )
+                    end = int(cursor.fetchone()[0])
+                    conn.commit()
+                    self.reservations += 1
+                    return end - count
+
+                # Primera reserva: una tabla arranca después de su máximo actual,
+                # una secuencia con nombre arranca en 0
+                if table in TABLES:
+                    pk = _primary_key(table)
+                    cursor.execute(f"SELECT MAX([{pk}]) FROM [{table}]")
+                    row = cursor.fetchone()
+                    start = (int(row[0]) if row and row[0] is not None else 0) + 1
+                else:
+                    start = 0
+                try:
+                    cursor.execute(
+                        f"INSERT INTO [{SEQUENCE_TABLE}] ([table_name], [next_value]) VALUES (?, ?)",
+                        (table, start + count),
+                    )
+                    conn.commit()
+                    self.reservations += 1
+                    return start
+                except Exception:
+                    # Otro proceso inicializó la secuencia primero; reintentar el UPDATE
+                    conn.rollback()
+
+            raise Exception(f"No se pudo reservar un bloque de IDs para '{table}'.")
+
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            # La conexión pudo quedar inutilizable; se reabre en la próxima reserva
+            self._conn = None
+            try:
+                conn.close()
+            except Exception:
+                pass
+            raise
+
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    # ── API pública ─────────────────────────────────────────────────────
+
+    def next_ids(self, table: str, count: int) -> list[int]:
+        """
+        Retorna `count` IDs nuevos para `table`.
+
+        Se sirven del bloque en memoria; si no alcanza, se reserva un
+        bloque nuevo de al menos block_size IDs (una sola ida a la base).
+        """
+        if count < 1:
+            return []
+
+        with self._lock:
+            block = self._blocks.get(table)
+            ids: list[int] = []
+            if block:
+                take = min(count, block[1] - block[0])
+                ids.extend(range(block[0], block[0] + take))
+                block[0] += take
+
+            missing = count - len(ids)
+            if missing:
+                size = max(self.block_size, missing)
+                start = self._reserve(table, size)
+                ids.extend(range(start, start + missing))
+                self._blocks[table] = [start + missing, start + size]
+
+            return ids
+
+    def next_id(self, table: str) -> int:
+        """Retorna un ID nuevo para `table`."""
+        return self.next_ids(table, 1)[0]
+
+    def reset(self) -> None:
+        """Olvida los bloques en memoria y cierra la conexión dedicada."""
+        with self._lock:
+            self._blocks.clear()
+            self._table_ready = False
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
+
+
+_allocator: IdAllocator | None = None
+_allocator_lock = threading.Lock()
+
+
+def get_allocator() -> IdAllocator:
+    """Retorna el asignador global, creándolo la primera vez."""
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                _allocator = IdAllocator()
+    return _allocator
+
+
+def next_id(table: str) -> int:
+    """Atajo: un ID nuevo para `table` desde el asignador global."""
+    return get_allocator().next_id(table)
+
+
+def next_ids(table: str, count: int) -> list[int]:
+    """Atajo: `count` IDs nuevos para `table` desde el asignador global."""
+    return get_allocator().next_ids(table, count)
@@ -0,0 +1,209 @@
+"""
+logger.py
+Logging del paquete: niveles por módulo, campos clave=valor y escritura
+en segundo plano.
+
+Reemplaza los print() de modelos y servicios. Cada módulo crea su logger
+con su etiqueta de siempre:
+
+    log = get_logger(__name__, "TX_SERVICE")
+    log.debug("Transferencia iniciada", from_account=1, to_account=2, amount=10.0)
+
+    → 2025-01-01 10:00:00,123 DEBUG   [TX_SERVICE] Transferencia iniciada from_account=1 to_account=2 amount=10.0
+
+El hilo que registra solo encola el evento (QueueHandler); la escritura a
+stdout / archivo la hace un hilo de fondo (QueueListener), así que una
+solicitud nunca espera por I/O. Los mensajes bajo el nivel configurado
+se descartan antes de formatear nada.
+
+Configuración:
+  - LOG_ENABLED=0      apaga todo el logging (p. ej. para benchmarks);
+                       también disable_logging() / enable_logging()
+  - LOG_LEVEL          nivel general (por defecto INFO)
+  - LOG_LEVELS         niveles por módulo, p. ej.
+                       "services.transaction_service=DEBUG,models=WARNING"
+  - LOG_FORMAT         'text' (por defecto) o 'json' (una línea por evento)
+  - LOG_FILE           archivo adicional de salida (opcional)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from typing import Any
+
+
+LOG_ENABLED = os.getenv("LOG_ENABLED", "1") != "0"
+LOG_LEVEL   = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS  = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT  = os.getenv("LOG_FORMAT", "text").lower()
+LOG_FILE    = os.getenv("LOG_FILE", "")
+
+ROOT_LOGGER = "synapse"
+
+_RESERVED = frozenset(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "asctime"}
+
+
+# ─────────────────────────────────────────────
+# Formato
+# ─────────────────────────────────────────────
+
+def _format_value(value: Any) -> str:
+    text = str(value)
+    return repr(text) if (not text or " " in text or "=" in text) else text
+
+
+class KeyValueFormatter(logging.Formatter):
+    """fecha NIVEL [ETIQUETA] mensaje clave=valor ..."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s [%(tag)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "tag"):
+            record.tag = record.name
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            text += " " + " ".join(f"{k}={_format_value(v)}" for k, v in fields.items())
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea, con los campos al primer nivel."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "tag": getattr(record, "tag", record.name),
+            "msg": record.getMessage(),
+        }
+        for key, value in (getattr(record, "fields", None) or {}).items():
+            event[key if key not in event else f"field_{key}"] = value
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+# ─────────────────────────────────────────────
+# Configuración (perezosa, una vez por proceso)
+# ─────────────────────────────────────────────
+
+_lock = threading.Lock()
+_listener: logging.handlers.QueueListener | None = None
+
+
+def _parse_levels(spec: str) -> dict[str, str]:
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _configure() -> None:
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+
+        formatter = JsonFormatter() if LOG_FORMAT == "json" else KeyValueFormatter()
+        handlers: list[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+        if LOG_FILE:
+            handlers.append(logging.FileHandler(LOG_FILE, encoding="utf-8"))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        events: queue.SimpleQueue = queue.SimpleQueue()
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+        root.addHandler(logging.handlers.QueueHandler(events))
+
+        for name, level in _parse_levels(LOG_LEVELS).items():
+            logging.getLogger(f"{ROOT_LOGGER}.{name}").setLevel(level)
+
+        _listener = logging.handlers.QueueListener(events, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(flush_logging)
+
+
+def flush_logging() -> None:
+    """Detiene el hilo de fondo tras escribir lo pendiente (se llama al salir)."""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        logging.getLogger(ROOT_LOGGER).handlers.clear()
+
+
+def disable_logging() -> None:
+    global LOG_ENABLED
+    LOG_ENABLED = False
+
+
+def enable_logging() -> None:
+    global LOG_ENABLED
+    LOG_ENABLED = True
+
+
+def set_level(module: str, level: str) -> None:
+    """Cambia el nivel de un módulo (o prefijo) en caliente."""
+    logging.getLogger(f"{ROOT_LOGGER}.{module}" if module else ROOT_LOGGER).setLevel(level.upper())
+
+
+# ─────────────────────────────────────────────
+# Logger con campos clave=valor
+# ─────────────────────────────────────────────
+
+class KVLogger:
+    """
+    Envoltorio de logging.Logger: log.info("mensaje", clave=valor, ...).
+    """
+
+    __slots__ = ("_logger", "tag")
+
+    def __init__(self, logger: logging.Logger, tag: str):
+        self._logger = logger
+        self.tag = tag
+
+    def is_enabled(self, level: int) -> bool:
+        return LOG_ENABLED and self._logger.isEnabledFor(level)
+
+    def _log(self, level: int, msg: str, fields: dict[str, Any], exc_info: bool = False) -> None:
+        if LOG_ENABLED and self._logger.isEnabledFor(level):
+            for key in fields.keys() & _RESERVED:
+                fields[f"field_{key}"] = fields.pop(key)
+            self._logger.log(level, msg, exc_info=exc_info, stacklevel=3,
+                             extra={"tag": self.tag, "fields": fields})
+
+    def debug(self, msg: str, **fields: Any) -> None:
+        self._log(logging.DEBUG, msg, fields)
+
+    def info(self, msg: str, **fields: Any) -> None:
+        self._log(logging.INFO, msg, fields)
+
+    def warning(self, msg: str, **fields: Any) -> None:
+        self._log(logging.WARNING, msg, fields)
+
+    def error(self, msg: str, **fields: Any) -> None:
+        self._log(logging.ERROR, msg, fields)
+
+    def exception(self, msg: str, **fields: Any) -> None:
+        self._log(logging.ERROR, msg, fields, exc_info=True)
+
+
+def get_logger(module: str, tag: str | None = None) -> KVLogger:
+    """
+    Logger del módulo (normalmente __name__), con la etiqueta que se
+    muestra entre corchetes.
+    """
+    if _listener is None:
+        _configure()
+    return KVLogger(logging.getLogger(f"{ROOT_LOGGER}.{module}"), tag or module)
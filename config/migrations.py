@@ -0,0 +1,309 @@
+"""
+migrations.py
+Migraciones versionadas del esquema y verificación de índices.
+
+Cada migración tiene un número de versión y se registra en schema_version
+al aplicarse, en la misma transacción que su DDL. migrate() aplica en
+orden las que falten; es seguro ejecutarlo varias veces y desde varios
+procesos a la vez (un índice o tabla que ya existe se da por creado).
+
+Los índices cubren los filtros de las consultas calientes de los modelos
+(HOT_QUERIES). Un índice ya existente con las mismas columnas iniciales
+(por ejemplo, creado a mano en el .accdb) se reutiliza en lugar de
+duplicarlo. verify() reporta qué consultas calientes no tienen índice en
+la base actual; en SQLite muestra además el plan (EXPLAIN QUERY PLAN).
+
+La migración 5 carga account_balance desde el ledger (bases Access
+anteriores a la tabla de saldos); hasta aplicarla los movimientos no
+escriben en account_balance ni se exigen fondos suficientes en los
+débitos (ver models.balance_model.balances_initialized).
+
+Funciona sobre Access y SQLite (config.backends).
+
+Uso:
+    python -m config.migrations migrate
+    python -m config.migrations status
+    python -m config.migrations verify
+"""
+
+from datetime import datetime
+from typing import Any, Callable
+
+from config.logger import get_logger
+from config.schema import TABLES, create_table_sql
+
+
+VERSION_TABLE = "schema_version"
+
+_KEY_KINDS = ("pk", "key", "intkey")
+
+log = get_logger(__name__, "MIGRATIONS")
+
+
+# ─────────────────────────────────────────────
+# Operaciones
+# ─────────────────────────────────────────────
+
+def _create_missing_tables(cursor: Any, backend: Any) -> list[str]:
+    created = []
+    for table in TABLES:
+        if backend.table_exists(cursor, table):
+            continue
+        try:
+            cursor.execute(create_table_sql(table, backend))
+        except Exception:
+            # Otro proceso pudo crearla entre la verificación y el CREATE
+            if not backend.table_exists(cursor, table):
+                raise
+            continue
+        created.append(table)
+    return created
+
+
+def _find_index(cursor: Any, backend: Any, table: str, columns: tuple[str, ...]) -> str | None:
+    """Nombre de un índice cuyas columnas iniciales son `columns`, o None."""
+    wanted = [c.lower() for c in columns]
+    for name, index_columns in backend.table_indexes(cursor, table).items():
+        if [c.lower() for c in index_columns[:len(wanted)]] == wanted:
+            return name
+    return None
+
+
+def _create_index(cursor: Any, backend: Any, name: str, table: str,
+                  columns: tuple[str, ...]) -> bool:
+    """
+    Crea el índice si no hay uno equivalente. Retorna True si lo creó.
+    """
+    if _find_index(cursor, backend, table, columns):
+        return False
+    cols = ", ".join(f"[{c}]" for c in columns)
+    try:
+        cursor.execute(f"CREATE INDEX [{name}] ON [{table}] ({cols})")
+    except Exception:
+        if not _find_index(cursor, backend, table, columns):
+            raise
+        return False
+    return True
+
+
+def _indexes(*specs: tuple[str, str, tuple[str, ...]]) -> Callable[[Any, Any], list[str]]:
+    """Migración que crea los índices (nombre, tabla, columnas) dados."""
+    def apply(cursor: Any, backend: Any) -> list[str]:
+        return [name for name, table, columns in specs
+                if _create_index(cursor, backend, name, table, columns)]
+    return apply
+
+
+def _initialize_balances(cursor: Any, backend: Any) -> list[str]:
+    # Import diferido: services depende de config, no al revés
+    from services.balance_service import initialize_account_balances
+    return initialize_account_balances(cursor, backend)
+
+
+# ─────────────────────────────────────────────
+# Migraciones (versión, descripción, función)
+# ─────────────────────────────────────────────
+
+MIGRATIONS: list[tuple[int, str, Callable[[Any, Any], list[str]]]] = [
+    (1, "Tablas base del esquema", _create_missing_tables),
+    (2, "Índices de ledger_entry", _indexes(
+        ("ix_ledger_entry_transaction", "ledger_entry", ("transaction_id",)),
+        ("ix_ledger_entry_account_created", "ledger_entry", ("account_id", "created_at")),
+        ("ix_ledger_entry_created", "ledger_entry", ("created_at",)),
+    )),
+    (3, "Índices de user y account", _indexes(
+        ("ix_user_email", "user", ("email",)),
+        ("ix_user_dui", "user", ("DUI",)),
+        ("ix_user_phone_number", "user", ("phone_number",)),
+        ("ix_account_user", "account", ("user_id",)),
+        ("ix_account_number", "account", ("account_number",)),
+    )),
+    (4, "Índice de balance_checkpoint", _indexes(
+        ("ix_balance_checkpoint_account_at", "balance_checkpoint", ("account_id", "checkpoint_at")),
+    )),
+    (5, "Saldos iniciales de account_balance", _initialize_balances),
+    (6, "Índice de transaction por fecha", _indexes(
+        ("ix_transaction_date", "transaction", ("transaction_date",)),
+    )),
+]
+
+# Versión que carga account_balance; antes de ella no se exigen fondos
+BALANCE_INIT_VERSION = 5
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ─────────────────────────────────────────────
+# Runner
+# ─────────────────────────────────────────────
+
+def applied_versions(cursor: Any, backend: Any) -> set[int]:
+    if not backend.table_exists(cursor, VERSION_TABLE):
+        return set()
+    cursor.execute("SELECT version FROM schema_version")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(conn: Any, backend: Any, target: int | None = None) -> list[int]:
+    """
+    Aplica las migraciones pendientes hasta `target` (por defecto, todas).
+    Cada migración se confirma con su propio commit.
+
+    Args:
+        conn   : Conexión física (no del pool) sobre la que ejecutar el DDL
+        backend: Backend activo
+
+    Returns:
+        Versiones aplicadas en esta llamada.
+    """
+    applied = []
+    cursor = conn.cursor()
+    try:
+        if not backend.table_exists(cursor, VERSION_TABLE):
+            try:
+                cursor.execute(create_table_sql(VERSION_TABLE, backend))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                if not backend.table_exists(cursor, VERSION_TABLE):
+                    raise
+
+        done = applied_versions(cursor, backend)
+        for version, description, apply in MIGRATIONS:
+            if version in done or (target is not None and version > target):
+                continue
+            try:
+                created = apply(cursor, backend)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                    (version, description, datetime.now()),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                # Otro proceso pudo aplicarla al mismo tiempo
+                if version in applied_versions(cursor, backend):
+                    continue
+                raise
+            applied.append(version)
+            log.info("Migración aplicada", version=version, description=description,
+                     objects=",".join(created) or "-")
+    finally:
+        cursor.close()
+
+    return applied
+
+
+# ─────────────────────────────────────────────
+# Verificación de consultas calientes
+# ─────────────────────────────────────────────
+
+# (consulta, tabla, columnas que debería cubrir un índice, SQL)
+HOT_QUERIES: list[tuple[str, str, tuple[str, ...], str]] = [
+    ("user_model.get_user_by_email", "user", ("email",),
+     "SELECT * FROM [user] WHERE email = ?"),
+    ("user_model.get_user_by_dui", "user", ("DUI",),
+     "SELECT * FROM [user] WHERE DUI = ?"),
+    ("user_model.get_user_by_phone", "user", ("phone_number",),
+     "SELECT * FROM [user] WHERE phone_number = ?"),
+    ("user_model.get_user_by_id", "user", ("Id_user",),
+     "SELECT * FROM [user] WHERE Id_user = ?"),
+    ("account_model.get_account_by_user", "account", ("user_id",),
+     "SELECT * FROM account WHERE user_id = ?"),
+    ("account_model.account_number_exists", "account", ("account_number",),
+     "SELECT COUNT(*) FROM account WHERE account_number = ?"),
+    ("ledger_model.get_ledger_entries_by_transaction", "ledger_entry", ("transaction_id",),
+     "SELECT * FROM ledger_entry WHERE transaction_id = ? ORDER BY created_at"),
+    ("ledger_model.get_ledger_entry_by_id", "ledger_entry", ("Id_entry",),
+     "SELECT * FROM ledger_entry WHERE Id_entry = ?"),
+    ("ledger_model.stream_ledger_entries", "ledger_entry", ("account_id", "created_at"),
+     "SELECT * FROM ledger_entry WHERE account_id = ? AND created_at >= ? "
+     "ORDER BY created_at, Id_entry"),
+    ("reconciliation_service._load_bounds", "transaction", ("transaction_date",),
+     "SELECT MIN(Id_transaction), MAX(Id_transaction) FROM [transaction] "
+     "WHERE transaction_date >= ?"),
+    ("checkpoint_service.build_daily_checkpoints", "ledger_entry", ("created_at",),
+     "SELECT * FROM ledger_entry WHERE created_at < ? ORDER BY created_at, Id_entry"),
+    ("balance_model.get_balance", "account_balance", ("account_id",),
+     "SELECT balance FROM account_balance WHERE account_id = ?"),
+    ("checkpoint_model.get_latest_checkpoint", "balance_checkpoint", ("account_id", "checkpoint_at"),
+     "SELECT TOP 1 * FROM balance_checkpoint WHERE account_id = ? AND checkpoint_at <= ? "
+     "ORDER BY checkpoint_at DESC"),
+]
+
+
+def _is_key(table: str, columns: tuple[str, ...]) -> bool:
+    return len(columns) == 1 and any(
+        name == columns[0] and kind in _KEY_KINDS for name, kind in TABLES.get(table, [])
+    )
+
+
+def verify(conn: Any, backend: Any) -> list[dict[str, Any]]:
+    """
+    Revisa cada consulta caliente contra los índices de la base actual.
+
+    Returns:
+        Lista de dicts con 'query', 'table', 'columns', 'status'
+        ('ok', 'partial' o 'missing'), 'index' y, en SQLite, 'plan'.
+    """
+    report = []
+    cursor = conn.cursor()
+    try:
+        for query, table, columns, sql in HOT_QUERIES:
+            entry: dict[str, Any] = {"query": query, "table": table, "columns": list(columns)}
+            if not backend.table_exists(cursor, table):
+                entry.update(status="missing", index=None, detail="tabla inexistente")
+                report.append(entry)
+                continue
+
+            index = "PRIMARY KEY" if _is_key(table, columns) else _find_index(cursor, backend, table, columns)
+            if index:
+                entry.update(status="ok", index=index)
+            else:
+                partial = _find_index(cursor, backend, table, columns[:1]) if len(columns) > 1 else None
+                entry.update(status="partial" if partial else "missing", index=partial)
+
+            if backend.name == "sqlite":
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, (None,) * sql.count("?"))
+                entry["plan"] = "; ".join(row[-1] for row in cursor.fetchall())
+            report.append(entry)
+    finally:
+        cursor.close()
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+
+    from config.database import get_backend
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+    if command not in ("migrate", "status", "verify"):
+        print("Uso: python -m config.migrations [migrate|status|verify]")
+        sys.exit(2)
+
+    backend = get_backend()
+    conn = backend.connect()
+    try:
+        if command == "migrate":
+            versions = migrate(conn, backend)
+            print(f"[MIGRATIONS] {len(versions)} migraciones aplicadas (última versión: v{LATEST_VERSION})")
+
+        elif command == "status":
+            cursor = conn.cursor()
+            done = applied_versions(cursor, backend)
+            cursor.close()
+            for version, description, _ in MIGRATIONS:
+                print(f"[MIGRATIONS] v{version} {'✅' if version in done else '⏳'} {description}")
+
+        else:
+            report = verify(conn, backend)
+            for entry in report:
+                icon = {"ok": "✅", "partial": "⚠️", "missing": "❌"}[entry["status"]]
+                print(f"[MIGRATIONS] {icon} {entry['query']}: {entry['table']}"
+                      f"({', '.join(entry['columns'])}) → {entry['index'] or 'sin índice'}")
+                if entry.get("plan"):
+                    print(f"             plan: {entry['plan']}")
+            sys.exit(0 if all(e["status"] == "ok" for e in report) else 1)
+    finally:
+        conn.close()
@@ -0,0 +1,306 @@
+"""
+query_stats.py
+Instrumentación de consultas: latencia por sentencia, filas y llamador.
+
+Con la instrumentación activa, los cursores que entrega config.database
+(get_cursor, get_connection().cursor()) se envuelven en un
+InstrumentedCursor que mide cada execute/executemany y agrega por SQL
+normalizado (literales reemplazados por ?, espacios colapsados):
+
+  - cantidad de ejecuciones, tiempo total / mínimo / máximo
+  - histograma de latencia (cubetas logarítmicas) y percentiles aproximados
+  - filas devueltas (contadas en fetch*) o afectadas (rowcount)
+  - funciones que la ejecutan (primer marco fuera de config/)
+
+Las sentencias más lentas que DB_SLOW_QUERY_MS se agregan como una línea
+JSON a DB_SLOW_QUERY_LOG. Los parámetros nunca se registran (pueden
+contener hashes de contraseña o datos personales).
+
+Desactivada (por defecto), el costo es una sola comprobación de bandera
+por cursor: no se envuelve nada.
+
+Activación: DB_QUERY_STATS=1 o enable_query_stats(). Resumen:
+dump_query_stats("stats.json") o dump_query_stats(fmt="text").
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Iterable
+
+from config.logger import get_logger
+
+
+ENABLED        = os.getenv("DB_QUERY_STATS", "0") == "1"
+SLOW_QUERY_MS  = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG = os.getenv("DB_SLOW_QUERY_LOG", "slow_queries.log")
+
+# Límites superiores de las cubetas del histograma, en milisegundos
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
+
+log = get_logger(__name__, "QUERY_STATS")
+
+
+# ─────────────────────────────────────────────
+# Normalización
+# ─────────────────────────────────────────────
+
+_STRING  = re.compile(r"'(?:[^']|'')*'")
+_NUMBER  = re.compile(r"(?<![\w\]\"])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES  = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """
+    SQL con literales reemplazados por ?, listas IN (?, ?, ...) colapsadas
+    y espacios normalizados, para agrupar sentencias equivalentes.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(?...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def _caller() -> str:
+    """Primer marco de la pila fuera de config/ (módulo.función)."""
+    frame = sys._getframe(2)
+    while frame is not None and os.path.dirname(os.path.abspath(frame.f_code.co_filename)) == _CONFIG_DIR:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+# ─────────────────────────────────────────────
+# Agregación
+# ─────────────────────────────────────────────
+
+class _Stat:
+    __slots__ = ("count", "total", "min", "max", "rows", "buckets", "callers")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.callers: dict[str, int] = {}
+
+    def percentile(self, p: float) -> float:
+        """Percentil aproximado: límite superior de la cubeta que lo contiene."""
+        target = p * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def summary(self, sql: str) -> dict[str, Any]:
+        return {
+            "sql": sql,
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "avg_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min, 3) if self.count else 0.0,
+            "max_ms": round(self.max, 3),
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "rows": self.rows,
+            "histogram": {f"<={b}ms": n for b, n in zip(BUCKETS_MS, self.buckets) if n}
+                         | ({f">{BUCKETS_MS[-1]}ms": self.buckets[-1]} if self.buckets[-1] else {}),
+            "callers": dict(sorted(self.callers.items(), key=lambda kv: -kv[1])),
+        }
+
+
+_lock = threading.Lock()
+_stats: dict[str, _Stat] = {}
+_slow_lock = threading.Lock()
+
+
+def _record(sql: str, elapsed_ms: float, rows: int, caller: str) -> None:
+    with _lock:
+        stat = _stats.get(sql)
+        if stat is None:
+            stat = _stats[sql] = _Stat()
+        stat.count += 1
+        stat.total += elapsed_ms
+        stat.min = min(stat.min, elapsed_ms)
+        stat.max = max(stat.max, elapsed_ms)
+        stat.rows += rows
+        stat.buckets[bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+        stat.callers[caller] = stat.callers.get(caller, 0) + 1
+
+    if elapsed_ms >= SLOW_QUERY_MS and SLOW_QUERY_LOG:
+        line = json.dumps({"at": datetime.now().isoformat(sep=" "), "ms": round(elapsed_ms, 3),
+                           "caller": caller, "sql": sql}, ensure_ascii=False)
+        with _slow_lock:
+            with open(SLOW_QUERY_LOG, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def _add_rows(sql: str, rows: int) -> None:
+    with _lock:
+        stat = _stats.get(sql)
+        if stat is not None:
+            stat.rows += rows
+
+
+# ─────────────────────────────────────────────
+# Envoltorios
+# ─────────────────────────────────────────────
+
+class InstrumentedCursor:
+    """
+    Cursor que mide cada ejecución. Delega todo lo demás al cursor real.
+    """
+
+    __slots__ = ("_cursor", "_sql")
+
+    def __init__(self, cursor: Any):
+        self._cursor = cursor
+        self._sql = None
+
+    def _timed(self, method: Any, sql: str, *args: Any) -> Any:
+        normalized = normalize_sql(sql)
+        start = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            rowcount = getattr(self._cursor, "rowcount", -1)
+            self._sql = normalized
+            _record(normalized, elapsed, rowcount if rowcount and rowcount > 0 else 0, _caller())
+
+    def execute(self, sql: str, params: Iterable[Any] = ()) -> "InstrumentedCursor":
+        if params == ():
+            self._timed(self._cursor.execute, sql)
+        else:
+            self._timed(self._cursor.execute, sql, params)
+        return self
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Iterable[Any]]) -> "InstrumentedCursor":
+        self._timed(self._cursor.executemany, sql, seq_of_params)
+        return self
+
+    def fetchone(self) -> Any:
+        row = self._cursor.fetchone()
+        if row is not None and self._sql:
+            _add_rows(self._sql, 1)
+        return row
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        if rows and self._sql:
+            _add_rows(self._sql, len(rows))
+        return rows
+
+    def fetchall(self) -> list[Any]:
+        rows = self._cursor.fetchall()
+        if rows and self._sql:
+            _add_rows(self._sql, len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            if self._sql:
+                _add_rows(self._sql, 1)
+            yield row
+
+    def close(self) -> None:
+        self._cursor.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """
+    Conexión cuyos cursores se instrumentan (para el modo sin pool).
+    """
+
+    __slots__ = ("_conn",)
+
+    def __init__(self, conn: Any):
+        self._conn = conn
+
+    def cursor(self) -> InstrumentedCursor:
+        return InstrumentedCursor(self._conn.cursor())
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+# ─────────────────────────────────────────────
+# API
+# ─────────────────────────────────────────────
+
+def enable_query_stats() -> None:
+    global ENABLED
+    ENABLED = True
+
+
+def disable_query_stats() -> None:
+    global ENABLED
+    ENABLED = False
+
+
+def reset_query_stats() -> None:
+    with _lock:
+        _stats.clear()
+
+
+def get_query_stats() -> list[dict[str, Any]]:
+    """Resumen por sentencia, ordenado por tiempo total descendente."""
+    with _lock:
+        summaries = [stat.summary(sql) for sql, stat in _stats.items()]
+    return sorted(summaries, key=lambda s: -s["total_ms"])
+
+
+def format_query_stats(stats: list[dict[str, Any]] | None = None, limit: int = 20) -> str:
+    """Reporte de texto con las `limit` sentencias más costosas."""
+    stats = get_query_stats() if stats is None else stats
+    lines = [f"{'total ms':>10} {'count':>7} {'avg':>8} {'p95':>8} {'p99':>8} {'rows':>8}  sql"]
+    for s in stats[:limit]:
+        lines.append(f"{s['total_ms']:>10.1f} {s['count']:>7} {s['avg_ms']:>8.3f} "
+                     f"{s['p95_ms']:>8} {s['p99_ms']:>8} {s['rows']:>8}  {s['sql'][:120]}")
+        top_callers = ", ".join(f"{c} ({n})" for c, n in list(s["callers"].items())[:3])
+        lines.append(f"{'':>46}  ← {top_callers}")
+    return "\n".join(lines)
+
+
+def dump_query_stats(path: str | None = None, fmt: str = "json") -> str:
+    """
+    Escribe el resumen en `path` (o lo retorna si path es None).
+
+    Args:
+        path: Archivo destino (opcional)
+        fmt : 'json' o 'text'
+    """
+    if fmt not in ("json", "text"):
+        raise ValueError("fmt debe ser 'json' o 'text'.")
+    stats = get_query_stats()
+    if fmt == "json":
+        content = json.dumps({"generated_at": datetime.now().isoformat(sep=" "),
+                              "slow_query_ms": SLOW_QUERY_MS, "statements": stats},
+                             ensure_ascii=False, indent=2)
+    else:
+        content = format_query_stats(stats)
+
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        log.info("Resumen escrito", statements=len(stats), path=path)
+    return content
@@ -0,0 +1,146 @@
+"""
+schema.py
+Esquema mínimo de la base de datos y su creación (bootstrap).
+
+El orden de las columnas importa: varios módulos leen filas por índice
+(p. ej. auth_service usa user[3] para password_hash y user[9] para
+is_active, y home_page usa account_row[2] para account_number).
+
+Uso:
+    python -m config.schema            # crea las tablas que falten
+"""
+
+from typing import Any
+
+from config.logger import get_logger
+
+log = get_logger(__name__, "SCHEMA")
+
+
+# ─────────────────────────────────────────────
+# Definición de tablas (tipos lógicos)
+# ─────────────────────────────────────────────
+TABLES: dict[str, list[tuple[str, str]]] = {
+    "user": [
+        ("Id_user",       "pk"),
+        ("role_id",       "int"),
+        ("email",         "text"),
+        ("password_hash", "text"),
+        ("NIT",           "text"),
+        ("DUI",           "text"),
+        ("full_name",     "text"),
+        ("phone_number",  "text"),
+        ("gender",        "text"),
+        ("is_active",     "bool"),
+        ("created_at",    "datetime"),
+        ("updated_at",    "datetime"),
+    ],
+    "account": [
+        ("Id_account",     "pk"),
+        ("user_id",        "int"),
+        ("account_number", "text"),
+        ("currency",       "text"),
+        ("status_id",      "int"),
+        ("created_at",     "datetime"),
+    ],
+    "transaction": [
+        ("Id_transaction",      "pk"),
+        ("transaction_type_id", "int"),
+        ("status_id",           "int"),
+        ("description",         "text"),
+        ("created_by_user_id",  "int"),
+        ("transaction_date",    "datetime"),
+        ("processed_at",        "datetime"),
+    ],
+    "ledger_entry": [
+        ("Id_entry",       "pk"),
+        ("transaction_id", "int"),
+        ("account_id",     "int"),
+        ("entry_type",     "text"),
+        ("amount",         "money"),
+        ("created_at",     "datetime"),
+    ],
+    # Saldo materializado por cuenta (ver models.balance_model)
+    "account_balance": [
+        ("account_id", "intkey"),
+        ("balance",    "money"),
+        ("updated_at", "datetime"),
+    ],
+    # Saldo por cuenta en fechas de corte (ver models.checkpoint_model)
+    "balance_checkpoint": [
+        ("Id_checkpoint", "pk"),
+        ("account_id",    "int"),
+        ("checkpoint_at", "datetime"),
+        ("balance",       "money"),
+    ],
+    # Próximo ID libre por tabla (ver config.id_allocator)
+    "id_sequence": [
+        ("table_name", "key"),
+        ("next_value", "int"),
+    ],
+    # Migraciones aplicadas (ver config.migrations)
+    "schema_version": [
+        ("version",     "intkey"),
+        ("description", "text"),
+        ("applied_at",  "datetime"),
+    ],
+}
+
+
+def create_table_sql(table: str, backend: Any) -> str:
+    """
+    Genera el CREATE TABLE de una tabla para el backend dado.
+    Usa identificadores entre corchetes (Access); SQLite los traduce.
+    """
+    columns = ",\n    ".join(
+        f"[{name}] {backend.column_types[kind]}" for name, kind in TABLES[table]
+    )
+    return f"CREATE TABLE [{table}] (\n    {columns}\n)"
+
+
+def bootstrap_schema(conn: Any, backend: Any) -> list[str]:
+    """
+    Crea las tablas que no existan todavía. No modifica las existentes.
+
+    Args:
+        conn   : Conexión física (no del pool) sobre la que ejecutar el DDL
+        backend: Backend activo (define tipos y detección de tablas)
+
+    Returns:
+        Lista de tablas creadas.
+    """
+    created = []
+    cursor = conn.cursor()
+    try:
+        for table in TABLES:
+            if backend.table_exists(cursor, table):
+                continue
+            try:
+                cursor.execute(create_table_sql(table, backend))
+            except Exception:
+                # Otro proceso pudo crearla entre la verificación y el CREATE
+                if not backend.table_exists(cursor, table):
+                    raise
+                continue
+            created.append(table)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    if created:
+        log.info("Tablas creadas", tables=",".join(created))
+    return created
+
+
+if __name__ == "__main__":
+    from config.database import get_backend
+
+    backend = get_backend()
+    conn = backend.connect()
+    try:
+        bootstrap_schema(conn, backend)
+    finally:
+        conn.close()
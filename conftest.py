@@ -0,0 +1,33 @@
+import pytest
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """
+    Base SQLite nueva para los servicios (pool, asignador de IDs y cachés
+    del proceso apuntan a ella). La base se crea y migra en la primera
+    conexión, salvo que el test fije SQLITE_BOOTSTRAP=0 antes.
+    """
+    import config.database as database
+    import config.id_allocator as id_allocator
+    import models.balance_model as balance_model
+    from config.cache import clear_caches
+    from services.group_commit import disable_group_commit
+
+    def reset():
+        disable_group_commit()
+        database.close_pool()
+        database._backend = None
+        if id_allocator._allocator is not None:
+            id_allocator._allocator.reset()
+        id_allocator._allocator = None
+        balance_model._initialized = False
+        balance_model._init_warned_at = None
+        clear_caches()
+
+    path = str(tmp_path / "test.db")
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_DB_PATH", path)
+    reset()
+    yield path
+    reset()
@@ -1,8 +1,7 @@
 from faker import Faker
 import random
-from models.user_model import create_user
-from services.account_service import create_account_for_user
-from utils.security import hash_password
+from services.onboarding_service import onboard_customers_bulk
+from services.password_service import hash_password
 
 fake = Faker("es_ES")
 
@@ -25,7 +24,7 @@ def generar_telefono_sv():
     return f"+503 {numero[:4]}-{numero[4:]}"
 
 
-def generar_usuario():
+def generar_usuario(password_hash):
     """Genera datos ficticios coherentes"""
 
     # Primero elegimos género
@@ -43,7 +42,7 @@ def generar_usuario():
     return {
         "role_id": 2,
         "email": email,
-        "password_hash": hash_password("123456"),
+        "password_hash": password_hash,
         "nit": None,
         "gender": gender,
         "dui": generar_dui(),
@@ -53,17 +52,24 @@ def generar_usuario():
 
 
 def crear_usuarios_masivos(cantidad):
-    for i in range(cantidad):
-        try:
-            datos = generar_usuario()
-
-            user_id = create_user(**datos)
-            create_account_for_user(user_id, "USD")
-
-            print(f"✅ Usuario {i+1} creado - ID: {user_id}")
-
-        except Exception as e:
-            print(f"❌ Error en usuario {i+1}: {e}")
+    # Todos comparten la contraseña "123456": se hashea una sola vez
+    # (para cargas grandes, ver benchmarks/seed_users.py)
+    password_hash = hash_password("123456")
+    creados = 0
+    while creados < cantidad:
+        # Usuario + cuenta por lotes; los DUI / teléfonos repetidos se
+        # descartan y se generan otros en la siguiente vuelta
+        reporte = onboard_customers_bulk(generar_usuario(password_hash) for _ in range(cantidad - creados))
+
+        for resultado in reporte["results"]:
+            if resultado["success"]:
+                creados += 1
+                print(f"✅ Usuario {creados} creado - ID: {resultado['user_id']}")
+            elif "conflicts" not in resultado:
+                print(f"❌ Error en usuario: {resultado['error']}")
+
+        if reporte["succeeded"] == 0 and not any("conflicts" in r for r in reporte["results"]):
+            break
 
 
 if __name__ == "__main__":
@@ -1,19 +1,33 @@
+from config.cache import get_cache
 from config.database import get_cursor
+from config.id_allocator import next_ids
 from datetime import datetime
-import random
+from typing import Any
+from utils.account_number import ACCOUNT_NUMBER_SPACE, format_account_number
+
+
+# Secuencia de id_sequence que alimenta los números de cuenta
+ACCOUNT_NUMBER_SEQUENCE = "account_number"
+
+# Cuenta por user_id (config.cache); create_account invalida su entrada
+_accounts = get_cache("account")
 
 
 def get_account_by_user(user_id: int):
     # Consulta para obtener la cuenta asociada al usuario
     query = "SELECT * FROM [account] WHERE [user_id] = ?"
 
-    # Abre conexión a la base de datos
-    with get_cursor() as cursor:
-        # Ejecuta la consulta enviando el user_id
-        cursor.execute(query, (user_id,))
-        
-        # Devuelve la primera cuenta encontrada
-        return cursor.fetchone()
+    def load():
+        # Abre conexión a la base de datos
+        with get_cursor() as cursor:
+            # Ejecuta la consulta enviando el user_id
+            cursor.execute(query, (user_id,))
+
+            # Devuelve la primera cuenta encontrada
+            return cursor.fetchone()
+
+    # Las reejecuciones de Streamlit leen de la caché
+    return _accounts.get_or_load(user_id, load)
 
 
 def account_number_exists(account_number: str):
@@ -29,16 +43,23 @@ def account_number_exists(account_number: str):
         return cursor.fetchone() is not None
 
 
-def generate_account_number():
-    while True:
-        # Example: SV_synapse (Bank Code) + random digits
-        number = f"SV_synapse{random.randint(1000000, 9999999)}" 
-        if not account_number_exists(number):
-            return number
+def generate_account_numbers(count: int) -> list[str]:
+    # Contadores reservados por bloques (config.id_allocator): sin consultas
+    # por intento y sin choques entre procesos
+    counters = next_ids(ACCOUNT_NUMBER_SEQUENCE, count)
+    if counters and counters[-1] >= ACCOUNT_NUMBER_SPACE:
+        raise Exception("Se agotó el espacio de números de cuenta.")
 
-def create_account(user_id: int, currency: str):
+    # Ejemplo: SV_synapse (código del banco) + 7 dígitos permutados + verificador
+    return [format_account_number(counter) for counter in counters]
+
+
+def generate_account_number():
+    return generate_account_numbers(1)[0]
 
-    # Consulta para insertar nueva cuenta
+def insert_accounts(cursor: Any, accounts: list[tuple[int, str, str]]) -> None:
+    # Inserta (user_id, account_number, currency) con el cursor del llamador,
+    # sin commit; tras el commit, el llamador invalida con accounts_created()
     query = """
         INSERT INTO [account] (
             [user_id],
@@ -49,16 +70,49 @@ def create_account(user_id: int, currency: str):
         )
         VALUES (?, ?, ?, ?, ?)
     """
-
-    # Abre conexión con commit automático
-    with get_cursor(commit=True) as cursor:
-        cursor.execute(
-            query,
+    now = datetime.now()
+    cursor.executemany(
+        query,
+        [
             (
                 user_id,                      # ID del usuario dueño
-                generate_account_number(),    # Número único generado
+                account_number,               # Número único generado
                 currency,                     # Moneda de la cuenta
                 1,                            # Estado activo por defecto
-                datetime.now()                # Fecha de creación
+                now                           # Fecha de creación
             )
-        )
\ No newline at end of file
+            for user_id, account_number, currency in accounts
+        ]
+    )
+
+
+def accounts_created(*user_ids: int) -> None:
+    # La cuenta de estos usuarios cambió: la próxima lectura va a la base
+    _accounts.invalidate(*user_ids)
+
+
+def create_account(user_id: int, currency: str):
+
+    # El número se reserva antes de abrir la transacción (ver config.id_allocator)
+    account_number = generate_account_number()
+
+    # Abre conexión con commit automático
+    with get_cursor(commit=True) as cursor:
+        insert_accounts(cursor, [(user_id, account_number, currency)])
+
+    accounts_created(user_id)
+
+
+def create_accounts(user_ids: list[int], currency: str) -> list[str]:
+    # Creación masiva: todos los números en una reserva y un solo commit
+    if not user_ids:
+        return []
+
+    numbers = generate_account_numbers(len(user_ids))
+
+    with get_cursor(commit=True) as cursor:
+        insert_accounts(cursor, [(user_id, number, currency)
+                                 for user_id, number in zip(user_ids, numbers)])
+
+    accounts_created(*user_ids)
+    return numbers
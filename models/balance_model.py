@@ -0,0 +1,169 @@
+"""
+balance_model.py
+Modelo para la tabla account_balance: saldo materializado por cuenta.
+
+El saldo se mantiene de forma incremental: cada inserción en ledger_entry
+(create_ledger_entry / create_ledger_entries) aplica su delta aquí en la
+MISMA transacción, así que leer el saldo es O(1) en vez de sumar todo el
+ledger de la cuenta.
+
+  saldo = Σ créditos − Σ débitos
+
+Mientras la carga inicial (migración 5 de config.migrations) no se haya
+aplicado, apply_balance_delta no escribe nada: la tabla puede no existir
+(bases Access anteriores a account_balance) y la migración recalcula
+todos los saldos desde el ledger de todas formas.
+
+ARQUITECTURA: igual que ledger_model, las funciones que reciben un cursor
+no abren conexiones ni hacen commit. Solo las lecturas sueltas
+(get_account_balance) abren su propia conexión.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any
+
+from config.logger import get_logger
+
+
+BALANCE_TABLE = "account_balance"
+
+# Segundos entre advertencias mientras la carga inicial no se aplicó
+INIT_WARNING_SECONDS = 30
+
+log = get_logger(__name__, "BALANCE")
+
+_initialized = False
+_init_warned_at: float | None = None
+_init_lock = threading.Lock()
+
+
+class InsufficientFundsError(Exception):
+    """El débito dejaría la cuenta con saldo negativo."""
+
+
+def balances_initialized(cursor: Any) -> bool:
+    """
+    True si account_balance ya se cargó desde el ledger (migración
+    BALANCE_INIT_VERSION de config.migrations aplicada).
+
+    Una vez True queda en memoria. Mientras sea False se consulta en cada
+    llamada, dentro de la transacción del llamador: así una escritura que
+    empieza después de aplicada la migración ya actualiza el saldo, y no
+    queda un intervalo de deltas perdidos tras la carga inicial.
+    """
+    global _initialized, _init_warned_at
+    if _initialized:
+        return True
+
+    from config.migrations import BALANCE_INIT_VERSION, VERSION_TABLE
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM [{VERSION_TABLE}] WHERE version = ?",
+                       (BALANCE_INIT_VERSION,))
+        ready = bool(cursor.fetchone()[0])
+    except Exception:
+        ready = False            # sin schema_version: base sin migrar
+    if ready:
+        _initialized = True
+        return True
+
+    now = time.monotonic()
+    with _init_lock:
+        warn = _init_warned_at is None or now - _init_warned_at >= INIT_WARNING_SECONDS
+        if warn:
+            _init_warned_at = now
+    if warn:
+        log.warning("account_balance sin cargar: no se mantienen saldos ni se verifican "
+                    "fondos hasta aplicar 'python -m config.migrations migrate'")
+    return False
+
+
+def apply_balance_delta(cursor: Any, account_id: int, delta: float,
+                        allow_overdraft: bool = True) -> None:
+    """
+    Suma `delta` al saldo de la cuenta usando el cursor del llamador.
+
+    Con allow_overdraft=False el UPDATE es condicional (solo se aplica si
+    el saldo resultante no es negativo). Como la comprobación y la
+    escritura son la misma sentencia, dos débitos concurrentes no pueden
+    dejar la cuenta en negativo.
+
+    No hace nada mientras account_balance no tenga su carga inicial
+    (balances_initialized).
+
+    Si la cuenta aún no tiene fila se inserta. Dos primeros movimientos
+    concurrentes sobre la misma cuenta pueden intentar el INSERT a la vez:
+    el que pierde recibe un error de clave duplicada y reintenta por el
+    UPDATE, en lugar de revertir toda su transacción.
+
+    Raises:
+        InsufficientFundsError: Si no hay fondos suficientes.
+    """
+    if not balances_initialized(cursor):
+        return
+
+    now = datetime.now()
+
+    for attempt in range(2):
+        if allow_overdraft or delta >= 0:
+            cursor.execute(
+                "UPDATE account_balance SET balance = ROUND(balance + ?, 2), updated_at = ? "
+                "WHERE account_id = ?",
+                (delta, now, account_id),
+            )
+        else:
+            cursor.execute(
+                "UPDATE account_balance SET balance = ROUND(balance + ?, 2), updated_at = ? "
+                "WHERE account_id = ? AND balance >= ?",
+                (delta, now, account_id, -delta),
+            )
+
+        if cursor.rowcount:
+            return
+
+        # Sin fila afectada: o la cuenta aún no tiene saldo, o no alcanzan los fondos
+        cursor.execute("SELECT balance FROM account_balance WHERE account_id = ?", (account_id,))
+        row = cursor.fetchone()
+        if row is not None:
+            raise InsufficientFundsError(
+                f"Fondos insuficientes en la cuenta {account_id}: saldo {float(row[0]):,.2f}, "
+                f"se requieren {-delta:,.2f}."
+            )
+        if delta < 0 and not allow_overdraft:
+            raise InsufficientFundsError(
+                f"Fondos insuficientes en la cuenta {account_id}: saldo 0.00, "
+                f"se requieren {-delta:,.2f}."
+            )
+
+        try:
+            cursor.execute(
+                "INSERT INTO account_balance (account_id, balance, updated_at) VALUES (?, ?, ?)",
+                (account_id, round(delta, 2), now),
+            )
+            return
+        except Exception as e:
+            # Otra transacción creó la fila primero: se reintenta el UPDATE
+            if attempt:
+                raise
+            log.debug("Fila de saldo creada en paralelo; reintentando", account=account_id, error=e)
+
+
+def get_balance(cursor: Any, account_id: int) -> float:
+    """
+    Lee el saldo de una cuenta con el cursor del llamador (0.0 si no tiene).
+    """
+    cursor.execute("SELECT balance FROM account_balance WHERE account_id = ?", (account_id,))
+    row = cursor.fetchone()
+    return float(row[0]) if row else 0.0
+
+
+def get_account_balance(account_id: int) -> float:
+    """
+    Retorna el saldo actual de una cuenta en O(1).
+    Esta función abre su propia conexión (operación de lectura, no transaccional).
+    """
+    from config.database import get_cursor
+
+    with get_cursor() as cursor:
+        return get_balance(cursor, account_id)
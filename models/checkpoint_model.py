@@ -0,0 +1,118 @@
+"""
+checkpoint_model.py
+Modelo para balance_checkpoint: saldos por cuenta en fechas de corte.
+
+Un checkpoint (account_id, checkpoint_at, balance) guarda el saldo de la
+cuenta considerando TODAS sus entradas con created_at < checkpoint_at.
+Para conocer el saldo a una fecha basta con leer el checkpoint más
+reciente anterior a esa fecha y sumar solo las entradas posteriores a él,
+en lugar de recorrer toda la historia de la cuenta.
+
+Los checkpoints los genera services.checkpoint_service (diarios, a medianoche).
+"""
+
+from datetime import datetime
+from typing import Any
+
+from config.logger import get_logger
+from models.ledger_archive import get_archive_horizon, iter_archived_account_entries
+from models.ledger_model import CREDIT
+
+
+CHECKPOINT_TABLE = "balance_checkpoint"
+
+log = get_logger(__name__, "CHECKPOINT")
+
+
+def insert_checkpoints(cursor: Any, checkpoints: list[tuple[int, datetime, float]]) -> int:
+    """
+    Inserta checkpoints con executemany. NO hace commit.
+
+    Args:
+        cursor     : Cursor existente
+        checkpoints: Tuplas (account_id, checkpoint_at, balance)
+
+    Returns:
+        Número de checkpoints insertados.
+    """
+    if not checkpoints:
+        return 0
+    cursor.executemany(
+        "INSERT INTO balance_checkpoint (account_id, checkpoint_at, balance) VALUES (?, ?, ?)",
+        [(account_id, at, round(balance, 2)) for account_id, at, balance in checkpoints],
+    )
+    return len(checkpoints)
+
+
+def get_latest_checkpoint(cursor: Any, account_id: int,
+                          at_or_before: datetime) -> tuple[datetime, float] | None:
+    """
+    Retorna (checkpoint_at, balance) del checkpoint más reciente de la
+    cuenta con checkpoint_at <= at_or_before, o None si no hay ninguno.
+    """
+    cursor.execute("""
+        SELECT TOP 1 checkpoint_at, balance
+        FROM balance_checkpoint
+        WHERE account_id = ? AND checkpoint_at <= ?
+        ORDER BY checkpoint_at DESC
+    """, (account_id, at_or_before))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return row[0], float(row[1])
+
+
+def sum_entries(cursor: Any, account_id: int,
+                since: datetime | None, until: datetime) -> float:
+    """
+    Suma neta (créditos − débitos) de las entradas de la cuenta con
+    since <= created_at <= until (sin límite inferior si since es None).
+    Incluye las entradas archivadas anteriores al horizonte del archivo.
+    """
+    total = 0.0
+    horizon = get_archive_horizon()
+    if horizon is not None and (since is None or since < horizon):
+        for e in iter_archived_account_entries(account_id, since, min(until, horizon),
+                                               until_inclusive=until < horizon):
+            total += e["amount"] if e["entry_type"] == CREDIT else -e["amount"]
+        if until < horizon:
+            return total
+        since = horizon if since is None else max(since, horizon)
+
+    sql = """
+        SELECT entry_type, SUM(amount)
+        FROM ledger_entry
+        WHERE account_id = ? AND created_at <= ?
+    """
+    params: tuple = (account_id, until)
+    if since is not None:
+        sql += " AND created_at >= ?"
+        params += (since,)
+    sql += " GROUP BY entry_type"
+
+    cursor.execute(sql, params)
+    for entry_type, amount in cursor.fetchall():
+        amount = float(amount or 0)
+        total += amount if entry_type == CREDIT else -amount
+    return total
+
+
+def get_balance_as_of(account_id: int, timestamp: datetime) -> float:
+    """
+    Retorna el saldo de la cuenta al momento `timestamp` (inclusive).
+
+    Lee el checkpoint más cercano anterior y suma solo las entradas
+    posteriores a él. Sin checkpoints, suma toda la historia de la cuenta.
+    Esta función abre su propia conexión (operación de lectura, no transaccional).
+    """
+    from config.database import get_cursor
+
+    log.debug("Saldo a una fecha", account=account_id, timestamp=timestamp)
+
+    with get_cursor() as cursor:
+        checkpoint = get_latest_checkpoint(cursor, account_id, timestamp)
+        if checkpoint is None:
+            return round(sum_entries(cursor, account_id, None, timestamp), 2)
+
+        checkpoint_at, balance = checkpoint
+        return round(balance + sum_entries(cursor, account_id, checkpoint_at, timestamp), 2)
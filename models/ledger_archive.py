@@ -0,0 +1,405 @@
+"""
+ledger_archive.py
+Lectura y escritura de segmentos de archivo del ledger.
+
+Las entradas antiguas de ledger_entry se mueven (services.archive_service)
+a archivos inmutables, uno o más por mes, en LEDGER_ARCHIVE_DIR:
+
+    2024-01.000.seg   bloques comprimidos (zlib) de registros de ancho fijo
+    2024-01.000.idx   índice: una fila por bloque
+
+Cada registro ocupa RECORD.size bytes (Id_entry, transaction_id,
+account_id, código de entry_type, monto en centavos, created_at en
+microsegundos desde 1970-01-01). Los registros van ordenados por
+Id_entry y se agrupan en bloques de ARCHIVE_BLOCK_ROWS. El índice guarda
+por bloque su posición, rangos de Id_entry / transaction_id / created_at
+y una máscara de cuentas, así que una búsqueda solo descomprime los
+bloques candidatos. El segmento se abre con mmap: nunca se carga entero.
+
+Horizonte: todo lo anterior al primer día del mes siguiente al último mes
+archivado vive en el archivo; lo posterior, en la tabla. Los lectores de
+ledger_model combinan ambos lados usando ese corte.
+"""
+
+import glob
+import mmap
+import os
+import struct
+import threading
+import zlib
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator
+
+from models.ledger_model import CREDIT, DEBIT
+from models.ledger_rows import from_epoch_us, to_cents, to_epoch_us
+
+
+ARCHIVE_DIR        = os.getenv("LEDGER_ARCHIVE_DIR", "ledger_archive")
+ARCHIVE_BLOCK_ROWS = int(os.getenv("LEDGER_ARCHIVE_BLOCK_ROWS", "1024"))
+
+SEGMENT_MAGIC = b"SYNLEDG1"
+
+# Id_entry, transaction_id, account_id, entry_type, centavos, created_at (µs)
+RECORD = struct.Struct("<qqqBqq")
+
+_INDEX_HEADER = struct.Struct("<8sI")
+# offset, bytes comprimidos, filas, min/max Id_entry, min/max transaction_id,
+# min/max created_at, máscara de cuentas
+_INDEX_ENTRY  = struct.Struct("<QIIqqqqqq64s")
+_MASK_BITS    = 512
+
+_TYPE_CODES = {DEBIT: 0, CREDIT: 1}
+_TYPE_NAMES = (DEBIT, CREDIT)
+
+
+def _account_bit(account_id: int) -> int:
+    return account_id % _MASK_BITS
+
+
+def _record_to_dict(record: tuple) -> dict[str, Any]:
+    entry_id, tx_id, account_id, code, cents, at = record
+    return {
+        "Id_entry":       entry_id,
+        "transaction_id": tx_id,
+        "account_id":     account_id,
+        "entry_type":     _TYPE_NAMES[code],
+        "amount":         cents / 100,
+        "created_at":     from_epoch_us(at),
+    }
+
+
+# ─────────────────────────────────────────────
+# Segmento (lectura)
+# ─────────────────────────────────────────────
+
+class _Block:
+    __slots__ = ("offset", "length", "rows", "min_id", "max_id",
+                 "min_tx", "max_tx", "min_at", "max_at", "accounts")
+
+    def __init__(self, values: tuple):
+        (self.offset, self.length, self.rows, self.min_id, self.max_id,
+         self.min_tx, self.max_tx, self.min_at, self.max_at, mask) = values
+        self.accounts = int.from_bytes(mask, "little")
+
+    def may_contain_account(self, account_id: int) -> bool:
+        return bool(self.accounts >> _account_bit(account_id) & 1)
+
+
+class ArchiveSegment:
+    """
+    Segmento inmutable abierto con mmap. Solo descomprime los bloques que
+    el índice no puede descartar.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.month = os.path.basename(path).split(".")[0]
+
+        with open(os.path.splitext(path)[0] + ".idx", "rb") as f:
+            raw = f.read()
+        magic, count = _INDEX_HEADER.unpack_from(raw, 0)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"Índice de archivo inválido: {path}")
+        self.blocks = [
+            _Block(_INDEX_ENTRY.unpack_from(raw, _INDEX_HEADER.size + i * _INDEX_ENTRY.size))
+            for i in range(count)
+        ]
+        self._max_ids = [b.max_id for b in self.blocks]
+
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+            self.close()
+            raise ValueError(f"Segmento de archivo inválido: {path}")
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return sum(b.rows for b in self.blocks)
+
+    def _read_block(self, block: _Block) -> Iterator[tuple]:
+        data = zlib.decompress(self._map[block.offset:block.offset + block.length])
+        return RECORD.iter_unpack(data)
+
+    def records(self, block_filter: Callable[[_Block], bool] | None = None) -> Iterator[tuple]:
+        """Registros de los bloques que pasan `block_filter`, en orden de Id_entry."""
+        for block in self.blocks:
+            if block_filter is None or block_filter(block):
+                yield from self._read_block(block)
+
+    def find(self, entry_id: int) -> tuple | None:
+        """Busca un registro por Id_entry (búsqueda binaria sobre el índice)."""
+        i = bisect_left(self._max_ids, entry_id)
+        if i == len(self.blocks) or self.blocks[i].min_id > entry_id:
+            return None
+        for record in self._read_block(self.blocks[i]):
+            if record[0] == entry_id:
+                return record
+        return None
+
+
+# ─────────────────────────────────────────────
+# Registro de segmentos
+# ─────────────────────────────────────────────
+
+_lock = threading.Lock()
+_cache: tuple[int, list[ArchiveSegment]] | None = None
+
+
+def get_segments() -> list[ArchiveSegment]:
+    """
+    Segmentos disponibles, ordenados por mes y parte. Se recargan solo
+    cuando cambia el directorio de archivo.
+    """
+    global _cache
+    try:
+        stamp = os.stat(ARCHIVE_DIR).st_mtime_ns
+    except FileNotFoundError:
+        return []
+
+    with _lock:
+        if _cache is not None and _cache[0] == stamp:
+            return _cache[1]
+        opened = {s.path: s for s in _cache[1]} if _cache else {}
+        segments = []
+        for path in sorted(glob.glob(os.path.join(ARCHIVE_DIR, "*.seg"))):
+            segment = opened.pop(path, None) or ArchiveSegment(path)
+            segments.append(segment)
+        for stale in opened.values():
+            stale.close()
+        _cache = (stamp, segments)
+        return segments
+
+
+def get_archive_horizon() -> datetime | None:
+    """
+    Primer instante NO archivado (día 1 del mes siguiente al último mes
+    archivado), o None si no hay archivo.
+    """
+    segments = get_segments()
+    if not segments:
+        return None
+    year, month = (int(p) for p in segments[-1].month.split("-"))
+    return datetime(year + month // 12, month % 12 + 1, 1)
+
+
+# ─────────────────────────────────────────────
+# Consultas sobre el archivo
+# ─────────────────────────────────────────────
+
+def get_archived_entry(entry_id: int) -> dict[str, Any] | None:
+    for segment in get_segments():
+        record = segment.find(entry_id)
+        if record is not None:
+            return _record_to_dict(record)
+    return None
+
+
+def get_archived_entries_by_transactions(transaction_ids: Iterable[int]) -> dict[int, list[dict[str, Any]]]:
+    """Entradas archivadas de las transacciones dadas, agrupadas por transacción."""
+    wanted = set(transaction_ids)
+    grouped: dict[int, list[dict[str, Any]]] = {}
+    if not wanted:
+        return grouped
+    ordered = sorted(wanted)
+
+    def block_filter(b: _Block) -> bool:
+        i = bisect_left(ordered, b.min_tx)
+        return i < len(ordered) and ordered[i] <= b.max_tx
+
+    for segment in get_segments():
+        for record in segment.records(block_filter):
+            if record[1] in wanted:
+                grouped.setdefault(record[1], []).append(_record_to_dict(record))
+    return grouped
+
+
+def iter_archived_transaction_range(low: int, high: int) -> Iterator[dict[str, Any]]:
+    """Entradas archivadas con low <= transaction_id <= high."""
+    def block_filter(b: _Block) -> bool:
+        return b.max_tx >= low and b.min_tx <= high
+
+    for segment in get_segments():
+        for record in segment.records(block_filter):
+            if low <= record[1] <= high:
+                yield _record_to_dict(record)
+
+
+def iter_archived_account_entries(account_id: int, since: datetime | None = None,
+                                  until: datetime | None = None,
+                                  until_inclusive: bool = False) -> Iterator[dict[str, Any]]:
+    """
+    Entradas archivadas de una cuenta en orden (created_at, Id_entry).
+    since es inclusivo; until es exclusivo salvo until_inclusive=True.
+    Memoria: un mes de entradas de la cuenta como máximo.
+    """
+    since_us = to_epoch_us(since) if since is not None else None
+    until_us = to_epoch_us(until) if until is not None else None
+
+    def block_filter(b: _Block) -> bool:
+        if not b.may_contain_account(account_id):
+            return False
+        if since_us is not None and b.max_at < since_us:
+            return False
+        if until_us is not None and (b.min_at > until_us or
+                                     (b.min_at == until_us and not until_inclusive)):
+            return False
+        return True
+
+    def in_range(at: int) -> bool:
+        if since_us is not None and at < since_us:
+            return False
+        if until_us is not None:
+            return at <= until_us if until_inclusive else at < until_us
+        return True
+
+    segments = get_segments()
+    i = 0
+    while i < len(segments):
+        # Las partes de un mismo mes se mezclan y ordenan juntas
+        month = segments[i].month
+        records = []
+        while i < len(segments) and segments[i].month == month:
+            records.extend(r for r in segments[i].records(block_filter)
+                           if r[2] == account_id and in_range(r[5]))
+            i += 1
+        records.sort(key=lambda r: (r[5], r[0]))
+        for record in records:
+            yield _record_to_dict(record)
+
+
+def iter_archived_records(since: datetime | None = None, until: datetime | None = None,
+                          account_id: int | None = None) -> Iterator[tuple]:
+    """
+    Registros crudos del archivo (tuplas RECORD) con since <= created_at <
+    until, opcionalmente de una sola cuenta, en orden (created_at,
+    Id_entry). Memoria: un mes de registros como máximo.
+    """
+    since_us = to_epoch_us(since) if since is not None else None
+    until_us = to_epoch_us(until) if until is not None else None
+
+    def block_filter(b: _Block) -> bool:
+        if account_id is not None and not b.may_contain_account(account_id):
+            return False
+        if since_us is not None and b.max_at < since_us:
+            return False
+        return until_us is None or b.min_at < until_us
+
+    def wanted(record: tuple) -> bool:
+        if account_id is not None and record[2] != account_id:
+            return False
+        if since_us is not None and record[5] < since_us:
+            return False
+        return until_us is None or record[5] < until_us
+
+    segments = get_segments()
+    i = 0
+    while i < len(segments):
+        month = segments[i].month
+        records = []
+        while i < len(segments) and segments[i].month == month:
+            records.extend(r for r in segments[i].records(block_filter) if wanted(r))
+            i += 1
+        records.sort(key=lambda r: (r[5], r[0]))
+        yield from records
+
+
+def archived_account_totals() -> dict[int, int]:
+    """Saldo neto (créditos − débitos) en centavos por cuenta, de todo el archivo."""
+    totals: dict[int, int] = {}
+    for segment in get_segments():
+        for _, _, account_id, code, cents, _ in segment.records():
+            totals[account_id] = totals.get(account_id, 0) + (cents if code == 1 else -cents)
+    return totals
+
+
+def archived_entry_ids(month: str) -> set[int]:
+    """IDs ya archivados en las partes de un mes ('YYYY-MM')."""
+    ids: set[int] = set()
+    for segment in get_segments():
+        if segment.month == month:
+            ids.update(record[0] for record in segment.records())
+    return ids
+
+
+# ─────────────────────────────────────────────
+# Escritura de segmentos
+# ─────────────────────────────────────────────
+
+def write_segment(month: str, rows: Iterable[Any],
+                  block_rows: int = ARCHIVE_BLOCK_ROWS) -> tuple[str, int] | None:
+    """
+    Escribe una nueva parte del mes `month` con las filas dadas (tuplas
+    en el orden de ledger_entry, ordenadas por Id_entry). Se escribe a un
+    archivo temporal y se renombra al final: un segmento visible siempre
+    está completo.
+
+    Returns:
+        (ruta, filas escritas), o None si no había filas.
+    """
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    part = len(glob.glob(os.path.join(ARCHIVE_DIR, f"{month}.*.seg")))
+    base = os.path.join(ARCHIVE_DIR, f"{month}.{part:03d}")
+
+    index: list[bytes] = []
+    written = 0
+    last_id = None
+    seg_tmp, idx_tmp = base + ".seg.tmp", base + ".idx.tmp"
+
+    # La limpieza va fuera del with: en Windows no se puede borrar un
+    # archivo abierto
+    try:
+        with open(seg_tmp, "wb") as f:
+            f.write(SEGMENT_MAGIC)
+            block: list[tuple] = []
+
+            def flush() -> None:
+                data = zlib.compress(b"".join(RECORD.pack(*r) for r in block))
+                mask = 0
+                for r in block:
+                    mask |= 1 << _account_bit(r[2])
+                index.append(_INDEX_ENTRY.pack(
+                    f.tell(), len(data), len(block),
+                    block[0][0], block[-1][0],
+                    min(r[1] for r in block), max(r[1] for r in block),
+                    min(r[5] for r in block), max(r[5] for r in block),
+                    mask.to_bytes(64, "little"),
+                ))
+                f.write(data)
+                block.clear()
+
+            for row in rows:
+                entry_id, tx_id, account_id, entry_type, amount, created_at = row
+                if last_id is not None and entry_id <= last_id:
+                    raise ValueError("Las filas deben venir ordenadas por Id_entry.")
+                last_id = entry_id
+                block.append((entry_id, tx_id, account_id, _TYPE_CODES[entry_type],
+                              to_cents(amount), to_epoch_us(created_at)))
+                written += 1
+                if len(block) >= block_rows:
+                    flush()
+            if block:
+                flush()
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(seg_tmp)
+        raise
+
+    if not written:
+        os.remove(seg_tmp)
+        return None
+
+    with open(idx_tmp, "wb") as f:
+        f.write(_INDEX_HEADER.pack(SEGMENT_MAGIC, len(index)))
+        f.write(b"".join(index))
+        f.flush()
+        os.fsync(f.fileno())
+
+    # El índice primero: get_segments() solo ve el .seg cuando ya existe su .idx
+    os.replace(idx_tmp, base + ".idx")
+    os.replace(seg_tmp, base + ".seg")
+    return base + ".seg", written
@@ -12,7 +12,14 @@ El código de negocio (service layer) es responsable de:
 """
 
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterable, Iterator
+
+from config.id_allocator import next_id
+from config.logger import get_logger
+from models.balance_model import apply_balance_delta
+
+
+log = get_logger(__name__, "LEDGER")
 
 
 # ─────────────────────────────────────────────
@@ -21,27 +28,67 @@ from typing import Any
 DEBIT  = "debit"
 CREDIT = "credit"
 
+LEDGER_TABLE = "ledger_entry"
+
+# Filas por página en stream_ledger_entries
+LEDGER_PAGE_SIZE = 1000
+
+# IDs por cláusula IN (...) en get_ledger_entries_by_transactions
+LEDGER_IN_CHUNK = 100
+
+
+def _archive_horizon() -> datetime | None:
+    """Corte del archivo de ledger (None si no hay segmentos archivados)."""
+    from models.ledger_archive import get_archive_horizon
+    return get_archive_horizon()
+
+
+def _merge_archived(entries: list[dict[str, Any]],
+                    archived: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Combina entradas de la tabla con las archivadas, sin duplicados
+    (una entrada puede estar en ambos lados si el archivado se interrumpió).
+    """
+    if not archived:
+        return entries
+    seen = {e["Id_entry"] for e in entries}
+    merged = entries + [e for e in archived if e["Id_entry"] not in seen]
+    merged.sort(key=lambda e: (e["created_at"], e["Id_entry"]))
+    return merged
+
 
 def create_ledger_entry(cursor: Any, transaction_id: int, account_id: int,
-                        amount: float, entry_type: str) -> int:
+                        amount: float, entry_type: str,
+                        entry_id: int | None = None,
+                        allow_overdraft: bool = True) -> int:
     """
     Inserta un registro en ledger_entry usando un cursor existente.
     
     IMPORTANTE: Llamador es responsable de commit/rollback. Esta función
     NO abre ni cierra conexiones ni maneja transacciones.
 
+    El ID se asigna antes del INSERT (config.id_allocator), así que no hace
+    falta consultar @@IDENTITY. Lo ideal es que el llamador lo reserve antes
+    de empezar la transacción y lo pase en entry_id.
+
+    El saldo materializado de la cuenta (account_balance) se actualiza en
+    la misma transacción.
+
     Args:
         cursor         : Cursor pyodbc existente (no None)
         transaction_id : FK a transaction.Id_transaction
         account_id     : FK a account.Id_account
         amount         : Monto del movimiento (siempre positivo)
         entry_type     : 'debit' o 'credit'
+        entry_id       : Id_entry ya reservado (opcional)
+        allow_overdraft: Si False, un débito que deje saldo negativo falla
 
     Returns:
         Id del registro insertado.
         
     Raises:
         ValueError: Si entry_type o amount son inválidos.
+        InsufficientFundsError: Si allow_overdraft=False y no hay fondos.
         Exception: Si la inserción falla.
     """
     if entry_type not in (DEBIT, CREDIT):
@@ -50,27 +97,74 @@ def create_ledger_entry(cursor: Any, transaction_id: int, account_id: int,
     if amount <= 0:
         raise ValueError(f"El monto debe ser positivo, se recibió: {amount}")
 
+    if entry_id is None:
+        entry_id = next_id(LEDGER_TABLE)
+
+    delta = amount if entry_type == CREDIT else -amount
+    apply_balance_delta(cursor, account_id, delta, allow_overdraft=allow_overdraft)
+
     sql = """
-        INSERT INTO ledger_entry (transaction_id, account_id, entry_type, amount, created_at)
-        VALUES (?, ?, ?, ?, ?)
+        INSERT INTO ledger_entry (Id_entry, transaction_id, account_id, entry_type, amount, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
     """
 
     created_at = datetime.now()
 
-    print(f"[LEDGER] Insertando entrada → tx={transaction_id}, cuenta={account_id}, "
-          f"monto={amount}, tipo={entry_type}, fecha={created_at}")
+    cursor.execute(sql, (entry_id, transaction_id, account_id, entry_type, amount, created_at))
+
+    log.debug("Entrada creada", entry_id=entry_id, tx=transaction_id, account=account_id,
+              amount=amount, type=entry_type)
+    return entry_id
+
+
+def create_ledger_entries(cursor: Any,
+                          entries: list[tuple[int, int, int, float, str]],
+                          allow_overdraft: bool = True) -> list[int]:
+    """
+    Inserta varias entradas de ledger en una sola llamada executemany.
+
+    Igual que create_ledger_entry, usa el cursor del llamador y NO hace
+    commit. Los IDs deben venir ya reservados (config.id_allocator.next_ids).
+    Los saldos se actualizan con un solo UPDATE por cuenta (delta neto).
+
+    Args:
+        cursor         : Cursor pyodbc existente (no None)
+        entries        : Tuplas (entry_id, transaction_id, account_id, amount, entry_type)
+        allow_overdraft: Si False, falla si el delta neto de una cuenta la
+                         deja en negativo
+
+    Returns:
+        Lista de Id_entry insertados, en el mismo orden.
+
+    Raises:
+        ValueError: Si alguna entrada tiene entry_type o amount inválidos.
+        InsufficientFundsError: Si allow_overdraft=False y no hay fondos.
+    """
+    if not entries:
+        return []
+
+    created_at = datetime.now()
+    params = []
+    deltas: dict[int, float] = {}
+    for entry_id, transaction_id, account_id, amount, entry_type in entries:
+        if entry_type not in (DEBIT, CREDIT):
+            raise ValueError(f"entry_type debe ser '{DEBIT}' o '{CREDIT}', se recibió: '{entry_type}'")
+        if amount <= 0:
+            raise ValueError(f"El monto debe ser positivo, se recibió: {amount}")
+        params.append((entry_id, transaction_id, account_id, entry_type, amount, created_at))
+        deltas[account_id] = deltas.get(account_id, 0.0) + (amount if entry_type == CREDIT else -amount)
 
-    cursor.execute(sql, (transaction_id, account_id, entry_type, amount, created_at))
+    for account_id, delta in deltas.items():
+        apply_balance_delta(cursor, account_id, delta, allow_overdraft=allow_overdraft)
 
-    # Access no soporta RETURNING; usamos @@IDENTITY para obtener el último ID generado
-    cursor.execute("SELECT @@IDENTITY")
-    result = cursor.fetchone()
-    if result is None or result[0] is None:
-        raise Exception("No se pudo obtener el ID de la entrada creada.")
-    new_id = int(result[0])
+    sql = """
+        INSERT INTO ledger_entry (Id_entry, transaction_id, account_id, entry_type, amount, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """
+    cursor.executemany(sql, params)
 
-    print(f"[LEDGER] ✅ Entrada creada con Id_entry={new_id}")
-    return new_id
+    log.debug("Entradas insertadas en lote", count=len(params))
+    return [p[0] for p in params]
 
 
 def get_ledger_entries_by_transaction(transaction_id: int) -> list[dict[str, Any]]:
@@ -92,7 +186,6 @@ def get_ledger_entries_by_transaction(transaction_id: int) -> list[dict[str, Any
         WHERE transaction_id = ?
         ORDER BY created_at ASC
     """
-    print(f"[LEDGER] Consultando entradas para transaction_id={transaction_id}")
 
     conn = None
     cursor = None
@@ -114,11 +207,16 @@ def get_ledger_entries_by_transaction(transaction_id: int) -> list[dict[str, Any
             for row in rows
         ]
 
-        print(f"[LEDGER] Se encontraron {len(entries)} entradas.")
+        if _archive_horizon() is not None:
+            from models.ledger_archive import get_archived_entries_by_transactions
+            archived = get_archived_entries_by_transactions([transaction_id])
+            entries = _merge_archived(entries, archived.get(transaction_id, []))
+
+        log.debug("Entradas consultadas", tx=transaction_id, count=len(entries))
         return entries
 
     except Exception as e:
-        print(f"[LEDGER] ❌ Error al consultar ledger: {e}")
+        log.error("Error al consultar ledger", tx=transaction_id, error=e)
         return []
 
     finally:
@@ -128,6 +226,75 @@ def get_ledger_entries_by_transaction(transaction_id: int) -> list[dict[str, Any
             conn.close()
 
 
+def get_ledger_entries_by_transactions(transaction_ids: Iterable[int],
+                                       chunk_size: int = LEDGER_IN_CHUNK) -> dict[int, list[dict[str, Any]]]:
+    """
+    Retorna las entradas de ledger de muchas transacciones a la vez.
+
+    Evita el patrón N+1 (una consulta y una conexión por transacción):
+    usa una sola conexión y consultas WHERE transaction_id IN (...) de a
+    `chunk_size` IDs. Una página de 100 transacciones es una sola consulta.
+    Esta función abre su propia conexión (operación de lectura, no transaccional).
+
+    Args:
+        transaction_ids: IDs de transacción (se ignoran duplicados)
+        chunk_size     : IDs por consulta
+
+    Returns:
+        dict transaction_id → lista de entradas (ordenadas por created_at).
+        Incluye una lista vacía para los IDs sin entradas.
+    """
+    from config.database import get_connection
+
+    ids = list(dict.fromkeys(transaction_ids))
+    grouped: dict[int, list[dict[str, Any]]] = {tx_id: [] for tx_id in ids}
+    if not ids:
+        return grouped
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f"""
+                SELECT Id_entry, transaction_id, account_id, entry_type, amount, created_at
+                FROM ledger_entry
+                WHERE transaction_id IN ({placeholders})
+                ORDER BY transaction_id, created_at, Id_entry
+            """, chunk)
+            for row in cursor.fetchall():
+                grouped.setdefault(row[1], []).append({
+                    "Id_entry":       row[0],
+                    "transaction_id": row[1],
+                    "account_id":     row[2],
+                    "entry_type":     row[3],
+                    "amount":         row[4],
+                    "created_at":     row[5],
+                })
+
+        if _archive_horizon() is not None:
+            from models.ledger_archive import get_archived_entries_by_transactions
+            for tx_id, archived in get_archived_entries_by_transactions(ids).items():
+                grouped[tx_id] = _merge_archived(grouped.get(tx_id, []), archived)
+
+        log.debug("Entradas consultadas", transactions=len(ids),
+                  count=sum(len(v) for v in grouped.values()))
+        return grouped
+
+    except Exception as e:
+        log.error("Error al consultar ledger", transactions=len(ids), error=e)
+        return {tx_id: [] for tx_id in ids}
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
 def get_ledger_entry_by_id(entry_id: int) -> dict[str, Any] | None:
     """
     Retorna una entrada de ledger por su ID primario.
@@ -140,8 +307,6 @@ def get_ledger_entry_by_id(entry_id: int) -> dict[str, Any] | None:
         FROM ledger_entry
         WHERE Id_entry = ?
     """
-    print(f"[LEDGER] Buscando Id_entry={entry_id}")
-
     conn = None
     cursor = None
     try:
@@ -151,7 +316,12 @@ def get_ledger_entry_by_id(entry_id: int) -> dict[str, Any] | None:
         row = cursor.fetchone()
 
         if not row:
-            print(f"[LEDGER] ⚠️ No se encontró Id_entry={entry_id}")
+            if _archive_horizon() is not None:
+                from models.ledger_archive import get_archived_entry
+                archived = get_archived_entry(entry_id)
+                if archived is not None:
+                    return archived
+            log.debug("Entrada no encontrada", entry_id=entry_id)
             return None
 
         return {
@@ -164,11 +334,95 @@ def get_ledger_entry_by_id(entry_id: int) -> dict[str, Any] | None:
         }
 
     except Exception as e:
-        print(f"[LEDGER] ❌ Error al buscar entrada: {e}")
+        log.error("Error al buscar entrada", entry_id=entry_id, error=e)
         return None
 
     finally:
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+
+def stream_ledger_entries(account_id: int, since: datetime | None = None,
+                          until: datetime | None = None,
+                          page_size: int = LEDGER_PAGE_SIZE) -> Iterator[dict[str, Any]]:
+    """
+    Recorre las entradas de una cuenta en orden (created_at, Id_entry)
+    sin cargarlas todas en memoria.
+
+    Usa paginación por clave (keyset): cada página es un SELECT TOP n que
+    continúa después de la última (created_at, Id_entry) vista, así que el
+    costo por página no crece con el desplazamiento y la memoria es de a
+    lo sumo `page_size` filas. La conexión se devuelve al pool entre
+    páginas; el llamador puede cortar la iteración cuando quiera.
+
+    Si hay archivo (models.ledger_archive), primero se recorren las
+    entradas archivadas (anteriores al horizonte) y luego la tabla.
+
+    Args:
+        account_id: FK a account.Id_account
+        since     : Solo entradas con created_at >= since (opcional)
+        until     : Solo entradas con created_at < until (opcional)
+        page_size : Filas por consulta
+
+    Yields:
+        dicts con los campos de ledger_entry.
+    """
+    from config.database import get_cursor
+
+    page_size = int(page_size)
+    if page_size < 1:
+        raise ValueError("page_size debe ser al menos 1.")
+
+    horizon = _archive_horizon()
+    if horizon is not None:
+        if since is None or since < horizon:
+            from models.ledger_archive import iter_archived_account_entries
+            archive_until = horizon if until is None else min(until, horizon)
+            yield from iter_archived_account_entries(account_id, since, archive_until)
+        since = horizon if since is None else max(since, horizon)
+        if until is not None and until <= since:
+            return
+
+    base_sql = f"""
+        SELECT TOP {page_size} Id_entry, transaction_id, account_id, entry_type, amount, created_at
+        FROM ledger_entry
+        WHERE account_id = ?
+    """
+    base_params: tuple = (account_id,)
+    if since is not None:
+        base_sql += " AND created_at >= ?"
+        base_params += (since,)
+    if until is not None:
+        base_sql += " AND created_at < ?"
+        base_params += (until,)
+
+    first_sql = base_sql + " ORDER BY created_at, Id_entry"
+    next_sql = base_sql + (" AND (created_at > ? OR (created_at = ? AND Id_entry > ?))"
+                           " ORDER BY created_at, Id_entry")
+
+    log.debug("Streaming de entradas", account=account_id, page_size=page_size)
+
+    last_key = None
+    while True:
+        with get_cursor() as cursor:
+            if last_key is None:
+                cursor.execute(first_sql, base_params)
+            else:
+                cursor.execute(next_sql, base_params + (last_key[0], last_key[0], last_key[1]))
+            rows = cursor.fetchmany(page_size)
+
+        for row in rows:
+            yield {
+                "Id_entry":       row[0],
+                "transaction_id": row[1],
+                "account_id":     row[2],
+                "entry_type":     row[3],
+                "amount":         row[4],
+                "created_at":     row[5],
+            }
+
+        if len(rows) < page_size:
+            return
+        last_key = (rows[-1][5], rows[-1][0])
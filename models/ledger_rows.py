@@ -0,0 +1,286 @@
+"""
+ledger_rows.py
+Contenedor compacto (columnar) para resultados grandes de ledger_entry.
+
+Un dict de seis claves por fila cuesta cientos de bytes; con millones de
+filas los procesos de cierre de mes se quedan sin memoria. LedgerEntries
+guarda cada columna en un array.array de enteros:
+
+  - Id_entry, transaction_id, account_id : int64
+  - amount                               : int64 en centavos
+  - entry_type                           : código uint8 (tabla interna)
+  - created_at                           : int64, microsegundos desde 1970-01-01
+                                           (fecha "naive", sin zona horaria)
+
+≈ 41 bytes por fila. Las filas se leen a través de vistas perezosas
+(LedgerRow, con __slots__) que aceptan row["amount"] como los dicts de
+siempre; as_dict() / to_dicts() devuelven el formato clásico.
+
+load_ledger_rows() llena el contenedor directamente desde el cursor con
+fetchmany, sin crear nunca la lista completa de dicts.
+"""
+
+from array import array
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Iterable, Iterator
+
+from config.logger import get_logger
+from models.ledger_model import CREDIT, DEBIT, LEDGER_PAGE_SIZE
+
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NO_TIME = -(2 ** 63)          # created_at nulo
+
+LEDGER_FIELDS = ("Id_entry", "transaction_id", "account_id", "entry_type", "amount", "created_at")
+
+log = get_logger(__name__, "LEDGER")
+
+
+def to_cents(amount: Any) -> int:
+    """Convierte un monto (float, Decimal o int) a centavos enteros."""
+    if isinstance(amount, Decimal):
+        return int((amount * 100).to_integral_value())
+    return int(round(float(amount) * 100))
+
+
+def to_epoch_us(value: datetime | None) -> int:
+    """Convierte una fecha naive a microsegundos desde 1970-01-01."""
+    if value is None:
+        return _NO_TIME
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def from_epoch_us(value: int) -> datetime | None:
+    """Inversa de to_epoch_us."""
+    if value == _NO_TIME:
+        return None
+    return _EPOCH + timedelta(microseconds=value)
+
+
+class LedgerRow:
+    """
+    Vista perezosa de una fila de LedgerEntries. No copia datos.
+    """
+
+    __slots__ = ("_entries", "_index")
+
+    def __init__(self, entries: "LedgerEntries", index: int):
+        self._entries = entries
+        self._index = index
+
+    @property
+    def Id_entry(self) -> int:
+        return self._entries.ids[self._index]
+
+    @property
+    def transaction_id(self) -> int:
+        return self._entries.transaction_ids[self._index]
+
+    @property
+    def account_id(self) -> int:
+        return self._entries.account_ids[self._index]
+
+    @property
+    def entry_type(self) -> str:
+        return self._entries.entry_type_names[self._entries.entry_type_codes[self._index]]
+
+    @property
+    def amount_cents(self) -> int:
+        return self._entries.amounts_cents[self._index]
+
+    @property
+    def amount(self) -> float:
+        return self._entries.amounts_cents[self._index] / 100
+
+    @property
+    def created_at(self) -> datetime | None:
+        return from_epoch_us(self._entries.created_at_us[self._index])
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in LEDGER_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in LEDGER_FIELDS else default
+
+    def keys(self) -> tuple[str, ...]:
+        return LEDGER_FIELDS
+
+    def as_dict(self) -> dict[str, Any]:
+        """La fila en el formato dict de ledger_model."""
+        return {key: getattr(self, key) for key in LEDGER_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"LedgerRow({self.as_dict()!r})"
+
+
+class LedgerEntries:
+    """
+    Conjunto de entradas de ledger almacenado por columnas.
+    """
+
+    __slots__ = ("ids", "transaction_ids", "account_ids", "amounts_cents",
+                 "entry_type_codes", "created_at_us", "entry_type_names", "_type_codes")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.transaction_ids = array("q")
+        self.account_ids = array("q")
+        self.amounts_cents = array("q")
+        self.entry_type_codes = array("B")
+        self.created_at_us = array("q")
+        # Tabla de tipos internados: código → nombre
+        self.entry_type_names: list[str] = [DEBIT, CREDIT]
+        self._type_codes: dict[str, int] = {DEBIT: 0, CREDIT: 1}
+
+    def _type_code(self, entry_type: str) -> int:
+        code = self._type_codes.get(entry_type)
+        if code is None:
+            code = len(self.entry_type_names)
+            if code > 255:
+                raise ValueError("Demasiados valores distintos de entry_type.")
+            self.entry_type_names.append(entry_type)
+            self._type_codes[entry_type] = code
+        return code
+
+    def append_row(self, row: Any) -> None:
+        """
+        Agrega una fila en el orden de LEDGER_FIELDS (tupla o fila de cursor).
+        """
+        self.ids.append(row[0])
+        self.transaction_ids.append(row[1])
+        self.account_ids.append(row[2])
+        self.entry_type_codes.append(self._type_code(row[3]))
+        self.amounts_cents.append(to_cents(row[4]))
+        self.created_at_us.append(to_epoch_us(row[5]))
+
+    def append_record(self, record: tuple) -> None:
+        """
+        Agrega un registro crudo del archivo (models.ledger_archive.RECORD):
+        ya trae centavos, microsegundos y el código de tipo (0 débito, 1
+        crédito), que coincide con la tabla interna inicial.
+        """
+        entry_id, tx_id, account_id, code, cents, at = record
+        self.ids.append(entry_id)
+        self.transaction_ids.append(tx_id)
+        self.account_ids.append(account_id)
+        self.entry_type_codes.append(code)
+        self.amounts_cents.append(cents)
+        self.created_at_us.append(at)
+
+    def extend_rows(self, rows: Iterable[Any]) -> None:
+        for row in rows:
+            self.append_row(row)
+
+    @classmethod
+    def from_dicts(cls, entries: Iterable[dict[str, Any]]) -> "LedgerEntries":
+        """Construye el contenedor a partir de dicts en formato ledger_model."""
+        result = cls()
+        for e in entries:
+            result.append_row(tuple(e[key] for key in LEDGER_FIELDS))
+        return result
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> LedgerRow:
+        if index < 0:
+            index += len(self.ids)
+        if not 0 <= index < len(self.ids):
+            raise IndexError("índice fuera de rango")
+        return LedgerRow(self, index)
+
+    def __iter__(self) -> Iterator[LedgerRow]:
+        for index in range(len(self.ids)):
+            yield LedgerRow(self, index)
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        """Todas las filas como lista de dicts (compatibilidad)."""
+        return [row.as_dict() for row in self]
+
+    def total_cents(self, entry_type: str | None = None) -> int:
+        """Suma de montos en centavos, opcionalmente filtrada por tipo."""
+        if entry_type is None:
+            return sum(self.amounts_cents)
+        code = self._type_codes.get(entry_type)
+        if code is None:
+            return 0
+        codes = self.entry_type_codes
+        return sum(a for a, c in zip(self.amounts_cents, codes) if c == code)
+
+    def nbytes(self) -> int:
+        """Bytes ocupados por las columnas."""
+        return sum(
+            column.itemsize * len(column)
+            for column in (self.ids, self.transaction_ids, self.account_ids,
+                           self.amounts_cents, self.entry_type_codes, self.created_at_us)
+        )
+
+    def __repr__(self) -> str:
+        return f"LedgerEntries({len(self)} filas, {self.nbytes()} bytes)"
+
+
+def load_ledger_rows(account_id: int | None = None,
+                     since: datetime | None = None, until: datetime | None = None,
+                     fetch_size: int = LEDGER_PAGE_SIZE) -> LedgerEntries:
+    """
+    Carga entradas de ledger en un LedgerEntries, ordenadas por
+    (created_at, Id_entry). Lo anterior al horizonte del archivo
+    (models.ledger_archive) se lee de los segmentos.
+
+    Args:
+        account_id: Solo esta cuenta (opcional; por defecto, todo el ledger)
+        since     : Solo entradas con created_at >= since (opcional)
+        until     : Solo entradas con created_at < until (opcional)
+        fetch_size: Filas por fetchmany
+
+    Esta función abre su propia conexión (operación de lectura, no transaccional).
+    """
+    from config.database import get_cursor
+    from models.ledger_archive import get_archive_horizon, iter_archived_records
+
+    result = LedgerEntries()
+
+    # Parte archivada: todo lo anterior al horizonte
+    horizon = get_archive_horizon()
+    if horizon is not None and (since is None or since < horizon):
+        archive_until = horizon if until is None else min(until, horizon)
+        for record in iter_archived_records(since, archive_until, account_id):
+            result.append_record(record)
+        if until is not None and until <= horizon:
+            log.debug("Entradas cargadas en formato compacto", count=len(result), bytes=result.nbytes())
+            return result
+        since = horizon if since is None else max(since, horizon)
+
+    conditions: list[str] = []
+    params: tuple = ()
+    if account_id is not None:
+        conditions.append("account_id = ?")
+        params += (account_id,)
+    if since is not None:
+        conditions.append("created_at >= ?")
+        params += (since,)
+    if until is not None:
+        conditions.append("created_at < ?")
+        params += (until,)
+
+    sql = f"SELECT {', '.join(LEDGER_FIELDS)} FROM ledger_entry"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY created_at, Id_entry"
+
+    with get_cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            result.extend_rows(rows)
+
+    log.debug("Entradas cargadas en formato compacto", count=len(result), bytes=result.nbytes())
+    return result
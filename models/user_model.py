@@ -1,12 +1,42 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any
+
+from config.cache import get_cache
 from config.database import get_cursor
+from config.logger import get_logger
 # Se eliminó la auto-importación circular para evitar el ImportError
 # Se eliminó la importación de account_service aquí para evitar dependencia cruzada
+from utils.bloom_filter import BloomFilter
 from utils.security import hash_password, verify_password
 
-def create_user(role_id: int, email: str, password_hash: str, nit: str | None, 
-                dui: str, full_name: str, gender: str, phone_number: str | None, 
+# Filtro de existencia delante de find_conflicts (opcional, ver _UserFilter)
+USER_FILTER_ENABLED = os.getenv("USER_FILTER_ENABLED", "0") == "1"
+USER_FILTER_FP_RATE = float(os.getenv("USER_FILTER_FP_RATE", "0.001"))
+USER_FILTER_REFRESH = float(os.getenv("USER_FILTER_REFRESH_SECONDS", "5"))
+
+# Valores por consulta IN en get_registered_keys e insert_users
+USER_IN_CHUNK = 100
+
+log = get_logger(__name__, "USER")
+
+# Filas de usuario por ("id" | "email" | "dui" | "phone", valor); ver config.cache
+_users = get_cache("user")
+
+
+def _invalidate_user(user_id: int) -> None:
+    _users.invalidate_where(lambda key, row: row[0] == user_id)
+
+
+def insert_user(cursor: Any, role_id: int, email: str, password_hash: str, nit: str | None,
+                dui: str, full_name: str, gender: str, phone_number: str | None,
                 is_active: bool = True) -> int:
-    
+    """
+    Inserta un usuario con el cursor del llamador, sin commit, y retorna
+    su ID. Tras el commit, el llamador debe llamar a user_created().
+    """
     query = """
         INSERT INTO [user] (
             role_id, email, password_hash, NIT, DUI, 
@@ -15,82 +45,162 @@ def create_user(role_id: int, email: str, password_hash: str, nit: str | None,
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, Now(), Now(), ?)
     """
 
+    # Step 1: Execute the Insert
+    cursor.execute(query, (
+        role_id, email, password_hash, nit, dui, 
+        full_name, gender, phone_number, is_active
+    ))
+
+    # Step 2: Get the ID immediately after (same connection)
+    cursor.execute("SELECT @@IDENTITY")
+    row = cursor.fetchone()
+
+    if row is None:
+        raise Exception("Database failed to return the new User ID.")
+
+    return int(row[0])
+
+
+def insert_users(cursor: Any, users: list[tuple[Any, ...]], chunk_size: int = USER_IN_CHUNK) -> list[int]:
+    """
+    Inserta varios usuarios (role_id, email, password_hash, nit, dui,
+    full_name, gender, phone_number, is_active) con un solo executemany,
+    sin commit, y retorna sus IDs en el mismo orden.
+
+    @@IDENTITY solo da el último ID, así que los IDs se resuelven después
+    por email con consultas IN (...) de a `chunk_size`, tomando solo los
+    IDs mayores al máximo previo al INSERT. Cada email debe resolver a
+    exactamente un ID nuevo; si no (emails repetidos en el lote, o el
+    mismo email insertado a la vez por otra conexión) se lanza una
+    excepción y el llamador debe revertir e insertar fila por fila con
+    insert_user.
+
+    Raises:
+        ValueError: Si el lote repite un email.
+        Exception : Si algún ID no se puede resolver sin ambigüedad.
+    """
+    if not users:
+        return []
+
+    emails = [user[1].lower() for user in users]
+    if len(set(emails)) != len(emails):
+        raise ValueError("El lote repite emails; insértelo fila por fila.")
+
+    cursor.execute("SELECT MAX([Id_user]) FROM [user]")
+    row = cursor.fetchone()
+    previous_max = int(row[0]) if row and row[0] is not None else 0
+
+    query = """
+        INSERT INTO [user] (
+            role_id, email, password_hash, NIT, DUI,
+            full_name, gender, phone_number, created_at, updated_at, is_active
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, Now(), Now(), ?)
+    """
+    cursor.executemany(query, users)
+
+    raw_emails = [user[1] for user in users]
+    ids: dict[str, list[int]] = {}
+    for i in range(0, len(raw_emails), chunk_size):
+        chunk = raw_emails[i:i + chunk_size]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor.execute(f"SELECT [email], [Id_user] FROM [user] "
+                       f"WHERE [email] IN ({placeholders}) AND [Id_user] > ?", (*chunk, previous_max))
+        for email, user_id in cursor.fetchall():
+            ids.setdefault(email.lower(), []).append(int(user_id))
+
+    ambiguous = [email for email in emails if len(ids.get(email, ())) != 1]
+    if ambiguous:
+        raise Exception(f"Database failed to return a unique new User ID for {ambiguous[0]}.")
+    return [ids[email][0] for email in emails]
+
+
+def user_created(email: str, dui: str, phone_number: str | None) -> None:
+    """
+    Actualiza la caché y el filtro de existencia tras confirmar un usuario.
+    """
+    _users.invalidate(("email", email), ("dui", dui), ("phone", phone_number))
+    _user_filter.add(email, dui, phone_number)
+
+
+def create_user(role_id: int, email: str, password_hash: str, nit: str | None, 
+                dui: str, full_name: str, gender: str, phone_number: str | None, 
+                is_active: bool = True) -> int:
+
     # We use the 'with' block to ensure the cursor is active
     with get_cursor(commit=True) as cursor:
-        # Step 1: Execute the Insert
-        cursor.execute(query, (
-            role_id, email, password_hash, nit, dui, 
-            full_name, gender, phone_number, is_active
-        ))
-        
-        # Step 2: Get the ID immediately after
-        cursor.execute("SELECT @@IDENTITY")
-        row = cursor.fetchone()
-        
-        if row is None:
-            raise Exception("Database failed to return the new User ID.")
-            
-        new_id = int(row[0])
-        print(f"[DEBUG] User created successfully with ID: {new_id}")
-        return new_id
-
-def get_user_by_email(email: str):
+        new_id = insert_user(cursor, role_id, email, password_hash, nit, dui,
+                             full_name, gender, phone_number, is_active)
+
+    user_created(email, dui, phone_number)
+    log.debug("Usuario creado", user_id=new_id)
+    return new_id
+
+def get_user_by_email(email: str, cached: bool = True):
     """
     Retorna un usuario por email.
     Devuelve None si no existe.
+
+    Con cached=False se lee siempre de la base, sin pasar por la caché:
+    la autenticación lo usa para que un cambio de contraseña o una
+    desactivación hechos desde otro proceso apliquen de inmediato.
     """
-    print("[DEBUG] Buscando usuario por email...")
     query = "SELECT * FROM [user] WHERE email = ?"
 
-    with get_cursor() as cursor:
-        cursor.execute(query, (email,))
-        row = cursor.fetchone()
-
-        if row:
-            print("[DEBUG] Usuario encontrado.")
-        else:
-            print("[DEBUG] Usuario no encontrado.")
+    def load():
+        with get_cursor() as cursor:
+            cursor.execute(query, (email,))
+            return cursor.fetchone()
 
-        return row
+    row = _users.get_or_load(("email", email), load) if cached else load()
+    log.debug("Búsqueda de usuario por email", found=row is not None)
+    return row
 
 def get_user_by_dui(dui: str):
     """
     Retorna un usuario por DUI.
     Útil para validar duplicados antes de insertar.
     """
-    print(f"[DEBUG] Buscando usuario por DUI: {dui}")
     query = "SELECT * FROM [user] WHERE DUI = ?"
-    with get_cursor() as cursor:
-        cursor.execute(query, (dui,))
-        return cursor.fetchone()
+
+    def load():
+        with get_cursor() as cursor:
+            cursor.execute(query, (dui,))
+            return cursor.fetchone()
+
+    return _users.get_or_load(("dui", dui), load)
 
 def get_user_by_phone(phone_number: str):
     """
     Retorna un usuario por número de teléfono.
     Útil para validar duplicados antes de insertar.
     """
-    print(f"[DEBUG] Buscando usuario por teléfono: {phone_number}")
     query = "SELECT * FROM [user] WHERE phone_number = ?"
-    with get_cursor() as cursor:
-        cursor.execute(query, (phone_number,))
-        return cursor.fetchone()
+
+    def load():
+        with get_cursor() as cursor:
+            cursor.execute(query, (phone_number,))
+            return cursor.fetchone()
+
+    return _users.get_or_load(("phone", phone_number), load)
 
 def get_user_by_id(user_id: int):
     """
     Retorna un usuario por ID.
     """
-    print("[DEBUG] Buscando usuario por ID...")
     query = "SELECT * FROM [user] WHERE [Id_user] = ?"
 
-    with get_cursor() as cursor:
-        cursor.execute(query, (user_id,))
-        return cursor.fetchone()
+    def load():
+        with get_cursor() as cursor:
+            cursor.execute(query, (user_id,))
+            return cursor.fetchone()
+
+    return _users.get_or_load(("id", user_id), load)
 
 def update_last_login(user_id: int) -> None:
     """
     Actualiza la fecha de último login.
     """
-    print("[DEBUG] Actualizando último login...")
     query = """
         UPDATE [user]
         SET updated_at = Now()
@@ -100,4 +210,200 @@ def update_last_login(user_id: int) -> None:
     with get_cursor(commit=True) as cursor:
         cursor.execute(query, (user_id,))
 
-    print("[DEBUG] Último login actualizado.")
\ No newline at end of file
+    _invalidate_user(user_id)
+    log.debug("Último login actualizado", user_id=user_id)
+
+def update_last_logins(logins: dict[int, datetime]) -> int:
+    """
+    Aplica varios últimos logins {user_id: fecha} en una transacción con
+    un solo commit. Nunca retrocede una fecha ya guardada, así que
+    reaplicar el mismo lote es inofensivo.
+
+    Returns:
+        Cantidad de usuarios enviados.
+    """
+    if not logins:
+        return 0
+
+    query = """
+        UPDATE [user]
+        SET updated_at = ?
+        WHERE [Id_user] = ? AND (updated_at IS NULL OR updated_at < ?)
+    """
+
+    with get_cursor(commit=True) as cursor:
+        cursor.executemany(query, [(at, user_id, at) for user_id, at in logins.items()])
+
+    for user_id in logins:
+        _invalidate_user(user_id)
+    log.debug("Últimos logins actualizados", users=len(logins))
+    return len(logins)
+
+def update_password_hash(user_id: int, password_hash: str) -> None:
+    """
+    Reemplaza el hash de contraseña (p. ej. al cambiar el factor de trabajo).
+    """
+    query = """
+        UPDATE [user]
+        SET password_hash = ?, updated_at = Now()
+        WHERE [Id_user] = ?
+    """
+
+    with get_cursor(commit=True) as cursor:
+        cursor.execute(query, (password_hash, user_id))
+
+    _invalidate_user(user_id)
+    log.debug("Hash de contraseña actualizado", user_id=user_id)
+
+
+# ─────────────────────────────────────────────
+# Verificación de duplicados al registrar
+# ─────────────────────────────────────────────
+
+def _filter_keys(email: str | None, dui: str | None, phone_number: str | None) -> list[str]:
+    keys = []
+    if email:
+        keys.append("email:" + email.strip().lower())
+    if dui:
+        keys.append("dui:" + dui.strip())
+    if phone_number:
+        keys.append("phone:" + phone_number.strip())
+    return keys
+
+
+class _UserFilter:
+    """
+    Filtro de Bloom con los email / DUI / teléfono ya registrados.
+
+    Se carga completo en el primer uso y luego se pone al día cada
+    USER_FILTER_REFRESH segundos con los usuarios de Id_user mayor al
+    último visto (los creados por otros procesos); create_user agrega los
+    del propio proceso al instante. Un registro hecho en otro proceso
+    dentro de esa ventana no se detecta: si la unicidad debe ser estricta
+    entre procesos, deje USER_FILTER_ENABLED=0.
+    """
+
+    def __init__(self):
+        self._bloom: BloomFilter | None = None
+        self._last_id = 0
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+    def _add_rows(self, rows: list) -> None:
+        for user_id, email, dui, phone_number in rows:
+            for key in _filter_keys(email, dui, phone_number):
+                self._bloom.add(key)
+            self._last_id = max(self._last_id, user_id)
+
+    def load(self) -> None:
+        with get_cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM [user]")
+            total = cursor.fetchone()[0] or 0
+            # Tres claves por usuario, con margen para crecer
+            bloom = BloomFilter(max(3 * total * 2, 30000), USER_FILTER_FP_RATE)
+            cursor.execute("SELECT Id_user, email, DUI, phone_number FROM [user]")
+            with self._lock:
+                self._bloom = bloom
+                self._last_id = 0
+                while rows := cursor.fetchmany(5000):
+                    self._add_rows(rows)
+                self._refreshed_at = time.monotonic()
+        log.info("Filtro de usuarios cargado", users=total, bytes=bloom.nbytes())
+
+    def refresh(self) -> None:
+        if self._bloom is None or self._bloom.is_saturated():
+            self.load()
+            return
+        if time.monotonic() - self._refreshed_at < USER_FILTER_REFRESH:
+            return
+        with get_cursor() as cursor:
+            cursor.execute("SELECT Id_user, email, DUI, phone_number FROM [user] WHERE Id_user > ?",
+                           (self._last_id,))
+            rows = cursor.fetchall()
+        with self._lock:
+            self._add_rows(rows)
+            self._refreshed_at = time.monotonic()
+
+    def add(self, email: str | None, dui: str | None, phone_number: str | None) -> None:
+        if self._bloom is None:
+            return
+        for key in _filter_keys(email, dui, phone_number):
+            self._bloom.add(key)
+
+    def may_contain(self, email: str | None, dui: str | None, phone_number: str | None) -> bool:
+        self.refresh()
+        return any(key in self._bloom for key in _filter_keys(email, dui, phone_number))
+
+
+_user_filter = _UserFilter()
+
+
+def load_user_filter() -> None:
+    """Carga el filtro de existencia por adelantado (p. ej. al iniciar el servidor)."""
+    _user_filter.load()
+
+
+def find_conflicts(email: str | None, dui: str | None, phone_number: str | None = None) -> list[str]:
+    """
+    Verifica en UNA consulta si el email, DUI o teléfono ya están
+    registrados.
+
+    Con USER_FILTER_ENABLED=1, si el filtro de existencia asegura que
+    ninguno de los tres está registrado, no se consulta la base.
+
+    Returns:
+        Campos en conflicto, en orden: 'email', 'DUI', 'phone_number'
+        (lista vacía si no hay ninguno).
+    """
+    fields = (("email", email), ("DUI", dui), ("phone_number", phone_number))
+    checks = [(column, value.strip()) for column, value in fields if value]
+    if not checks:
+        return []
+
+    if USER_FILTER_ENABLED and not _user_filter.may_contain(email, dui, phone_number):
+        log.debug("Registro sin conflictos (filtro)")
+        return []
+
+    where = " OR ".join(f"[{column}] = ?" for column, _ in checks)
+    query = f"SELECT email, DUI, phone_number FROM [user] WHERE {where}"
+
+    with get_cursor() as cursor:
+        cursor.execute(query, tuple(value for _, value in checks))
+        rows = cursor.fetchall()
+
+    def normalize(column: str, value: str | None) -> str:
+        value = (value or "").strip()
+        return value.lower() if column == "email" else value
+
+    # Cada fila puede chocar en uno o varios campos: se compara columna a columna
+    conflicts = [
+        column for index, (column, value) in enumerate(fields)
+        if value and any(normalize(column, row[index]) == normalize(column, value) for row in rows)
+    ]
+
+    log.debug("Verificación de duplicados", conflicts=",".join(conflicts) or "-")
+    return conflicts
+
+
+def get_registered_keys(cursor: Any, emails: list[str], duis: list[str], phone_numbers: list[str],
+                        chunk_size: int = USER_IN_CHUNK) -> tuple[set[str], set[str], set[str]]:
+    """
+    Cuáles de los emails / DUI / teléfonos dados ya están registrados,
+    con el cursor del llamador y consultas IN (...) de a `chunk_size`
+    valores: para verificar un lote completo en pocas consultas.
+
+    Returns:
+        (emails en minúsculas, DUIs, teléfonos) ya registrados.
+    """
+    found: tuple[set[str], set[str], set[str]] = (set(), set(), set())
+    for index, (column, values) in enumerate((("email", emails), ("DUI", duis),
+                                              ("phone_number", phone_numbers))):
+        values = list(dict.fromkeys(v.strip() for v in values if v))
+        for i in range(0, len(values), chunk_size):
+            chunk = values[i:i + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f"SELECT [{column}] FROM [user] WHERE [{column}] IN ({placeholders})", chunk)
+            for (value,) in cursor.fetchall():
+                value = (value or "").strip()
+                found[index].add(value.lower() if column == "email" else value)
+    return found
@@ -1,6 +1,7 @@
 import streamlit as st
 import time
 from models.account_model import get_account_by_user
+from models.balance_model import get_account_balance
 
 # --- CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="Banca en Línea - Synapse", layout="wide")
@@ -47,7 +48,7 @@ if st.sidebar.button("🏧 CAJERO", use_container_width=True):
     st.switch_page("pages/atm_simulator.py")
 
 if menu == "Resumen":
-    balance = 0.0 # Aquí deberás conectar tu servicio de saldo real
+    balance = get_account_balance(account["Id_account"]) if account["Id_account"] else 0.0
     col1, col2 = st.columns(2)
     with col1:
         st.metric("Saldo Disponible", f"$ {balance:,.2f} {account['currency']}")
@@ -8,14 +8,8 @@ import time
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # --- IMPORTACIONES DE LÓGICA ---
-from models.user_model import (
-    create_user, 
-    get_user_by_email, 
-    get_user_by_dui,
-    get_user_by_phone
-)
-from services.account_service import create_account_for_user
-from utils.security import hash_password, verify_password
+from services.auth_service import login
+from services.onboarding_service import onboard_customer
 
 # --- CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="Synapse | Banca Digital", page_icon="🏦", layout="centered")
@@ -170,8 +164,8 @@ with tab_login:
             if not l_email or not l_pass:
                 st.warning("Por favor completa tus datos.")
             else:
-                user = get_user_by_email(l_email)
-                if user and verify_password(l_pass, user[3]):
+                ok, user = login(l_email, l_pass)
+                if ok:
                     st.session_state["logged_in"] = True
                     st.session_state["user_data"] = {
                         "Id_user": user[0], "email": user[2], "full_name": user[6],
@@ -213,16 +207,23 @@ with tab_reg:
                 st.warning("Faltan datos requeridos o formato inválido.")
             else:
                 try:
-                    if get_user_by_email(r_email): 
+                    # Aplicar formato a DUI y Teléfono
+                    dui_f = f"{clean_dui[:8]}-{clean_dui[8:]}" if len(clean_dui) == 9 else clean_dui
+                    tel_f = f"+503 {clean_tel[:4]}-{clean_tel[4:]}" if len(clean_tel) == 8 else clean_tel
+
+                    # Usuario + cuenta en una sola transacción (verifica duplicados)
+                    result = onboard_customer(r_email, dui_f, clean_name, r_gen[0],
+                                              password=r_pass, phone_number=tel_f)
+                    conflicts = result.get("conflicts", [])
+                    if "email" in conflicts: 
                         st.error("Email ya registrado.")
+                    elif "DUI" in conflicts:
+                        st.error("DUI ya registrado.")
+                    elif "phone_number" in conflicts:
+                        st.error("Teléfono ya registrado.")
+                    elif not result["success"]:
+                        st.error(f"Error en el servidor: {result['error']}")
                     else:
-                        # Aplicar formato a DUI y Teléfono
-                        dui_f = f"{clean_dui[:8]}-{clean_dui[8:]}" if len(clean_dui) == 9 else clean_dui
-                        tel_f = f"+503 {clean_tel[:4]}-{clean_tel[4:]}" if len(clean_tel) == 8 else clean_tel
-                        
-                        h = hash_password(r_pass)
-                        u_id = create_user(2, r_email, h, None, dui_f, clean_name, r_gen[0], tel_f)
-                        create_account_for_user(u_id, "USD")
                         st.success("¡Bienvenido a Synapse!")
                         st.balloons()
                         time.sleep(2)
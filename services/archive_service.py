@@ -0,0 +1,156 @@
+"""
+archive_service.py
+Archivado de ledger_entry en segmentos mensuales comprimidos.
+
+Mueve las entradas anteriores al corte (LEDGER_ARCHIVE_AFTER_DAYS, por
+defecto 365 días, redondeado al inicio del mes) a segmentos de
+models.ledger_archive y las borra de la tabla, mes por mes. Solo se
+archivan meses completos, así que cada mes se escribe una sola vez.
+
+Orden por mes: se escribe el segmento (temporal + rename), se borran las
+filas y se hace commit. Si el proceso se corta entre el rename y el
+commit, las filas quedan en ambos lados: los lectores las deduplican y
+la siguiente corrida solo termina de borrarlas.
+
+account_balance no cambia (el saldo no depende de dónde viva la entrada);
+rebuild_account_balances, get_balance_as_of y la conciliación ya leen
+los segmentos.
+
+Uso:
+    python -m services.archive_service [--after-days N]
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Any
+
+from config.database import get_connection
+from config.logger import get_logger
+from models.ledger_archive import archived_entry_ids, write_segment
+
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("LEDGER_ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_FETCH_SIZE = 5000
+
+log = get_logger(__name__, "ARCHIVE")
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(value: datetime) -> datetime:
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def archive_ledger(after_days: int = ARCHIVE_AFTER_DAYS, cutoff: datetime | None = None,
+                   fetch_size: int = ARCHIVE_FETCH_SIZE) -> dict[str, Any]:
+    """
+    Archiva los meses completos anteriores al corte.
+
+    Args:
+        after_days: Antigüedad mínima en días (si no se pasa `cutoff`)
+        cutoff    : Fecha de corte explícita (se redondea al inicio del mes)
+        fetch_size: Filas por fetchmany al leer cada mes
+
+    Returns:
+        dict con 'success', 'months', 'archived' (filas movidas) y
+        'segments' (rutas escritas), o 'error'.
+    """
+    cutoff = _month_start(cutoff or datetime.now() - timedelta(days=after_days))
+    log.info("Archivando entradas", before=f"{cutoff:%Y-%m-%d}")
+
+    conn = None
+    cursor = None
+    months = 0
+    archived = 0
+    segments: list[str] = []
+
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT MIN(created_at) FROM ledger_entry WHERE created_at < ?", (cutoff,))
+        first = cursor.fetchone()[0]
+        if first is None:
+            log.info("Nada que archivar")
+            return {"success": True, "months": 0, "archived": 0, "segments": []}
+        if isinstance(first, str):
+            first = datetime.fromisoformat(first)
+
+        month = _month_start(first)
+        while month < cutoff:
+            end = _next_month(month)
+            label = f"{month:%Y-%m}"
+            already = archived_entry_ids(label)
+            read = 0
+
+            cursor.execute("""
+                SELECT Id_entry, transaction_id, account_id, entry_type, amount, created_at
+                FROM ledger_entry
+                WHERE created_at >= ? AND created_at < ?
+                ORDER BY Id_entry
+            """, (month, end))
+
+            def pending_rows():
+                nonlocal read
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        return
+                    for row in rows:
+                        read += 1
+                        if row[0] not in already:
+                            yield tuple(row)
+
+            written = write_segment(label, pending_rows())
+            if read == 0:
+                month = end
+                continue
+
+            cursor.execute("DELETE FROM ledger_entry WHERE created_at >= ? AND created_at < ?",
+                           (month, end))
+            if cursor.rowcount not in (-1, read):
+                conn.rollback()
+                raise Exception(f"{label}: se leyeron {read} filas pero se borrarían "
+                                f"{cursor.rowcount}; mes no archivado.")
+            conn.commit()
+
+            months += 1
+            archived += read
+            if written:
+                segments.append(written[0])
+            log.info("Mes archivado", month=label, entries=read,
+                     segment=written[0] if written else "ya archivadas")
+            month = end
+
+        log.info("Archivado completado", entries=archived, months=months)
+        return {"success": True, "months": months, "archived": archived, "segments": segments}
+
+    except Exception as e:
+        log.error("Error archivando ledger", error=e)
+        if conn:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+        return {"success": False, "error": str(e), "months": months,
+                "archived": archived, "segments": segments}
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Archivado de ledger_entry")
+    parser.add_argument("--after-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    args = parser.parse_args()
+
+    result = archive_ledger(after_days=args.after_days)
+    sys.exit(0 if result["success"] else 1)
@@ -1,21 +1,21 @@
-import bcrypt
-
+from config.logger import get_logger
 from models.user_model import (
     get_user_by_email,
-    update_last_login
+    update_password_hash
 )
+from services import password_service
+from services.last_login_buffer import record_login
+
+
+log = get_logger(__name__, "AUTH")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
-    Compara contraseña en texto plano con hash almacenado.
+    Compara contraseña en texto plano con hash almacenado (en el pool de
+    procesos de password_service).
     """
-    print("[DEBUG] Verificando contraseña...")
-
-    return bcrypt.checkpw(
-        plain_password.encode("utf-8"),
-        hashed_password.encode("utf-8")
-    )
+    return password_service.verify_password(plain_password, hashed_password)
 
 
 def login(email: str, password: str):
@@ -23,12 +23,11 @@ def login(email: str, password: str):
     Autentica usuario por email.
     """
 
-    print(f"[DEBUG] Intentando login para: {email}")
-
-    user = get_user_by_email(email)
+    # Sin caché: password_hash e is_active deben reflejar la base actual
+    user = get_user_by_email(email, cached=False)
 
     if not user:
-        print("[DEBUG] Usuario no encontrado.")
+        log.debug("Login fallido: usuario no encontrado")
         return False, "Usuario no encontrado"
 
     # ⚠️ IMPORTANTE
@@ -41,14 +40,24 @@ def login(email: str, password: str):
     is_active = user[9]       # ajusta si el orden cambia
 
     if not is_active:
-        print("[DEBUG] Usuario inactivo.")
+        log.debug("Login fallido: usuario inactivo", user_id=user[0])
         return False, "Usuario inactivo"
 
-    if not verify_password(password, password_hash):
-        print("[DEBUG] Contraseña incorrecta.")
+    valid, new_hash = password_service.verify_and_rehash(password, password_hash)
+    if not valid:
+        log.debug("Login fallido: contraseña incorrecta", user_id=user_id)
         return False, "Credenciales incorrectas"
 
-    update_last_login(user_id)
+    if new_hash:
+        # El hash usaba otro factor de trabajo: se reemplaza con el actual
+        try:
+            update_password_hash(user_id, new_hash)
+            log.info("Hash de contraseña actualizado al costo actual", user_id=user_id)
+        except Exception as e:
+            log.warning("No se pudo actualizar el hash", user_id=user_id, error=e)
+
+    # Escritura diferida: el login no espera un commit (last_login_buffer)
+    record_login(user_id)
 
-    print("[DEBUG] Login exitoso.")
+    log.debug("Login exitoso", user_id=user_id)
     return True, user
\ No newline at end of file
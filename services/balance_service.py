@@ -0,0 +1,191 @@
+"""
+balance_service.py
+Mantenimiento de la tabla account_balance.
+
+rebuild_account_balances() recalcula todos los saldos desde ledger_entry
+en una sola pasada: la base agrupa por (cuenta, tipo) y el resultado se
+lee por bloques con fetchmany, así que la memoria depende del número de
+cuentas y no del tamaño del ledger. Las entradas archivadas
+(models.ledger_archive) se suman desde los segmentos de archivo.
+
+Lectura y reescritura van en UNA transacción que empieza con el DELETE de
+account_balance: ese DELETE toma el bloqueo de escritura (SQLite) o los
+bloqueos de página de la tabla (Access) antes de leer el ledger, y todo
+escritor toca account_balance en su propia transacción, así que:
+  - lo confirmado antes del DELETE entra en la suma
+  - lo que intente escribir después espera (SQLite, busy_timeout) o falla
+    con "currently locked" y se revierte entero (Access) hasta el commit
+Ninguna transferencia queda fuera de account_balance. En Access conviene
+correrlo en una ventana de mantenimiento: los escritores concurrentes
+reciben errores de bloqueo mientras dura.
+
+La carga inicial de account_balance es la migración 5 de config.migrations
+(initialize_account_balances): hasta que se aplica, los movimientos no
+escriben en account_balance (la tabla puede no existir) y
+transaction_service no exige fondos suficientes, porque con la tabla vacía
+o incompleta fallaría todo débito.
+
+Uso:
+    python -m services.balance_service rebuild
+"""
+
+import sys
+from datetime import datetime
+from typing import Any
+
+from config.database import get_backend, get_connection
+from config.logger import get_logger
+from config.schema import create_table_sql
+from models.balance_model import BALANCE_TABLE
+from models.ledger_archive import archived_account_totals, get_archive_horizon
+from models.ledger_model import CREDIT, DEBIT
+
+
+REBUILD_FETCH_SIZE = 1000
+REBUILD_WRITE_BATCH = 1000
+
+log = get_logger(__name__, "BALANCE")
+
+
+# ─────────────────────────────────────────────
+# Cálculo y escritura (con el cursor del llamador)
+# ─────────────────────────────────────────────
+
+def compute_account_balances(cursor: Any, fetch_size: int = REBUILD_FETCH_SIZE) -> dict[int, float]:
+    """
+    Saldo por cuenta desde el ledger (y el archivo, si lo hay) en una
+    pasada agregada por la base.
+    """
+    # Lo anterior al horizonte del archivo se toma de los segmentos
+    horizon = get_archive_horizon()
+    balances: dict[int, float] = {}
+    if horizon is None:
+        cursor.execute("""
+            SELECT account_id, entry_type, SUM(amount)
+            FROM ledger_entry
+            GROUP BY account_id, entry_type
+        """)
+    else:
+        balances = {a: cents / 100 for a, cents in archived_account_totals().items()}
+        cursor.execute("""
+            SELECT account_id, entry_type, SUM(amount)
+            FROM ledger_entry
+            WHERE created_at >= ?
+            GROUP BY account_id, entry_type
+        """, (horizon,))
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        for account_id, entry_type, total in rows:
+            total = float(total or 0)
+            if entry_type == CREDIT:
+                balances[account_id] = balances.get(account_id, 0.0) + total
+            elif entry_type == DEBIT:
+                balances[account_id] = balances.get(account_id, 0.0) - total
+    return balances
+
+
+def lock_account_balances(cursor: Any) -> None:
+    """
+    Vacía account_balance dentro de la transacción del llamador. Es el
+    primer paso de un recalculo: bloquea a los escritores hasta el commit
+    (ver docstring del módulo).
+    """
+    cursor.execute("DELETE FROM account_balance")
+
+
+def write_account_balances(cursor: Any, balances: dict[int, float],
+                           write_batch: int = REBUILD_WRITE_BATCH) -> None:
+    """
+    Inserta los saldos en account_balance (sin commit). El llamador ya
+    vació la tabla con lock_account_balances en la misma transacción.
+    """
+    now = datetime.now()
+    rows = [(account_id, round(balance, 2), now) for account_id, balance in balances.items()]
+    sql = "INSERT INTO account_balance (account_id, balance, updated_at) VALUES (?, ?, ?)"
+    for i in range(0, len(rows), write_batch):
+        cursor.executemany(sql, rows[i:i + write_batch])
+
+
+def initialize_account_balances(cursor: Any, backend: Any) -> list[str]:
+    """
+    Migración: crea account_balance si falta y la recalcula desde el
+    ledger. Se reescribe aunque ya tenga filas: las que haya son solo los
+    deltas aplicados desde que existe la tabla, no el saldo completo. El
+    commit lo hace config.migrations.migrate.
+    """
+    if not backend.table_exists(cursor, BALANCE_TABLE):
+        cursor.execute(create_table_sql(BALANCE_TABLE, backend))
+
+    lock_account_balances(cursor)
+    balances = compute_account_balances(cursor)
+    write_account_balances(cursor, balances)
+    log.info("Saldos iniciales cargados", accounts=len(balances))
+    return [BALANCE_TABLE]
+
+
+# ─────────────────────────────────────────────
+# Recalculo completo
+# ─────────────────────────────────────────────
+
+def rebuild_account_balances(fetch_size: int = REBUILD_FETCH_SIZE,
+                             write_batch: int = REBUILD_WRITE_BATCH) -> dict[str, Any]:
+    """
+    Recalcula account_balance a partir de ledger_entry.
+
+    Crea la tabla si no existe (bases Access anteriores a account_balance).
+
+    Returns:
+        dict con 'success', 'accounts' y 'total' (suma de todos los saldos),
+        o 'error'.
+    """
+    log.info("Recalculando saldos desde ledger_entry")
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        backend = get_backend()
+        if not backend.table_exists(cursor, BALANCE_TABLE):
+            cursor.execute(create_table_sql(BALANCE_TABLE, backend))
+            conn.commit()
+
+        # PASO 1: Vaciar la tabla primero: bloquea a los escritores hasta el commit
+        lock_account_balances(cursor)
+
+        # PASO 2: Pasada única sobre el ledger, agregada en la base
+        balances = compute_account_balances(cursor, fetch_size)
+
+        # PASO 3: Reescribir la tabla en la misma transacción
+        write_account_balances(cursor, balances, write_batch)
+        conn.commit()
+
+        total = round(sum(balances.values()), 2)
+        log.info("Saldos recalculados", accounts=len(balances), total=total)
+        return {"success": True, "accounts": len(balances), "total": total}
+
+    except Exception as e:
+        log.error("Error recalculando saldos", error=e)
+        if conn:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+        return {"success": False, "error": str(e)}
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("Uso: python -m services.balance_service rebuild")
+        sys.exit(2)
+    result = rebuild_account_balances()
+    sys.exit(0 if result["success"] else 1)
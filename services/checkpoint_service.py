@@ -0,0 +1,183 @@
+"""
+checkpoint_service.py
+Generación periódica de checkpoints de saldo (balance_checkpoint).
+
+build_daily_checkpoints() recorre ledger_entry en orden cronológico, por
+bloques (fetchmany), llevando el saldo corriente de cada cuenta en un dict.
+Al cruzar cada medianoche guarda un checkpoint para las cuentas que
+tuvieron movimientos ese día. La memoria depende del número de cuentas,
+no del tamaño del ledger.
+
+La misma función sirve de backfill (primera ejecución, sin checkpoints)
+y de job incremental: retoma desde el último día con checkpoints, usando
+el último checkpoint de cada cuenta como saldo inicial. Cada día se
+confirma con su propio commit, así que una ejecución interrumpida se
+puede relanzar sin duplicar checkpoints.
+
+Solo se generan checkpoints para días ya cerrados (antes de hoy).
+
+Uso:
+    python -m services.checkpoint_service
+"""
+
+from datetime import datetime, timedelta
+from typing import Any
+
+from config.database import get_backend, get_connection
+from config.logger import get_logger
+from config.schema import create_table_sql
+from models.checkpoint_model import CHECKPOINT_TABLE, insert_checkpoints
+from models.ledger_archive import archived_account_totals, get_archive_horizon
+from models.ledger_model import CREDIT
+
+
+CHECKPOINT_FETCH_SIZE = 5000
+
+log = get_logger(__name__, "CHECKPOINT")
+
+
+def _start_of_day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _load_starting_point(cursor: Any) -> tuple[datetime | None, dict[int, float]]:
+    """
+    Retorna (último checkpoint_at, saldo por cuenta en ese punto).
+    """
+    cursor.execute("SELECT MAX(checkpoint_at) FROM balance_checkpoint")
+    row = cursor.fetchone()
+    last = row[0] if row else None
+    if last is None:
+        return None, {}
+    if isinstance(last, str):
+        last = datetime.fromisoformat(last)
+
+    cursor.execute("""
+        SELECT c.account_id, c.balance
+        FROM balance_checkpoint AS c
+        INNER JOIN (
+            SELECT account_id, MAX(checkpoint_at) AS last_at
+            FROM balance_checkpoint
+            GROUP BY account_id
+        ) AS x
+        ON c.account_id = x.account_id AND c.checkpoint_at = x.last_at
+    """)
+    return last, {account_id: float(balance) for account_id, balance in cursor.fetchall()}
+
+
+def build_daily_checkpoints(until: datetime | None = None,
+                            fetch_size: int = CHECKPOINT_FETCH_SIZE) -> dict[str, Any]:
+    """
+    Crea los checkpoints diarios que falten hasta `until` (por defecto, la
+    medianoche de hoy).
+
+    Returns:
+        dict con 'success', 'days', 'checkpoints' y 'entries' procesadas,
+        o 'error'.
+    """
+    until = _start_of_day(until or datetime.now())
+
+    read_conn = None
+    write_conn = None
+    read_cursor = None
+    write_cursor = None
+    days = 0
+    written = 0
+    processed = 0
+
+    try:
+        # Lectura y escritura en conexiones separadas: el cursor de lectura
+        # queda abierto mientras se confirman los checkpoints de cada día
+        write_conn = get_connection()
+        write_cursor = write_conn.cursor()
+
+        backend = get_backend()
+        if not backend.table_exists(write_cursor, CHECKPOINT_TABLE):
+            write_cursor.execute(create_table_sql(CHECKPOINT_TABLE, backend))
+            write_conn.commit()
+
+        last, balances = _load_starting_point(write_cursor)
+
+        # Lo anterior al horizonte del archivo ya no está en la tabla: se
+        # parte del saldo archivado y no se generan checkpoints para esos días
+        horizon = get_archive_horizon()
+        if horizon is not None and (last is None or last < horizon):
+            log.info("Entradas archivadas; se parte del saldo archivado", horizon=horizon)
+            last = horizon
+            balances = {a: cents / 100 for a, cents in archived_account_totals().items()}
+        if last is not None and last >= until:
+            log.info("Nada que hacer", last_checkpoint=last)
+            return {"success": True, "days": 0, "checkpoints": 0, "entries": 0}
+
+        log.info("Generando checkpoints", since=last or "inicio", until=until)
+
+        sql = """
+            SELECT account_id, created_at, entry_type, amount
+            FROM ledger_entry
+            WHERE created_at < ?
+        """
+        params: tuple = (until,)
+        if last is not None:
+            sql += " AND created_at >= ?"
+            params += (last,)
+        sql += " ORDER BY created_at, Id_entry"
+
+        read_conn = get_connection()
+        read_cursor = read_conn.cursor()
+        read_cursor.execute(sql, params)
+
+        boundary = None            # medianoche que cierra el día en curso
+        touched: set[int] = set()  # cuentas con movimientos en el día en curso
+
+        def flush_day() -> None:
+            nonlocal days, written
+            if boundary is None or not touched:
+                return
+            written += insert_checkpoints(
+                write_cursor, [(a, boundary, balances[a]) for a in sorted(touched)]
+            )
+            write_conn.commit()
+            days += 1
+            touched.clear()
+
+        while True:
+            rows = read_cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            for account_id, created_at, entry_type, amount in rows:
+                day_end = _start_of_day(created_at) + timedelta(days=1)
+                if day_end != boundary:
+                    flush_day()
+                    boundary = day_end
+                amount = float(amount)
+                balances[account_id] = balances.get(account_id, 0.0) + (
+                    amount if entry_type == CREDIT else -amount
+                )
+                touched.add(account_id)
+                processed += 1
+
+        flush_day()
+
+        log.info("Checkpoints generados", checkpoints=written, days=days, entries=processed)
+        return {"success": True, "days": days, "checkpoints": written, "entries": processed}
+
+    except Exception as e:
+        log.error("Error generando checkpoints", error=e)
+        if write_conn:
+            try:
+                write_conn.rollback()
+            except Exception:
+                pass
+        return {"success": False, "error": str(e), "days": days, "checkpoints": written}
+
+    finally:
+        for resource in (read_cursor, read_conn, write_cursor, write_conn):
+            if resource:
+                resource.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    result = build_daily_checkpoints()
+    sys.exit(0 if result["success"] else 1)
@@ -0,0 +1,324 @@
+"""
+group_commit.py
+Escritor único con "group commit" para el servicio de transacciones.
+
+Con muchas sesiones de Streamlit activas, cada create_transfer abre su
+propia transacción y hace su propio commit, y Access serializa esos
+commits. Este módulo ofrece un hilo escritor que recibe las solicitudes
+de todos los hilos por una cola, agrupa las que llegan dentro de una
+ventana corta y las escribe en UNA transacción con UN commit.
+
+  - Cada llamador recibe un Future con su propio resultado (mismo dict
+    que create_transfer / create_simple_transaction).
+  - Si una solicitud del grupo falla, el grupo se revierte y se reescribe
+    solicitud por solicitud, de modo que solo falla la problemática.
+
+Activación:
+  - TX_GROUP_COMMIT=1 en el entorno, o enable_group_commit() en código.
+  - Con el escritor activo, create_transfer y create_simple_transaction
+    se enrutan por la cola sin cambiar sus firmas.
+
+Configuración: TX_GROUP_COMMIT_WINDOW_MS (por defecto 5) y
+TX_GROUP_COMMIT_MAX_BATCH (por defecto 100). Los llamadores esperan su
+resultado como máximo TX_GROUP_COMMIT_TIMEOUT segundos (por defecto 30).
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any
+
+from config.database import get_connection
+from config.id_allocator import next_ids
+from config.logger import get_logger
+from services.transaction_service import (
+    _write_simple_transaction,
+    _write_transfer,
+    LEDGER_TABLE,
+    TRANSACTION_TABLE,
+)
+
+
+GROUP_COMMIT_ENABLED   = os.getenv("TX_GROUP_COMMIT", "0") == "1"
+GROUP_COMMIT_WINDOW    = float(os.getenv("TX_GROUP_COMMIT_WINDOW_MS", "5")) / 1000
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("TX_GROUP_COMMIT_MAX_BATCH", "100"))
+
+TRANSFER = "transfer"
+SIMPLE   = "simple"
+
+# Entradas de ledger que genera cada tipo de solicitud
+_ENTRIES_PER_KIND = {TRANSFER: 2, SIMPLE: 1}
+
+_STOP = object()
+
+_STOPPED_RESULT = {"success": False, "error": "El escritor de group commit está detenido."}
+
+log = get_logger(__name__, "GROUP_COMMIT")
+
+
+class _WriteRequest:
+    __slots__ = ("kind", "args", "ids", "future")
+
+    def __init__(self, kind: str, args: tuple):
+        self.kind = kind
+        self.args = args
+        self.ids: tuple[int, ...] = ()
+        self.future: Future = Future()
+
+
+class GroupCommitWriter:
+    """
+    Hilo escritor que agrupa solicitudes y hace un commit por grupo.
+    """
+
+    def __init__(self, window: float = GROUP_COMMIT_WINDOW,
+                 max_batch: int = GROUP_COMMIT_MAX_BATCH):
+        if max_batch < 1:
+            raise ValueError("max_batch debe ser al menos 1.")
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests":  0,
+            "groups":    0,
+            "commits":   0,
+            "fallbacks": 0,
+            "failed":    0,
+            "max_group": 0,
+        }
+
+    # ── Ciclo de vida ───────────────────────────────────────────────────
+
+    def start(self) -> "GroupCommitWriter":
+        with self._lock:
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(
+                    target=self._run, name="tx-group-commit", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Procesa lo que quede en la cola y detiene el hilo escritor."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self._queue.put(_STOP)
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                return      # sigue drenando; él resolverá lo encolado
+
+        # Nada puede quedar sin resolver: el llamador espera su Future
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP and not item.future.done():
+                item.future.set_result(dict(_STOPPED_RESULT))
+
+    # ── Solicitudes ─────────────────────────────────────────────────────
+
+    def _submit(self, kind: str, args: tuple) -> Future:
+        request = _WriteRequest(kind, args)
+        # Verificar y encolar bajo el mismo lock que stop(): ninguna
+        # solicitud puede quedar en la cola detrás de _STOP sin dueño
+        with self._lock:
+            if self._running:
+                self._queue.put(request)
+                return request.future
+        request.future.set_result(dict(_STOPPED_RESULT))
+        return request.future
+
+    def submit_transfer(self, from_account_id: int, to_account_id: int,
+                        amount: float, description: str, created_by_user_id: int,
+                        transaction_type_id: int = 1, status_id: int = 1) -> Future:
+        """Encola una transferencia ya validada. El Future resuelve al dict de resultado."""
+        return self._submit(TRANSFER, (
+            from_account_id, to_account_id, amount, description,
+            created_by_user_id, transaction_type_id, status_id,
+        ))
+
+    def submit_simple_transaction(self, account_id: int, amount: float, entry_type: str,
+                                  description: str, created_by_user_id: int,
+                                  transaction_type_id: int = 2, status_id: int = 1) -> Future:
+        """Encola una transacción simple ya validada. El Future resuelve al dict de resultado."""
+        return self._submit(SIMPLE, (
+            account_id, amount, entry_type, description,
+            created_by_user_id, transaction_type_id, status_id,
+        ))
+
+    def stats(self) -> dict[str, Any]:
+        """Copia de los contadores (solicitudes, grupos, commits, reintentos...)."""
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["pending"] = self._queue.qsize()
+        snapshot["avg_group"] = (
+            snapshot["requests"] / snapshot["groups"] if snapshot["groups"] else 0.0
+        )
+        return snapshot
+
+    # ── Hilo escritor ───────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+
+            group = [first]
+            deadline = time.monotonic() + self.window
+            while len(group) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                group.append(item)
+
+            self._process(group)
+
+        # Drenar lo que haya quedado encolado al detenerse
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftovers.append(item)
+        for i in range(0, len(leftovers), self.max_batch):
+            self._process(leftovers[i:i + self.max_batch])
+
+    @staticmethod
+    def _apply(cursor: Any, request: _WriteRequest) -> dict[str, Any]:
+        if request.kind == TRANSFER:
+            return _write_transfer(cursor, request.ids, *request.args)
+        return _write_simple_transaction(cursor, request.ids, *request.args)
+
+    def _assign_ids(self, group: list[_WriteRequest]) -> None:
+        """Reserva los IDs de todo el grupo en dos idas a la base."""
+        tx_ids = next_ids(TRANSACTION_TABLE, len(group))
+        entry_ids = iter(next_ids(
+            LEDGER_TABLE, sum(_ENTRIES_PER_KIND[r.kind] for r in group)
+        ))
+        for request, tx_id in zip(group, tx_ids):
+            entries = tuple(next(entry_ids) for _ in range(_ENTRIES_PER_KIND[request.kind]))
+            request.ids = (tx_id, *entries)
+
+    def _process(self, group: list[_WriteRequest]) -> None:
+        with self._lock:
+            self._stats["requests"] += len(group)
+            self._stats["groups"] += 1
+            self._stats["max_group"] = max(self._stats["max_group"], len(group))
+
+        conn = None
+        cursor = None
+        try:
+            self._assign_ids(group)
+            conn = get_connection()
+            cursor = conn.cursor()
+
+            try:
+                results = [self._apply(cursor, request) for request in group]
+                conn.commit()
+                with self._lock:
+                    self._stats["commits"] += 1
+                for request, result in zip(group, results):
+                    request.future.set_result(result)
+                log.debug("Grupo confirmado con un commit", requests=len(group))
+                return
+
+            except Exception as e:
+                conn.rollback()
+                log.warning("Grupo fallido; reintentando una por una", requests=len(group), error=e)
+                with self._lock:
+                    self._stats["fallbacks"] += 1
+
+            # Reintento individual: una solicitud mala no arrastra al resto
+            for request in group:
+                try:
+                    result = self._apply(cursor, request)
+                    conn.commit()
+                    with self._lock:
+                        self._stats["commits"] += 1
+                    request.future.set_result(result)
+                except Exception as e:
+                    conn.rollback()
+                    with self._lock:
+                        self._stats["failed"] += 1
+                    request.future.set_result({"success": False, "error": str(e)})
+
+        except Exception as e:
+            log.error("Error procesando grupo", requests=len(group), error=e)
+            for request in group:
+                if not request.future.done():
+                    with self._lock:
+                        self._stats["failed"] += 1
+                    request.future.set_result({"success": False, "error": str(e)})
+
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+
+_writer: GroupCommitWriter | None = None
+_writer_lock = threading.Lock()
+_env_checked = False
+
+
+def enable_group_commit(window: float | None = None,
+                        max_batch: int | None = None) -> GroupCommitWriter:
+    """
+    Arranca el escritor global; desde ahí create_transfer y
+    create_simple_transaction pasan por la cola.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = GroupCommitWriter(
+                window=GROUP_COMMIT_WINDOW if window is None else window,
+                max_batch=GROUP_COMMIT_MAX_BATCH if max_batch is None else max_batch,
+            ).start()
+        return _writer
+
+
+def disable_group_commit(timeout: float | None = None) -> None:
+    """Detiene el escritor global tras escribir lo pendiente."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop(timeout)
+
+
+def get_group_writer() -> GroupCommitWriter | None:
+    """
+    Retorna el escritor global si está activo, o None.
+    La primera llamada lo arranca si TX_GROUP_COMMIT=1.
+    """
+    global _env_checked
+    if not _env_checked:
+        _env_checked = True
+        if GROUP_COMMIT_ENABLED:
+            return enable_group_commit()
+    return _writer
+
+
+atexit.register(disable_group_commit)
@@ -0,0 +1,247 @@
+"""
+last_login_buffer.py
+Escritura diferida (write-behind) de la fecha de último login.
+
+login() ya no hace UPDATE + commit en el camino crítico: record_login()
+anota (user_id, fecha) en memoria y un hilo de fondo escribe cada
+LAST_LOGIN_FLUSH_SECONDS todos los pendientes con
+user_model.update_last_logins (un lote, un commit). Varios logins del
+mismo usuario dentro del intervalo se reducen al más reciente.
+
+Durabilidad (LAST_LOGIN_DURABILITY):
+  - memory : solo memoria; se escribe al apagar (atexit). Un corte
+             abrupto pierde, como máximo, un intervalo de fechas.
+  - journal: además, cada login se agrega a LAST_LOGIN_JOURNAL antes de
+             retornar; al arrancar se reaplica lo que haya quedado.
+             Sobrevive a la caída del proceso (al menos una vez).
+  - fsync  : como journal, con fsync por login; sobrevive también a un
+             corte de energía, a costa de una escritura a disco por login.
+
+Reaplicar es seguro: update_last_logins nunca retrocede una fecha. El
+diario es por proceso: con varios procesos, dé a cada uno su propia ruta.
+
+Activación: LAST_LOGIN_WRITE_BEHIND=1 (por defecto). Con 0, record_login
+hace el UPDATE síncrono de siempre (update_last_login).
+"""
+
+import atexit
+import os
+import threading
+from datetime import datetime
+from typing import Any
+
+from config.logger import get_logger
+from models.user_model import update_last_login, update_last_logins
+
+
+WRITE_BEHIND_ENABLED = os.getenv("LAST_LOGIN_WRITE_BEHIND", "1") == "1"
+FLUSH_INTERVAL       = float(os.getenv("LAST_LOGIN_FLUSH_SECONDS", "5"))
+DURABILITY           = os.getenv("LAST_LOGIN_DURABILITY", "memory").lower()
+JOURNAL_PATH         = os.getenv("LAST_LOGIN_JOURNAL", "last_login.journal")
+
+DURABILITY_MODES = ("memory", "journal", "fsync")
+
+log = get_logger(__name__, "LAST_LOGIN")
+
+
+class LastLoginBuffer:
+    """
+    Últimos logins pendientes {user_id: fecha} y el hilo que los escribe.
+    """
+
+    def __init__(self, interval: float = FLUSH_INTERVAL, durability: str = DURABILITY,
+                 journal_path: str = JOURNAL_PATH):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability debe ser uno de {DURABILITY_MODES}.")
+        if interval <= 0:
+            raise ValueError("interval debe ser mayor a cero.")
+        self.interval = interval
+        self.durability = durability
+        self.journal_path = journal_path
+        self._pending: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._journal = None
+        self._thread: threading.Thread | None = None
+        self._running = False
+        self._stats = {"recorded": 0, "flushes": 0, "written": 0, "failures": 0}
+
+    # ── Ciclo de vida ───────────────────────────────────────────────────
+
+    def start(self) -> "LastLoginBuffer":
+        with self._lock:
+            if self._running:
+                return self
+            if self.durability != "memory":
+                self._replay_journal()
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="last-login-flush", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Detiene el hilo y escribe lo pendiente."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            thread = self._thread
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    # ── Registro ────────────────────────────────────────────────────────
+
+    def record(self, user_id: int, at: datetime | None = None) -> None:
+        """Anota un login. No toca la base."""
+        at = at or datetime.now()
+        with self._lock:
+            previous = self._pending.get(user_id)
+            if previous is None or at > previous:
+                self._pending[user_id] = at
+            self._stats["recorded"] += 1
+            if self._journal is not None:
+                self._journal.write(f"{user_id}\t{at.isoformat()}\n")
+                self._journal.flush()
+                if self.durability == "fsync":
+                    os.fsync(self._journal.fileno())
+
+    def flush(self) -> int:
+        """
+        Escribe los pendientes en un lote. Si falla, vuelven a quedar
+        pendientes para el siguiente intervalo.
+
+        Returns:
+            Usuarios escritos.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            try:
+                written = update_last_logins(batch)
+            except Exception as e:
+                with self._lock:
+                    for user_id, at in batch.items():
+                        if user_id not in self._pending or at > self._pending[user_id]:
+                            self._pending[user_id] = at
+                    self._stats["failures"] += 1
+                log.warning("No se pudo escribir el lote de últimos logins",
+                            users=len(batch), error=e)
+                return 0
+
+            with self._lock:
+                self._stats["flushes"] += 1
+                self._stats["written"] += written
+                if self._journal is not None:
+                    self._compact_journal()
+            log.debug("Lote de últimos logins escrito", users=written)
+            return written
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["pending"] = len(self._pending)
+        return snapshot
+
+    # ── Diario ──────────────────────────────────────────────────────────
+
+    def _replay_journal(self) -> None:
+        """Carga los logins que quedaron en el diario de una corrida anterior."""
+        if not os.path.exists(self.journal_path):
+            return
+        replayed = 0
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    user_id, at = line.rstrip("\n").split("\t")
+                    user_id, at = int(user_id), datetime.fromisoformat(at)
+                except ValueError:
+                    continue  # línea cortada por una caída a mitad de escritura
+                if user_id not in self._pending or at > self._pending[user_id]:
+                    self._pending[user_id] = at
+                replayed += 1
+        if replayed:
+            log.info("Últimos logins recuperados del diario", entries=replayed,
+                     users=len(self._pending))
+
+    def _compact_journal(self) -> None:
+        """
+        Reescribe el diario con solo lo que sigue pendiente (lo registrado
+        mientras se escribía el lote). Se llama con self._lock tomado.
+        """
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for user_id, at in self._pending.items():
+                f.write(f"{user_id}\t{at.isoformat()}\n")
+            f.flush()
+            if self.durability == "fsync":
+                os.fsync(f.fileno())
+        self._journal.close()
+        os.replace(tmp, self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    # ── Hilo ────────────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        while self._running:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._running:
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                log.error("Error en el hilo de últimos logins", error=e)
+
+
+_buffer: LastLoginBuffer | None = None
+_buffer_lock = threading.Lock()
+
+
+def get_last_login_buffer() -> LastLoginBuffer | None:
+    """
+    Buffer global (se arranca en el primer uso), o None si
+    LAST_LOGIN_WRITE_BEHIND=0.
+    """
+    global _buffer
+    if not WRITE_BEHIND_ENABLED:
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = LastLoginBuffer().start()
+    return _buffer
+
+
+def record_login(user_id: int) -> None:
+    """
+    Registra el último login del usuario: en el buffer si está activo, o
+    con un UPDATE síncrono si no.
+    """
+    buffer = get_last_login_buffer()
+    if buffer is None:
+        update_last_login(user_id)
+    else:
+        buffer.record(user_id)
+
+
+def shutdown_last_login_buffer(timeout: float | None = None) -> None:
+    """Detiene el buffer global tras escribir lo pendiente."""
+    global _buffer
+    with _buffer_lock:
+        buffer, _buffer = _buffer, None
+    if buffer is not None:
+        buffer.stop(timeout)
+
+
+atexit.register(shutdown_last_login_buffer)
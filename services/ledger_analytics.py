@@ -0,0 +1,330 @@
+"""
+ledger_analytics.py
+Analítica vectorizada (NumPy) sobre ledger_entry.
+
+El cierre de mes calculaba volúmenes diarios, flujo neto por cuenta y
+cuentas más activas recorriendo dicts fila por fila. Aquí el ledger se
+carga por bloques (fetchmany) en arreglos NumPy por columna y todos los
+agregados se calculan con operaciones vectorizadas (argsort, reduceat,
+cumsum), sin bucles de Python por fila.
+
+Columnas cargadas (LedgerArrays):
+  - account_id          : int64
+  - transaction_type_id : int64 (JOIN con [transaction])
+  - day                 : datetime64[D], día de created_at
+  - is_credit           : bool
+  - cents               : int64, monto en centavos
+
+Las entradas anteriores al horizonte del archivo (models.ledger_archive)
+se leen de los segmentos; el tipo de su transacción sale de [transaction],
+que no se archiva.
+
+Los montos se agregan como enteros (centavos, int64), así que los totales
+coinciden exactamente con una suma fila por fila.
+
+Uso:
+    python -m services.ledger_analytics [--verify] [--top N]
+"""
+
+import itertools
+import time
+from datetime import datetime
+from typing import Any, Iterator
+
+import numpy as np
+
+from config.database import get_cursor
+from models.ledger_archive import get_archive_horizon, iter_archived_records
+from models.ledger_model import CREDIT
+
+
+ANALYTICS_CHUNK_SIZE = 50000
+
+
+class LedgerArrays:
+    """
+    Columnas del ledger como arreglos NumPy paralelos.
+    """
+
+    __slots__ = ("account_id", "transaction_type_id", "day", "is_credit", "cents")
+
+    def __init__(self, account_id: np.ndarray, transaction_type_id: np.ndarray,
+                 day: np.ndarray, is_credit: np.ndarray, cents: np.ndarray):
+        self.account_id = account_id
+        self.transaction_type_id = transaction_type_id
+        self.day = day
+        self.is_credit = is_credit
+        self.cents = cents
+
+    def __len__(self) -> int:
+        return len(self.cents)
+
+    @property
+    def signed_cents(self) -> np.ndarray:
+        """Monto con signo: créditos positivos, débitos negativos."""
+        return np.where(self.is_credit, self.cents, -self.cents)
+
+
+def _chunk_to_arrays(rows: list) -> tuple[np.ndarray, ...]:
+    """Convierte un bloque de filas del cursor en columnas NumPy."""
+    account_id, type_id, created_at, entry_type, amount = zip(*rows)
+    return (
+        np.array(account_id, dtype=np.int64),
+        np.array(type_id, dtype=np.int64),
+        np.array(created_at, dtype="datetime64[us]").astype("datetime64[D]"),
+        np.array(entry_type, dtype=object) == CREDIT,
+        np.rint(np.array(amount, dtype=np.float64) * 100).astype(np.int64),
+    )
+
+
+def _archived_chunks(cursor: Any, since: datetime | None, until: datetime,
+                     chunk_size: int) -> Iterator[tuple[np.ndarray, ...]]:
+    """
+    Bloques de columnas de las entradas archivadas con since <= created_at
+    < until. Como el INNER JOIN de la tabla, se omiten las entradas cuya
+    transacción ya no existe.
+    """
+    records = iter_archived_records(since, until)
+    while chunk := list(itertools.islice(records, chunk_size)):
+        entry_ids, tx_ids, account_ids, codes, cents, at_us = (np.array(c, dtype=np.int64)
+                                                               for c in zip(*chunk))
+        cursor.execute(
+            "SELECT Id_transaction, transaction_type_id FROM [transaction] "
+            "WHERE Id_transaction BETWEEN ? AND ?",
+            (int(tx_ids.min()), int(tx_ids.max())),
+        )
+        types = dict(cursor.fetchall())
+        type_ids = np.array([types.get(int(t), -1) for t in tx_ids], dtype=np.int64)
+        keep = type_ids >= 0
+        yield (
+            account_ids[keep],
+            type_ids[keep],
+            at_us[keep].astype("datetime64[us]").astype("datetime64[D]"),
+            codes[keep] == 1,
+            cents[keep],
+        )
+
+
+def load_ledger_arrays(since: datetime | None = None, until: datetime | None = None,
+                       chunk_size: int = ANALYTICS_CHUNK_SIZE) -> LedgerArrays:
+    """
+    Carga ledger_entry (con el tipo de su transacción) en un LedgerArrays,
+    incluidas las entradas archivadas del rango.
+
+    Args:
+        since     : Solo entradas con created_at >= since (opcional)
+        until     : Solo entradas con created_at < until (opcional)
+        chunk_size: Filas por fetchmany
+
+    Esta función abre su propia conexión (operación de lectura, no transaccional).
+    """
+    chunks: list[tuple[np.ndarray, ...]] = []
+    with get_cursor() as cursor:
+        horizon = get_archive_horizon()
+        if horizon is not None and (since is None or since < horizon):
+            chunks.extend(_archived_chunks(cursor, since,
+                                           horizon if until is None else min(until, horizon),
+                                           chunk_size))
+            since = horizon if since is None else max(since, horizon)
+        if until is None or since is None or since < until:
+            chunks.extend(_table_chunks(cursor, since, until, chunk_size))
+
+    if not chunks:
+        return LedgerArrays(np.empty(0, np.int64), np.empty(0, np.int64),
+                            np.empty(0, "datetime64[D]"), np.empty(0, bool),
+                            np.empty(0, np.int64))
+
+    columns = [np.concatenate(parts) for parts in zip(*chunks)]
+    return LedgerArrays(*columns)
+
+
+def _table_chunks(cursor: Any, since: datetime | None, until: datetime | None,
+                  chunk_size: int) -> Iterator[tuple[np.ndarray, ...]]:
+    """Bloques de columnas de ledger_entry con since <= created_at < until."""
+    sql = """
+        SELECT l.account_id, t.transaction_type_id, l.created_at, l.entry_type, l.amount
+        FROM ledger_entry AS l
+        INNER JOIN [transaction] AS t ON l.transaction_id = t.Id_transaction
+    """
+    conditions: list[str] = []
+    params: tuple = ()
+    if since is not None:
+        conditions.append("l.created_at >= ?")
+        params += (since,)
+    if until is not None:
+        conditions.append("l.created_at < ?")
+        params += (until,)
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+
+    cursor.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield _chunk_to_arrays(rows)
+
+
+# ─────────────────────────────────────────────
+# Agregados
+# ─────────────────────────────────────────────
+
+def _group_sums(keys: np.ndarray, data: LedgerArrays) -> tuple[np.ndarray, ...]:
+    """
+    Agrupa por `keys` y retorna (claves únicas, débitos, créditos, cantidad),
+    montos en centavos int64.
+    """
+    if not len(keys):
+        empty = np.empty(0, np.int64)
+        return keys[:0], empty, empty, empty
+
+    # Ordenar por clave y sumar cada tramo con reduceat: todo en int64
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+    is_credit = data.is_credit[order]
+    cents = data.cents[order]
+    zero = np.zeros_like(cents)
+    credit = np.add.reduceat(np.where(is_credit, cents, zero), starts)
+    debit = np.add.reduceat(np.where(is_credit, zero, cents), starts)
+    count = np.diff(np.append(starts, len(keys)))
+    return sorted_keys[starts], debit, credit, count
+
+
+def daily_volumes(data: LedgerArrays) -> list[dict[str, Any]]:
+    """
+    Volumen de débitos y créditos por día, con el neto acumulado (cumsum).
+    """
+    days, debit, credit, count = _group_sums(data.day, data)
+    running = np.cumsum(credit - debit)
+    return [
+        {"day": str(days[i]), "debit_cents": int(debit[i]), "credit_cents": int(credit[i]),
+         "entries": int(count[i]), "running_net_cents": int(running[i])}
+        for i in range(len(days))
+    ]
+
+
+def account_totals(data: LedgerArrays) -> dict[int, dict[str, int]]:
+    """
+    Débitos, créditos, flujo neto y cantidad de entradas por cuenta.
+    """
+    accounts, debit, credit, count = _group_sums(data.account_id, data)
+    return {
+        int(accounts[i]): {"debit_cents": int(debit[i]), "credit_cents": int(credit[i]),
+                           "net_cents": int(credit[i] - debit[i]), "entries": int(count[i])}
+        for i in range(len(accounts))
+    }
+
+
+def type_totals(data: LedgerArrays) -> dict[int, dict[str, int]]:
+    """
+    Débitos, créditos y cantidad de entradas por transaction_type_id.
+    """
+    types, debit, credit, count = _group_sums(data.transaction_type_id, data)
+    return {
+        int(types[i]): {"debit_cents": int(debit[i]), "credit_cents": int(credit[i]),
+                        "entries": int(count[i])}
+        for i in range(len(types))
+    }
+
+
+def top_accounts(data: LedgerArrays, n: int = 10, by: str = "entries") -> list[dict[str, int]]:
+    """
+    Las `n` cuentas más activas, por cantidad de entradas ('entries') o
+    por volumen movido ('volume', débitos + créditos).
+    """
+    if by not in ("entries", "volume"):
+        raise ValueError("by debe ser 'entries' o 'volume'.")
+
+    accounts, debit, credit, count = _group_sums(data.account_id, data)
+    metric = count if by == "entries" else debit + credit
+    # Orden descendente por métrica; empates por account_id ascendente
+    order = np.lexsort((accounts, -metric))[:n]
+    return [
+        {"account_id": int(accounts[i]), "entries": int(count[i]),
+         "volume_cents": int(debit[i] + credit[i])}
+        for i in order
+    ]
+
+
+def summarize(data: LedgerArrays, top_n: int = 10) -> dict[str, Any]:
+    """Todos los agregados en un solo dict."""
+    return {
+        "entries": len(data),
+        "daily": daily_volumes(data),
+        "accounts": account_totals(data),
+        "types": type_totals(data),
+        "top_accounts": top_accounts(data, top_n),
+    }
+
+
+# ─────────────────────────────────────────────
+# Referencia fila por fila (verificación)
+# ─────────────────────────────────────────────
+
+def reference_summary(data: LedgerArrays) -> dict[str, Any]:
+    """
+    Mismos agregados diarios, por cuenta y por tipo calculados con un bucle
+    de Python por fila. Solo para verificar los resultados vectorizados.
+    """
+    daily: dict[str, list[int]] = {}
+    accounts: dict[int, list[int]] = {}
+    types: dict[int, list[int]] = {}
+
+    for account_id, type_id, day, is_credit, cents in zip(
+            data.account_id.tolist(), data.transaction_type_id.tolist(),
+            data.day.astype(str).tolist(), data.is_credit.tolist(), data.cents.tolist()):
+        for table, key in ((daily, day), (accounts, account_id), (types, type_id)):
+            totals = table.setdefault(key, [0, 0, 0])
+            totals[1 if is_credit else 0] += cents
+            totals[2] += 1
+
+    running = 0
+    daily_rows = []
+    for day in sorted(daily):
+        debit, credit, count = daily[day]
+        running += credit - debit
+        daily_rows.append({"day": day, "debit_cents": debit, "credit_cents": credit,
+                           "entries": count, "running_net_cents": running})
+
+    return {
+        "entries": len(data),
+        "daily": daily_rows,
+        "accounts": {a: {"debit_cents": d, "credit_cents": c, "net_cents": c - d, "entries": n}
+                     for a, (d, c, n) in accounts.items()},
+        "types": {t: {"debit_cents": d, "credit_cents": c, "entries": n}
+                  for t, (d, c, n) in types.items()},
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Analítica vectorizada del ledger")
+    parser.add_argument("--verify", action="store_true",
+                        help="Compara contra la referencia fila por fila")
+    parser.add_argument("--top", type=int, default=10, help="Cuentas más activas a mostrar")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    arrays = load_ledger_arrays()
+    loaded = time.perf_counter()
+    summary = summarize(arrays, args.top)
+    done = time.perf_counter()
+
+    rate = len(arrays) / (done - loaded) if done > loaded else 0.0
+    print(f"[ANALYTICS] {len(arrays)} entradas: carga {loaded - start:.2f}s, "
+          f"agregados {done - loaded:.3f}s ({rate:,.0f} entradas/s)")
+    for row in summary["daily"]:
+        print(f"[ANALYTICS] {row['day']}  débitos={row['debit_cents'] / 100:.2f}  "
+              f"créditos={row['credit_cents'] / 100:.2f}  neto acumulado={row['running_net_cents'] / 100:.2f}")
+    for row in summary["top_accounts"]:
+        print(f"[ANALYTICS] cuenta={row['account_id']}  entradas={row['entries']}  "
+              f"volumen={row['volume_cents'] / 100:.2f}")
+
+    if args.verify:
+        reference = reference_summary(arrays)
+        ok = all(summary[key] == reference[key] for key in ("daily", "accounts", "types"))
+        print(f"[ANALYTICS] {'✅' if ok else '❌'} Verificación contra referencia")
+        sys.exit(0 if ok else 1)
@@ -0,0 +1,316 @@
+"""
+onboarding_service.py
+Alta de clientes: usuario + cuenta en una sola conexión y transacción.
+
+ARQUITECTURA (igual que transaction_service):
+  - Todo lo que puede hacerse fuera de la transacción va antes: validar,
+    verificar duplicados, hashear la contraseña (pool de password_service)
+    y reservar el número de cuenta (config.id_allocator)
+  - Una conexión, una transacción: INSERT del usuario, su ID con
+    @@IDENTITY en la misma conexión, INSERT de la cuenta, un commit
+  - Si algo falla, rollback: nunca queda un usuario sin cuenta
+
+onboard_customers_bulk() recibe un flujo de registros (migraciones de
+sucursal, carga de datos de prueba) y lo procesa por lotes sobre una sola
+conexión: un commit por lote, contraseñas hasheadas en paralelo y
+duplicados verificados con unas pocas consultas IN por lote.
+
+Campos de un registro (dict):
+  email, dui, full_name, gender                       obligatorios
+  password (se hashea) o password_hash (ya hasheado)  uno de los dos
+  phone_number, nit                                   opcionales
+  role_id (por defecto 2), currency (por defecto USD), is_active (True)
+"""
+
+import itertools
+from typing import Any, Iterable
+
+from config.database import get_connection
+from config.logger import get_logger
+from models.account_model import accounts_created, generate_account_numbers, insert_accounts
+from models.user_model import find_conflicts, get_registered_keys, insert_user, insert_users, user_created
+from services import password_service
+
+
+log = get_logger(__name__, "ONBOARDING")
+
+# Registros por commit en onboard_customers_bulk
+ONBOARD_BATCH_SIZE = 200
+
+DEFAULT_ROLE_ID  = 2
+DEFAULT_CURRENCY = "USD"
+
+_REQUIRED_FIELDS = ("email", "dui", "full_name", "gender")
+
+
+# ─────────────────────────────────────────────
+# Helpers internos
+# ─────────────────────────────────────────────
+
+def _validate_customer(record: dict[str, Any]) -> dict[str, Any]:
+    """
+    Normaliza y valida un registro de cliente.
+
+    Raises:
+        ValueError: Si falta un campo obligatorio o la contraseña.
+    """
+    data = dict(record)
+    for field in ("email", "dui", "phone_number", "nit"):
+        if isinstance(data.get(field), str):
+            data[field] = data[field].strip() or None
+
+    missing = [f for f in _REQUIRED_FIELDS if not data.get(f)]
+    if missing:
+        raise ValueError(f"Faltan campos: {', '.join(missing)}.")
+    if not data.get("password") and not data.get("password_hash"):
+        raise ValueError("Falta la contraseña (password o password_hash).")
+
+    data.setdefault("phone_number", None)
+    data.setdefault("nit", None)
+    data["role_id"] = data.get("role_id") or DEFAULT_ROLE_ID
+    data["currency"] = data.get("currency") or DEFAULT_CURRENCY
+    data["is_active"] = data.get("is_active", True)
+    return data
+
+
+def _conflict_error(conflicts: list[str]) -> str:
+    return f"Ya registrado: {', '.join(conflicts)}."
+
+
+def _write_customers(cursor: Any, batch: list[tuple[int, dict[str, Any]]]) -> dict[int, dict[str, Any]]:
+    """
+    Inserta un lote de clientes ya validados, con hash y número de cuenta,
+    sin hacer commit: usuarios con un executemany (insert_users) y cuentas
+    con otro.
+
+    Returns:
+        dict índice_de_fila → resultado de la fila
+    """
+    rows = [(data["role_id"], data["email"], data["password_hash"], data["nit"], data["dui"],
+             data["full_name"], data["gender"], data["phone_number"], data["is_active"])
+            for _, data in batch]
+    user_ids = [insert_user(cursor, *rows[0])] if len(rows) == 1 else insert_users(cursor, rows)
+
+    written = {}
+    accounts = []
+    for (index, data), user_id in zip(batch, user_ids):
+        accounts.append((user_id, data["account_number"], data["currency"]))
+        written[index] = {
+            "row": index,
+            "success": True,
+            "user_id": user_id,
+            "account_number": data["account_number"],
+        }
+    insert_accounts(cursor, accounts)
+    return written
+
+
+def _after_commit(batch: list[tuple[int, dict[str, Any]]], written: dict[int, dict[str, Any]]) -> None:
+    for index, data in batch:
+        if index in written:
+            user_created(data["email"], data["dui"], data["phone_number"])
+    accounts_created(*(result["user_id"] for result in written.values()))
+
+
+# ─────────────────────────────────────────────
+# Servicio principal - Alta individual
+# ─────────────────────────────────────────────
+
+def onboard_customer(email: str, dui: str, full_name: str, gender: str,
+                     password: str | None = None, password_hash: str | None = None,
+                     phone_number: str | None = None, nit: str | None = None,
+                     role_id: int = DEFAULT_ROLE_ID, currency: str = DEFAULT_CURRENCY,
+                     check_conflicts: bool = True) -> dict[str, Any]:
+    """
+    Crea el usuario y su cuenta en una sola transacción.
+
+    Returns:
+        dict con 'success' y 'user_id' + 'account_number', o 'error' (y
+        'conflicts' si el email / DUI / teléfono ya estaban registrados).
+    """
+    try:
+        data = _validate_customer({
+            "email": email, "dui": dui, "full_name": full_name, "gender": gender,
+            "password": password, "password_hash": password_hash,
+            "phone_number": phone_number, "nit": nit,
+            "role_id": role_id, "currency": currency,
+        })
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+
+    conn = None
+    cursor = None
+    try:
+        if check_conflicts:
+            conflicts = find_conflicts(data["email"], data["dui"], data["phone_number"])
+            if conflicts:
+                return {"success": False, "error": _conflict_error(conflicts), "conflicts": conflicts}
+
+        # Fuera de la transacción: hash (pool de procesos) y número de cuenta
+        if not data.get("password_hash"):
+            data["password_hash"] = password_service.hash_password(data["password"])
+        data["account_number"] = generate_account_numbers(1)[0]
+
+        conn = get_connection()
+        cursor = conn.cursor()
+        written = _write_customers(cursor, [(0, data)])
+        conn.commit()
+
+        _after_commit([(0, data)], written)
+        result = written[0]
+        log.info("Cliente dado de alta", user_id=result["user_id"])
+        return {"success": True, "user_id": result["user_id"], "account_number": result["account_number"]}
+
+    except Exception as e:
+        if conn:
+            try:
+                conn.rollback()
+            except Exception as rollback_err:
+                log.error("Error en rollback", error=rollback_err)
+        log.error("Error en alta de cliente", error=e)
+        return {"success": False, "error": str(e)}
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
+# ─────────────────────────────────────────────
+# Servicio principal - Alta masiva
+# ─────────────────────────────────────────────
+
+def _prepare_batch(cursor: Any, rows: list[tuple[int, Any]], results: dict[int, dict[str, Any]],
+                   seen: tuple[set[str], set[str], set[str]],
+                   check_conflicts: bool) -> list[tuple[int, dict[str, Any]]]:
+    """
+    Valida, descarta duplicados (contra la base y contra el propio flujo),
+    hashea contraseñas en paralelo y reserva números de cuenta.
+    """
+    valid = []
+    for index, record in rows:
+        try:
+            valid.append((index, _validate_customer(record)))
+        except (ValueError, TypeError) as e:
+            results[index] = {"row": index, "success": False, "error": str(e)}
+
+    if check_conflicts and valid:
+        registered = get_registered_keys(cursor, [d["email"] for _, d in valid],
+                                         [d["dui"] for _, d in valid],
+                                         [d["phone_number"] for _, d in valid])
+        unique = []
+        for index, data in valid:
+            keys = (data["email"].lower(), data["dui"], data["phone_number"])
+            conflicts = [field for field, key, known, batch_seen in
+                         zip(("email", "DUI", "phone_number"), keys, registered, seen)
+                         if key and (key in known or key in batch_seen)]
+            if conflicts:
+                results[index] = {"row": index, "success": False,
+                                  "error": _conflict_error(conflicts), "conflicts": conflicts}
+                continue
+            for key, batch_seen in zip(keys, seen):
+                if key:
+                    batch_seen.add(key)
+            unique.append((index, data))
+        valid = unique
+
+    if not valid:
+        return []
+
+    # Contraseñas en paralelo en el pool de procesos
+    pending = [data for _, data in valid if not data.get("password_hash")]
+    for data, hashed in zip(pending, password_service.hash_passwords([d["password"] for d in pending])):
+        data["password_hash"] = hashed
+
+    for (_, data), number in zip(valid, generate_account_numbers(len(valid))):
+        data["account_number"] = number
+    return valid
+
+
+def onboard_customers_bulk(customers: Iterable[dict[str, Any]], batch_size: int = ONBOARD_BATCH_SIZE,
+                           check_conflicts: bool = True) -> dict[str, Any]:
+    """
+    Da de alta muchos clientes sobre una sola conexión, con un commit por
+    lote. El flujo se consume de a `batch_size` registros, así que puede
+    ser un generador de cualquier tamaño.
+
+    Semántica de fallos (igual que create_transfers_bulk sin
+    all_or_nothing): los registros inválidos o duplicados se reportan y
+    se omiten; si un lote falla en la base se revierte y sus registros se
+    reintentan uno a uno. Un usuario nunca queda sin su cuenta.
+
+    Returns:
+        dict con 'success', 'total', 'succeeded', 'failed', 'batches' y
+        'results': una entrada por registro, en orden, con 'row',
+        'success' y 'user_id' + 'account_number' o 'error'.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size debe ser al menos 1.")
+
+    results: dict[int, dict[str, Any]] = {}
+    seen: tuple[set[str], set[str], set[str]] = (set(), set(), set())
+    batches = 0
+    total = 0
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        stream = enumerate(customers)
+        while rows := list(itertools.islice(stream, batch_size)):
+            total += len(rows)
+            batch = _prepare_batch(cursor, rows, results, seen, check_conflicts)
+            if not batch:
+                continue
+
+            try:
+                written = _write_customers(cursor, batch)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                log.warning("Lote fallido; reintentando registro por registro", error=e)
+                written = {}
+                for index, data in batch:
+                    try:
+                        written.update(_write_customers(cursor, [(index, data)]))
+                        conn.commit()
+                    except Exception as row_err:
+                        conn.rollback()
+                        results[index] = {"row": index, "success": False, "error": str(row_err)}
+
+            _after_commit(batch, written)
+            results.update(written)
+            batches += 1
+            log.debug("Lote de altas confirmado", batch=batches, customers=len(written))
+
+    except Exception as e:
+        log.error("Error en alta masiva", error=e)
+        if conn:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+        for index in range(total):
+            results.setdefault(index, {"row": index, "success": False, "error": str(e)})
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+    ordered = [results.get(i, {"row": i, "success": False, "error": "No procesado."}) for i in range(total)]
+    succeeded = sum(1 for r in ordered if r["success"])
+    log.info("Alta masiva completada", total=total, succeeded=succeeded,
+             failed=total - succeeded, batches=batches)
+    return {
+        "success": succeeded == total,
+        "total": total,
+        "succeeded": succeeded,
+        "failed": total - succeeded,
+        "batches": batches,
+        "results": ordered,
+    }
@@ -0,0 +1,319 @@
+"""
+password_service.py
+Hash y verificación de contraseñas bcrypt en un pool de procesos.
+
+bcrypt cuesta decenas a cientos de milisegundos de CPU por llamada. Hecho
+en el hilo del script de Streamlit, una ráfaga de logins frena a todas las
+demás sesiones del servidor. Este módulo envía hash_password y
+verify_password de utils.security a un ProcessPoolExecutor acotado:
+
+  - API síncrona: hash_password(), hash_passwords() (lote en paralelo),
+    verify_password(), verify_and_rehash() (bloquean solo al hilo que llama)
+  - API asíncrona: hash_password_async(), verify_password_async(),
+    verify_and_rehash_async() (para código asyncio)
+
+Rehash: verify_and_rehash() retorna además un hash nuevo cuando la
+contraseña es correcta y el hash guardado usa un factor de trabajo
+distinto a BCRYPT_ROUNDS; el llamador lo guarda (auth_service.login lo
+hace con update_password_hash).
+
+Configuración:
+  - PASSWORD_POOL_WORKERS     procesos del pool (por defecto, núcleos
+                              disponibles); 0 = ejecutar en el hilo actual
+  - PASSWORD_POOL_MAX_PENDING solicitudes en vuelo como máximo (por
+                              defecto 4 por proceso); las demás esperan
+  - BCRYPT_ROUNDS             factor de trabajo (utils.security)
+
+Benchmark (logins por segundo según tamaño del pool y costo):
+    python -m services.password_service --workers 1,2,4 --rounds 10,12 --logins 64
+"""
+
+import asyncio
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+from config.logger import get_logger
+from utils import security
+
+
+PASSWORD_POOL_WORKERS     = int(os.getenv("PASSWORD_POOL_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_POOL_MAX_PENDING = int(os.getenv("PASSWORD_POOL_MAX_PENDING",
+                                          str(max(PASSWORD_POOL_WORKERS, 1) * 4)))
+
+log = get_logger(__name__, "PASSWORD")
+
+
+# ─────────────────────────────────────────────
+# Trabajo en el proceso hijo
+# ─────────────────────────────────────────────
+
+def _verify_and_rehash(password: str, stored_hash: str, rounds: int) -> tuple[bool, str | None]:
+    if not security.verify_password(password, stored_hash):
+        return False, None
+    if security.needs_rehash(stored_hash, rounds):
+        return True, security.hash_password(password, rounds)
+    return True, None
+
+
+# ─────────────────────────────────────────────
+# Pool
+# ─────────────────────────────────────────────
+
+class PasswordHasher:
+    """
+    Pool de procesos para bcrypt con un límite de solicitudes en vuelo.
+    """
+
+    def __init__(self, workers: int = PASSWORD_POOL_WORKERS,
+                 max_pending: int = PASSWORD_POOL_MAX_PENDING,
+                 rounds: int | None = None):
+        if workers < 0:
+            raise ValueError("workers no puede ser negativo.")
+        self.workers = workers
+        self.rounds = rounds or security.BCRYPT_ROUNDS
+        self._slots = threading.BoundedSemaphore(max(max_pending, 1))
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: los hijos no heredan hilos ni conexiones del servidor
+                context = multiprocessing.get_context("spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                log.debug("Pool de hash iniciado", workers=self.workers, rounds=self.rounds)
+            return self._pool
+
+    def _reset_pool(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Envía `fn(*args)` al pool y retorna su Future. Bloquea mientras haya
+        max_pending solicitudes en vuelo.
+        """
+        if self.workers == 0:
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self._slots.acquire()
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BrokenProcessPool:
+            # Un hijo murió (p. ej. por memoria): se recrea el pool una vez
+            log.warning("Pool de hash roto; se recrea")
+            self._reset_pool()
+            try:
+                future = self._get_pool().submit(fn, *args)
+            except Exception:
+                self._slots.release()
+                raise
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Ejecuta `fn(*args)` en el pool y espera el resultado. Si el pool se
+        rompe, se recrea para la próxima llamada y esta se resuelve en el
+        hilo actual: un login nunca falla por el pool.
+        """
+        try:
+            return self.submit(fn, *args).result()
+        except BrokenProcessPool:
+            log.warning("Pool de hash roto; se ejecuta en el hilo actual")
+            self._reset_pool()
+            return fn(*args)
+
+    def close(self) -> None:
+        self._reset_pool()
+
+    # ── API síncrona ──────────────────────────
+
+    def hash_password(self, password: str) -> str:
+        if not password:
+            raise ValueError("La contraseña no puede estar vacía.")
+        return self.run(security.hash_password, password, self.rounds)
+
+    def hash_passwords(self, passwords: list[str]) -> list[str]:
+        """Hashea varias contraseñas en paralelo (cargas masivas)."""
+        if not all(passwords):
+            raise ValueError("La contraseña no puede estar vacía.")
+        futures = [self.submit(security.hash_password, p, self.rounds) for p in passwords]
+        try:
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            log.warning("Pool de hash roto; se ejecuta en el hilo actual")
+            self._reset_pool()
+            return [security.hash_password(p, self.rounds) for p in passwords]
+
+    def verify_password(self, password: str, stored_hash: str) -> bool:
+        if not password or not stored_hash:
+            return False
+        return self.run(security.verify_password, password, stored_hash)
+
+    def verify_and_rehash(self, password: str, stored_hash: str) -> tuple[bool, str | None]:
+        """
+        Retorna (válida, hash_nuevo). hash_nuevo no es None solo si la
+        contraseña es válida y el hash guardado usa otro factor de trabajo.
+        """
+        if not password or not stored_hash:
+            return False, None
+        return self.run(_verify_and_rehash, password, stored_hash, self.rounds)
+
+    # ── API asíncrona ─────────────────────────
+
+    async def hash_password_async(self, password: str) -> str:
+        if not password:
+            raise ValueError("La contraseña no puede estar vacía.")
+        return await self._await(security.hash_password, password, self.rounds)
+
+    async def verify_password_async(self, password: str, stored_hash: str) -> bool:
+        if not password or not stored_hash:
+            return False
+        return await self._await(security.verify_password, password, stored_hash)
+
+    async def verify_and_rehash_async(self, password: str, stored_hash: str) -> tuple[bool, str | None]:
+        if not password or not stored_hash:
+            return False, None
+        return await self._await(_verify_and_rehash, password, stored_hash, self.rounds)
+
+    async def _await(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # submit() puede bloquear por el límite de solicitudes: fuera del loop
+        loop = asyncio.get_running_loop()
+        future = await loop.run_in_executor(None, self.submit, fn, *args)
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            log.warning("Pool de hash roto; se ejecuta en el hilo actual")
+            self._reset_pool()
+            return await loop.run_in_executor(None, fn, *args)
+
+
+# ─────────────────────────────────────────────
+# Instancia compartida del proceso
+# ─────────────────────────────────────────────
+
+_hasher: PasswordHasher | None = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+                atexit.register(_hasher.close)
+    return _hasher
+
+
+def hash_password(password: str) -> str:
+    return get_password_hasher().hash_password(password)
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    return get_password_hasher().hash_passwords(passwords)
+
+
+def verify_password(password: str, stored_hash: str) -> bool:
+    return get_password_hasher().verify_password(password, stored_hash)
+
+
+def verify_and_rehash(password: str, stored_hash: str) -> tuple[bool, str | None]:
+    return get_password_hasher().verify_and_rehash(password, stored_hash)
+
+
+async def hash_password_async(password: str) -> str:
+    return await get_password_hasher().hash_password_async(password)
+
+
+async def verify_password_async(password: str, stored_hash: str) -> bool:
+    return await get_password_hasher().verify_password_async(password, stored_hash)
+
+
+async def verify_and_rehash_async(password: str, stored_hash: str) -> tuple[bool, str | None]:
+    return await get_password_hasher().verify_and_rehash_async(password, stored_hash)
+
+
+# ─────────────────────────────────────────────
+# Benchmark
+# ─────────────────────────────────────────────
+
+def benchmark(workers: list[int], rounds: list[int], logins: int = 32,
+              clients: int = 16) -> list[dict[str, Any]]:
+    """
+    Logins por segundo (verificación de contraseña correcta) para cada
+    combinación de tamaño de pool y factor de trabajo. `clients` hilos
+    llaman a verify_password a la vez, como sesiones concurrentes.
+    """
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    results = []
+    for cost in rounds:
+        stored = security.hash_password("benchmark-password", cost)
+        for size in workers:
+            hasher = PasswordHasher(workers=size, rounds=cost)
+            try:
+                # Calentamiento: arranque de los procesos hijos
+                for warmup in [hasher.submit(security.verify_password, "x", stored)
+                               for _ in range(max(size, 1))]:
+                    warmup.result()
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=clients) as callers:
+                    ok = list(callers.map(lambda _: hasher.verify_password("benchmark-password", stored),
+                                          range(logins)))
+                elapsed = time.perf_counter() - start
+            finally:
+                hasher.close()
+            if not all(ok):
+                raise Exception("La verificación falló durante el benchmark.")
+            results.append({
+                "workers": size,
+                "rounds": cost,
+                "logins": logins,
+                "elapsed": round(elapsed, 3),
+                "logins_per_second": round(logins / elapsed, 2),
+                "ms_per_login": round(elapsed * 1000 / logins, 2),
+            })
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Benchmark del pool de hash de contraseñas")
+    parser.add_argument("--workers", default="0,1,2,4",
+                        help="Tamaños de pool separados por coma (0 = en el hilo)")
+    parser.add_argument("--rounds", default=str(security.BCRYPT_ROUNDS),
+                        help="Factores de trabajo separados por coma")
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--json", help="Archivo donde guardar los resultados")
+    args = parser.parse_args()
+
+    results = benchmark([int(w) for w in args.workers.split(",")],
+                        [int(r) for r in args.rounds.split(",")],
+                        logins=args.logins, clients=args.clients)
+    print(f"{'rounds':>6} {'workers':>7} {'logins/s':>9} {'ms/login':>9}")
+    for r in results:
+        print(f"{r['rounds']:>6} {r['workers']:>7} {r['logins_per_second']:>9} {r['ms_per_login']:>9}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,360 @@
+"""
+reconciliation_service.py
+Conciliación de partida doble sobre ledger_entry, en paralelo.
+
+Divide el rango de IDs de transacción en particiones y verifica cada una
+en un proceso distinto (ProcessPoolExecutor). Cada partición hace unas
+pocas consultas acotadas por rango de IDs, en lugar de una sola consulta
+secuencial sobre todo el ledger que bloquee el archivo de Access.
+
+Invariantes verificados por transacción:
+  - orphan_transaction : transacción sin ninguna entrada de ledger
+  - orphan_entry       : entrada cuyo transaction_id no existe
+  - invalid_entry      : monto <= 0 o entry_type distinto de debit/credit
+  - unbalanced         : con más de una entrada, débitos != créditos
+  - incomplete_transfer: transacción de tipo transferencia sin débito o
+                         sin crédito (RECON_TRANSFER_TYPES, por defecto 1)
+
+Corridas incrementales: el estado (RECON_STATE_PATH) guarda la marca de
+agua como FECHA: se verifica todo el rango de IDs que contiene alguna
+transacción o entrada con fecha >= la marca. No se usa el ID porque se
+reservan por bloques (config.id_allocator): un proceso con un bloque
+anterior confirma IDs menores a otros ya confirmados, pero con la fecha
+del momento en que escribe. La marca avanza hasta el inicio de la corrida
+menos RECON_SETTLE_SECONDS (ninguna transacción de escritura debe durar
+más que eso) y nunca más allá de la primera discrepancia abierta, para
+que siga reportándose hasta corregirla.
+
+Uso:
+    python -m services.reconciliation_service [--full] [--workers N]
+                                               [--partition-size N] [--report archivo.json]
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any
+
+from config.database import get_cursor
+from config.logger import get_logger
+from models.ledger_archive import get_archive_horizon, iter_archived_transaction_range
+from models.ledger_model import CREDIT, DEBIT
+
+
+RECON_WORKERS        = int(os.getenv("RECON_WORKERS", str(os.cpu_count() or 2)))
+RECON_PARTITION_SIZE = int(os.getenv("RECON_PARTITION_SIZE", "10000"))
+RECON_SETTLE_SECONDS = int(os.getenv("RECON_SETTLE_SECONDS", "300"))
+RECON_STATE_PATH     = os.getenv("RECON_STATE_PATH", "reconciliation_state.json")
+RECON_REPORT_PATH    = os.getenv("RECON_REPORT_PATH", "reconciliation_report.json")
+RECON_TRANSFER_TYPES = frozenset(
+    int(t) for t in os.getenv("RECON_TRANSFER_TYPES", "1").split(",") if t.strip()
+)
+
+log = get_logger(__name__, "RECON")
+
+
+# ─────────────────────────────────────────────
+# Verificación de una partición (corre en un proceso hijo)
+# ─────────────────────────────────────────────
+
+def _cents(amount: Any) -> int:
+    return int(round(float(amount or 0) * 100))
+
+
+def check_partition(low: int, high: int) -> dict[str, Any]:
+    """
+    Verifica los invariantes de las transacciones con low <= Id <= high.
+
+    Returns:
+        dict con 'low', 'high', 'transactions', 'entries', 'elapsed' y
+        'discrepancies' (lista de dicts con 'kind' y 'transaction_id').
+    """
+    start = time.perf_counter()
+    discrepancies: list[dict[str, Any]] = []
+
+    # Con archivo, la tabla aporta solo lo posterior al horizonte
+    horizon = get_archive_horizon()
+    hot_filter = " AND created_at >= ?" if horizon is not None else ""
+    hot_params = (low, high, horizon) if horizon is not None else (low, high)
+
+    with get_cursor() as cursor:
+        cursor.execute("""
+            SELECT Id_transaction, transaction_type_id
+            FROM [transaction]
+            WHERE Id_transaction BETWEEN ? AND ?
+        """, (low, high))
+        types = {tx_id: type_id for tx_id, type_id in cursor.fetchall()}
+
+        # Totales por (transacción, tipo de entrada)
+        cursor.execute(f"""
+            SELECT transaction_id, entry_type, COUNT(*), SUM(amount)
+            FROM ledger_entry
+            WHERE transaction_id BETWEEN ? AND ?{hot_filter}
+            GROUP BY transaction_id, entry_type
+        """, hot_params)
+        totals: dict[int, dict[str, tuple[int, int]]] = {}
+        entries = 0
+        for tx_id, entry_type, count, amount in cursor.fetchall():
+            totals.setdefault(tx_id, {})[entry_type] = (count, _cents(amount))
+            entries += count
+
+        cursor.execute(f"""
+            SELECT Id_entry, transaction_id, entry_type, amount
+            FROM ledger_entry
+            WHERE transaction_id BETWEEN ? AND ?{hot_filter}
+              AND (amount <= 0 OR entry_type NOT IN ('{DEBIT}', '{CREDIT}'))
+        """, hot_params)
+        for entry_id, tx_id, entry_type, amount in cursor.fetchall():
+            discrepancies.append({"kind": "invalid_entry", "transaction_id": tx_id,
+                                  "entry_id": entry_id, "entry_type": entry_type,
+                                  "amount": float(amount)})
+
+    if horizon is not None:
+        for e in iter_archived_transaction_range(low, high):
+            by_type = totals.setdefault(e["transaction_id"], {})
+            count, cents = by_type.get(e["entry_type"], (0, 0))
+            by_type[e["entry_type"]] = (count + 1, cents + _cents(e["amount"]))
+            entries += 1
+            if e["amount"] <= 0:
+                discrepancies.append({"kind": "invalid_entry", "transaction_id": e["transaction_id"],
+                                      "entry_id": e["Id_entry"], "entry_type": e["entry_type"],
+                                      "amount": e["amount"]})
+
+    for tx_id in sorted(types.keys() - totals.keys()):
+        discrepancies.append({"kind": "orphan_transaction", "transaction_id": tx_id})
+
+    for tx_id in sorted(totals):
+        by_type = totals[tx_id]
+        count = sum(c for c, _ in by_type.values())
+        if tx_id not in types:
+            discrepancies.append({"kind": "orphan_entry", "transaction_id": tx_id,
+                                  "entries": count})
+            continue
+
+        debit = by_type.get(DEBIT, (0, 0))[1]
+        credit = by_type.get(CREDIT, (0, 0))[1]
+        if types[tx_id] in RECON_TRANSFER_TYPES and (DEBIT not in by_type or CREDIT not in by_type):
+            discrepancies.append({"kind": "incomplete_transfer", "transaction_id": tx_id,
+                                  "debit": debit / 100, "credit": credit / 100})
+        elif count > 1 and debit != credit:
+            discrepancies.append({"kind": "unbalanced", "transaction_id": tx_id,
+                                  "debit": debit / 100, "credit": credit / 100})
+
+    return {"low": low, "high": high, "transactions": len(types), "entries": entries,
+            "elapsed": time.perf_counter() - start, "discrepancies": discrepancies}
+
+
+# ─────────────────────────────────────────────
+# Marca de agua
+# ─────────────────────────────────────────────
+
+# Transacciones por consulta IN al fechar discrepancias
+RECON_IN_CHUNK = 500
+
+
+def _as_datetime(value: Any) -> datetime | None:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def load_watermark(path: str = RECON_STATE_PATH) -> datetime | None:
+    """
+    Fecha desde la que verificar (None si no hay estado: corrida completa).
+    Un estado con la marca por ID (formato anterior) también da None.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            watermark = json.load(f).get("watermark")
+    except FileNotFoundError:
+        return None
+    if watermark is None:
+        return None
+    if not isinstance(watermark, str):
+        log.info("Estado con marca por ID (formato anterior); se verifica todo el ledger")
+        return None
+    return datetime.fromisoformat(watermark)
+
+
+def save_watermark(watermark: datetime | None, path: str = RECON_STATE_PATH) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"watermark": watermark.isoformat(sep=" ") if watermark else None,
+                   "updated_at": datetime.now().isoformat(sep=" ")}, f)
+    os.replace(tmp, path)
+
+
+def _load_bounds(since: datetime | None) -> tuple[int, int]:
+    """
+    Retorna (primer, último) ID de transacción a verificar: el rango que
+    contiene toda transacción o entrada con fecha >= since (todo el ledger
+    si since es None). (1, 0) si no hay nada.
+    """
+    tx_sql = "SELECT MIN(Id_transaction), MAX(Id_transaction) FROM [transaction]"
+    entry_sql = "SELECT MIN(transaction_id), MAX(transaction_id) FROM ledger_entry"
+    params: tuple = ()
+    if since is not None:
+        tx_sql += " WHERE transaction_date >= ?"
+        entry_sql += " WHERE created_at >= ?"
+        params = (since,)
+
+    with get_cursor() as cursor:
+        cursor.execute(tx_sql, params)
+        tx_min, tx_max = cursor.fetchone()
+        cursor.execute(entry_sql, params)
+        entry_min, entry_max = cursor.fetchone()
+
+    lows = [v for v in (tx_min, entry_min) if v is not None]
+    highs = [v for v in (tx_max, entry_max) if v is not None]
+    if not lows:
+        return 1, 0
+    return min(lows), max(highs)
+
+
+def _earliest_date(transaction_ids: list[int]) -> datetime | None:
+    """
+    Fecha más antigua entre las transacciones dadas y sus entradas (None si
+    ninguna tiene fecha en la base, p. ej. entradas ya archivadas).
+    """
+    dates: list[datetime] = []
+    with get_cursor() as cursor:
+        for i in range(0, len(transaction_ids), RECON_IN_CHUNK):
+            chunk = transaction_ids[i:i + RECON_IN_CHUNK]
+            marks = ", ".join("?" * len(chunk))
+            cursor.execute(f"SELECT MIN(transaction_date) FROM [transaction] "
+                           f"WHERE Id_transaction IN ({marks})", chunk)
+            dates.append(cursor.fetchone()[0])
+            cursor.execute(f"SELECT MIN(created_at) FROM ledger_entry "
+                           f"WHERE transaction_id IN ({marks})", chunk)
+            dates.append(cursor.fetchone()[0])
+    found = [_as_datetime(d) for d in dates if d is not None]
+    return min(found) if found else None
+
+
+# ─────────────────────────────────────────────
+# Servicio principal
+# ─────────────────────────────────────────────
+
+def reconcile(full: bool = False, workers: int = RECON_WORKERS,
+              partition_size: int = RECON_PARTITION_SIZE,
+              report_path: str | None = RECON_REPORT_PATH,
+              state_path: str = RECON_STATE_PATH) -> dict[str, Any]:
+    """
+    Ejecuta la conciliación y escribe el reporte JSON.
+
+    Args:
+        full          : Ignora la marca de agua y verifica todo el ledger
+        workers       : Procesos en paralelo (1 = en el proceso actual)
+        partition_size: IDs de transacción por partición
+        report_path   : Archivo del reporte JSON (None para no escribirlo)
+        state_path    : Archivo con la marca de agua
+
+    Returns:
+        dict con 'success' y el reporte ('discrepancies', 'summary',
+        'watermark'), o 'error'.
+    """
+    if partition_size <= 0:
+        return {"success": False, "error": "partition_size debe ser mayor a cero."}
+
+    started_at = datetime.now()
+    start = time.perf_counter()
+
+    try:
+        watermark = None if full else load_watermark(state_path)
+        low, high = _load_bounds(watermark)
+        partitions = [(lo, min(lo + partition_size - 1, high))
+                      for lo in range(low, high + 1, partition_size)]
+
+        log.info("Verificando transacciones", low=low, high=high, partitions=len(partitions),
+                 workers=workers, watermark=watermark)
+
+        if workers <= 1 or len(partitions) <= 1:
+            results = [check_partition(lo, hi) for lo, hi in partitions]
+        else:
+            # spawn: los hijos no heredan el pool de conexiones del padre
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                results = list(pool.map(check_partition, *zip(*partitions)))
+
+    except Exception as e:
+        log.error("Error en la conciliación", error=e)
+        return {"success": False, "error": str(e)}
+
+    elapsed = time.perf_counter() - start
+    discrepancies = [d for r in results for d in r["discrepancies"]]
+    transactions = sum(r["transactions"] for r in results)
+    entries = sum(r["entries"] for r in results)
+
+    # Todo lo fechado antes de esto ya estaba confirmado al empezar la corrida
+    new_watermark = started_at - timedelta(seconds=RECON_SETTLE_SECONDS)
+    if discrepancies:
+        try:
+            first_open = _earliest_date(sorted({d["transaction_id"] for d in discrepancies}))
+        except Exception as e:
+            log.warning("No se pudo fechar las discrepancias", error=e)
+            first_open = None
+        new_watermark = min(new_watermark, first_open) if first_open else watermark
+    if watermark is not None and (new_watermark is None or new_watermark < watermark):
+        new_watermark = watermark
+
+    summary = {
+        "started_at": started_at.isoformat(sep=" "),
+        "range": [low, high],
+        "partitions": len(partitions),
+        "workers": workers,
+        "transactions": transactions,
+        "entries": entries,
+        "elapsed": round(elapsed, 3),
+        "transactions_per_second": round(transactions / elapsed, 1) if elapsed else 0.0,
+        "entries_per_second": round(entries / elapsed, 1) if elapsed else 0.0,
+        "partition_elapsed_max": round(max((r["elapsed"] for r in results), default=0.0), 3),
+        "discrepancies_by_kind": {},
+    }
+    for d in discrepancies:
+        kinds = summary["discrepancies_by_kind"]
+        kinds[d["kind"]] = kinds.get(d["kind"], 0) + 1
+
+    report = {"summary": summary,
+              "watermark": {"previous": watermark.isoformat(sep=" ") if watermark else None,
+                            "current": new_watermark.isoformat(sep=" ") if new_watermark else None},
+              "discrepancies": discrepancies}
+
+    try:
+        if report_path:
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        save_watermark(new_watermark, state_path)
+    except Exception as e:
+        log.error("Error guardando reporte/estado", error=e)
+        return {"success": False, "error": str(e), **report}
+
+    log.info("Conciliación completada", transactions=transactions, entries=entries,
+             elapsed=f"{elapsed:.2f}s", entries_per_second=summary["entries_per_second"])
+    if discrepancies:
+        log.warning("Discrepancias encontradas", count=len(discrepancies),
+                    **summary["discrepancies_by_kind"])
+    log.info("Marca de agua actualizada", previous=report["watermark"]["previous"],
+             current=report["watermark"]["current"])
+
+    return {"success": True, **report}
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Conciliación de partida doble del ledger")
+    parser.add_argument("--full", action="store_true", help="Ignora la marca de agua")
+    parser.add_argument("--workers", type=int, default=RECON_WORKERS)
+    parser.add_argument("--partition-size", type=int, default=RECON_PARTITION_SIZE)
+    parser.add_argument("--report", default=RECON_REPORT_PATH)
+    args = parser.parse_args()
+
+    result = reconcile(full=args.full, workers=args.workers,
+                       partition_size=args.partition_size, report_path=args.report)
+    if not result["success"]:
+        sys.exit(2)
+    sys.exit(1 if result["discrepancies"] else 0)
@@ -0,0 +1,94 @@
+"""
+statement_service.py
+Exportación de estados de cuenta a CSV o JSONL.
+
+Se apoya en ledger_model.stream_ledger_entries: las entradas se leen por
+páginas y se escriben al archivo a medida que llegan, así que exportar
+una cuenta con cientos de miles de movimientos usa memoria constante.
+
+Uso:
+    python -m services.statement_service <account_id> <archivo.csv|.jsonl>
+"""
+
+import csv
+import json
+import os
+from datetime import datetime
+from typing import Any
+
+from config.logger import get_logger
+from models.ledger_model import LEDGER_PAGE_SIZE, stream_ledger_entries
+
+
+STATEMENT_FIELDS = ("Id_entry", "transaction_id", "account_id", "entry_type", "amount", "created_at")
+STATEMENT_FORMATS = ("csv", "jsonl")
+
+log = get_logger(__name__, "STATEMENT")
+
+
+def _to_plain(value: Any) -> Any:
+    """Convierte fechas y decimales a tipos serializables."""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if value is not None and not isinstance(value, (int, float, str)):
+        return float(value)
+    return value
+
+
+def export_statement(account_id: int, path: str, fmt: str | None = None,
+                     since: datetime | None = None, until: datetime | None = None,
+                     page_size: int = LEDGER_PAGE_SIZE) -> dict[str, Any]:
+    """
+    Escribe el estado de cuenta de `account_id` en `path`.
+
+    Args:
+        account_id: Cuenta a exportar
+        path      : Archivo destino
+        fmt       : 'csv' o 'jsonl' (por defecto, según la extensión)
+        since     : Solo entradas con created_at >= since (opcional)
+        until     : Solo entradas con created_at < until (opcional)
+        page_size : Filas por página de lectura
+
+    Returns:
+        dict con 'success', 'rows' y 'path', o 'error'.
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in STATEMENT_FORMATS:
+        return {"success": False, "error": f"Formato no soportado: '{fmt}'. "
+                                           f"Opciones: {', '.join(STATEMENT_FORMATS)}."}
+
+    log.info("Exportando estado de cuenta", account=account_id, path=path, fmt=fmt)
+
+    rows = 0
+    try:
+        entries = stream_ledger_entries(account_id, since=since, until=until, page_size=page_size)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(STATEMENT_FIELDS)
+                for entry in entries:
+                    writer.writerow([_to_plain(entry[k]) for k in STATEMENT_FIELDS])
+                    rows += 1
+            else:
+                for entry in entries:
+                    f.write(json.dumps({k: _to_plain(entry[k]) for k in STATEMENT_FIELDS},
+                                       ensure_ascii=False))
+                    f.write("\n")
+                    rows += 1
+
+    except Exception as e:
+        log.error("Error exportando estado de cuenta", account=account_id, error=e)
+        return {"success": False, "error": str(e), "rows": rows}
+
+    log.info("Estado de cuenta exportado", account=account_id, rows=rows)
+    return {"success": True, "rows": rows, "path": path}
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        print("Uso: python -m services.statement_service <account_id> <archivo.csv|.jsonl>")
+        sys.exit(2)
+    result = export_statement(int(sys.argv[1]), sys.argv[2])
+    sys.exit(0 if result["success"] else 1)
@@ -10,6 +10,12 @@ ARQUITECTURA DE ATOMICIDAD:
   - Un único commit() al final si todo es exitoso
   - rollback() si algo falla
   - Los modelos NUNCA abren/cierran conexiones
+  - La conexión sale del pool de config.database; conn.close() la devuelve
+  - Los IDs de transacción y de ledger se reservan ANTES de abrir la
+    transacción (config.id_allocator): no hay SELECT @@IDENTITY
+  - Cada entrada actualiza account_balance en la misma transacción; los
+    débitos fallan por fondos insuficientes salvo TX_ALLOW_OVERDRAFT=1 o
+    mientras account_balance no se haya cargado (migración 5)
 
 Modelo ledger doble:
   - Transferencia entre cuentas → 2 entradas (débito origen, crédito destino)
@@ -18,9 +24,17 @@ Modelo ledger doble:
 """
 
 from config.database import get_connection
-from models.ledger_model import create_ledger_entry, DEBIT, CREDIT
+from config.id_allocator import next_id, next_ids
+from config.logger import get_logger
+from models.balance_model import balances_initialized
+from models.ledger_model import create_ledger_entry, create_ledger_entries, DEBIT, CREDIT, LEDGER_TABLE
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterable
+import os
+
+
+log = get_logger(__name__, "TX_SERVICE")
 
 
 # ─────────────────────────────────────────────
@@ -29,13 +43,39 @@ from typing import Any
 ENTRY_DEBIT  = DEBIT
 ENTRY_CREDIT = CREDIT
 
+TRANSACTION_TABLE = "transaction"
+
+# Permitir débitos que dejen la cuenta en negativo
+ALLOW_OVERDRAFT = os.getenv("TX_ALLOW_OVERDRAFT", "0") == "1"
+
+# Segundos máximos de espera por el resultado del escritor de group commit
+GROUP_COMMIT_TIMEOUT = float(os.getenv("TX_GROUP_COMMIT_TIMEOUT", "30"))
+
+# Filas por commit en create_transfers_bulk
+BULK_BATCH_SIZE = 500
+
+# Orden de campos aceptado cuando una fila de transferencia es una tupla
+TRANSFER_FIELDS = (
+    "from_account_id", "to_account_id", "amount", "description",
+    "created_by_user_id", "transaction_type_id", "status_id",
+)
+
 
 # ─────────────────────────────────────────────
 # Helpers internos
 # ─────────────────────────────────────────────
 
+def _allow_overdraft(cursor: Any) -> bool:
+    """
+    Sin la carga inicial de account_balance los saldos están incompletos y
+    todo débito fallaría; hasta entonces no se exigen fondos.
+    """
+    return ALLOW_OVERDRAFT or not balances_initialized(cursor)
+
+
 def _insert_transaction(cursor: Any, transaction_type_id: int, status_id: int,
-                         description: str, created_by_user_id: int) -> int:
+                         description: str, created_by_user_id: int,
+                         transaction_id: int | None = None) -> int:
     """
     Inserta el registro principal en la tabla transaction y retorna su ID.
     
@@ -48,26 +88,162 @@ def _insert_transaction(cursor: Any, transaction_type_id: int, status_id: int,
         status_id          : FK a transaction_status
         description        : Descripción de la operación
         created_by_user_id : Usuario que ejecuta la operación
+        transaction_id     : Id_transaction ya reservado (opcional)
 
     Returns:
         ID de la transacción creada.
     """
+    if transaction_id is None:
+        transaction_id = next_id(TRANSACTION_TABLE)
+
     sql = """
         INSERT INTO [transaction]
-            (transaction_type_id, status_id, description, created_by_user_id, transaction_date, processed_at)
-        VALUES (?, ?, ?, ?, ?, ?)
+            (Id_transaction, transaction_type_id, status_id, description, created_by_user_id, transaction_date, processed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
     """
     now = datetime.now()
-    cursor.execute(sql, (transaction_type_id, status_id, description, created_by_user_id, now, now))
-    
-    cursor.execute("SELECT @@IDENTITY")
-    result = cursor.fetchone()
-    if result is None or result[0] is None:
-        raise Exception("No se pudo obtener el ID de la transacción creada.")
-    
-    tx_id = int(result[0])
-    print(f"[TX_SERVICE] Transacción insertada → Id_transaction={tx_id}")
-    return tx_id
+    cursor.execute(sql, (transaction_id, transaction_type_id, status_id, description,
+                         created_by_user_id, now, now))
+
+    log.debug("Transacción insertada", tx=transaction_id)
+    return transaction_id
+
+
+def _insert_transactions(cursor: Any, rows: list[tuple[int, int, int, str, int]]) -> None:
+    """
+    Inserta varios registros en [transaction] con un único executemany.
+
+    Args:
+        cursor: pyodbc cursor existente
+        rows  : Tuplas (transaction_id, transaction_type_id, status_id,
+                description, created_by_user_id) con IDs ya reservados
+    """
+    sql = """
+        INSERT INTO [transaction]
+            (Id_transaction, transaction_type_id, status_id, description, created_by_user_id, transaction_date, processed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+    now = datetime.now()
+    cursor.executemany(sql, [row + (now, now) for row in rows])
+
+
+def _write_transfer(cursor: Any, ids: tuple[int, int, int],
+                    from_account_id: int, to_account_id: int,
+                    amount: float, description: str, created_by_user_id: int,
+                    transaction_type_id: int, status_id: int) -> dict[str, Any]:
+    """
+    Escribe una transferencia (transacción + débito + crédito) sin commit.
+
+    Args:
+        cursor: Cursor de la transacción en curso
+        ids   : (Id_transaction, Id_entry débito, Id_entry crédito) ya reservados
+
+    Returns:
+        dict de resultado exitoso, igual al de create_transfer.
+    """
+    tx_id, debit_entry_id, credit_entry_id = ids
+
+    # Insertar transacción principal
+    _insert_transaction(
+        cursor, transaction_type_id, status_id,
+        description, created_by_user_id, transaction_id=tx_id
+    )
+
+    # Insertar entrada de DÉBITO (sale de cuenta origen)
+    create_ledger_entry(
+        cursor=cursor,
+        transaction_id=tx_id,
+        account_id=from_account_id,
+        amount=amount,
+        entry_type=DEBIT,
+        entry_id=debit_entry_id,
+        allow_overdraft=_allow_overdraft(cursor)
+    )
+
+    # Insertar entrada de CRÉDITO (entra a cuenta destino)
+    create_ledger_entry(
+        cursor=cursor,
+        transaction_id=tx_id,
+        account_id=to_account_id,
+        amount=amount,
+        entry_type=CREDIT,
+        entry_id=credit_entry_id
+    )
+
+    return {
+        "success": True,
+        "transaction_id": tx_id,
+        "ledger_entries": {
+            "debit":  {"id": debit_entry_id,  "account_id": from_account_id, "type": DEBIT},
+            "credit": {"id": credit_entry_id, "account_id": to_account_id,  "type": CREDIT},
+        }
+    }
+
+
+def _write_simple_transaction(cursor: Any, ids: tuple[int, int],
+                              account_id: int, amount: float, entry_type: str,
+                              description: str, created_by_user_id: int,
+                              transaction_type_id: int, status_id: int) -> dict[str, Any]:
+    """
+    Escribe una transacción simple (transacción + una entrada) sin commit.
+
+    Args:
+        cursor: Cursor de la transacción en curso
+        ids   : (Id_transaction, Id_entry) ya reservados
+
+    Returns:
+        dict de resultado exitoso, igual al de create_simple_transaction.
+    """
+    tx_id, ledger_id = ids
+
+    # Insertar transacción principal
+    _insert_transaction(
+        cursor, transaction_type_id, status_id,
+        description, created_by_user_id, transaction_id=tx_id
+    )
+
+    # Insertar entrada de ledger
+    create_ledger_entry(
+        cursor=cursor,
+        transaction_id=tx_id,
+        account_id=account_id,
+        amount=amount,
+        entry_type=entry_type,
+        entry_id=ledger_id,
+        allow_overdraft=_allow_overdraft(cursor)
+    )
+
+    return {
+        "success": True,
+        "transaction_id": tx_id,
+        "ledger_entry_id": ledger_id,
+        "entry_type": entry_type,
+    }
+
+
+def _group_writer() -> Any:
+    """
+    Retorna el escritor de group commit si está activo, o None.
+    Import diferido: services.group_commit importa este módulo.
+    """
+    from services.group_commit import get_group_writer
+    return get_group_writer()
+
+
+def _wait_group_result(future: Any) -> dict[str, Any]:
+    """
+    Espera el resultado del escritor de group commit, como máximo
+    GROUP_COMMIT_TIMEOUT segundos.
+    """
+    try:
+        return future.result(timeout=GROUP_COMMIT_TIMEOUT)
+    except FuturesTimeoutError:
+        log.error("Sin respuesta del escritor de group commit", timeout=GROUP_COMMIT_TIMEOUT)
+        return {
+            "success": False,
+            "error": f"Sin respuesta del escritor de group commit tras {GROUP_COMMIT_TIMEOUT:g} s; "
+                     f"la operación pudo haberse aplicado, verifique antes de reintentar.",
+        }
 
 
 # ─────────────────────────────────────────────
@@ -80,9 +256,6 @@ def create_transfer(from_account_id: int, to_account_id: int,
                     transaction_type_id: int = 1,
                     status_id: int = 1) -> dict[str, Any]:
   
-    print(f"\n[TX_SERVICE] ── Iniciando transferencia (ATÓMICA) ───────────────")
-    print(f"[TX_SERVICE] De cuenta={from_account_id} → A cuenta={to_account_id}, monto={amount}")
-
     # Validaciones previas
     if amount <= 0:
         return {"success": False, "error": "El monto debe ser mayor a cero."}
@@ -90,62 +263,48 @@ def create_transfer(from_account_id: int, to_account_id: int,
     if from_account_id == to_account_id:
         return {"success": False, "error": "Las cuentas de origen y destino no pueden ser iguales."}
 
+    # Con group commit activo, la escritura la hace el hilo escritor
+    writer = _group_writer()
+    if writer is not None:
+        return _wait_group_result(writer.submit_transfer(
+            from_account_id, to_account_id, amount, description,
+            created_by_user_id, transaction_type_id, status_id
+        ))
+
     conn = None
     cursor = None
 
     try:
+        # PASO 0: Reservar IDs antes de abrir la transacción
+        ids = (next_id(TRANSACTION_TABLE), *next_ids(LEDGER_TABLE, 2))
+
         # PASO 1: Obtener conexión única para toda la transacción
         conn = get_connection()
         cursor = conn.cursor()
 
-        # PASO 2: Insertar transacción principal
-        tx_id = _insert_transaction(
-            cursor, transaction_type_id, status_id,
-            description, created_by_user_id
-        )
-
-        # PASO 3: Insertar entrada de DÉBITO (sale de cuenta origen)
-        debit_entry_id = create_ledger_entry(
-            cursor=cursor,
-            transaction_id=tx_id,
-            account_id=from_account_id,
-            amount=amount,
-            entry_type=DEBIT
-        )
-
-        # PASO 4: Insertar entrada de CRÉDITO (entra a cuenta destino)
-        credit_entry_id = create_ledger_entry(
-            cursor=cursor,
-            transaction_id=tx_id,
-            account_id=to_account_id,
-            amount=amount,
-            entry_type=CREDIT
+        # PASO 2-4: Transacción principal, DÉBITO en origen, CRÉDITO en destino
+        result = _write_transfer(
+            cursor, ids, from_account_id, to_account_id, amount,
+            description, created_by_user_id, transaction_type_id, status_id
         )
 
         # PASO 5: COMMIT ÚNICO - Todo fue exitoso
         conn.commit()
         
-        print(f"[TX_SERVICE] ✅ Transferencia ATÓMICA completada → tx={tx_id}, "
-              f"ledger_debit={debit_entry_id}, ledger_credit={credit_entry_id}")
+        log.debug("Transferencia completada", tx=ids[0], from_account=from_account_id,
+                  to_account=to_account_id, amount=amount)
 
-        return {
-            "success": True,
-            "transaction_id": tx_id,
-            "ledger_entries": {
-                "debit":  {"id": debit_entry_id,  "account_id": from_account_id, "type": DEBIT},
-                "credit": {"id": credit_entry_id, "account_id": to_account_id,  "type": CREDIT},
-            }
-        }
+        return result
 
     except Exception as e:
-        print(f"[TX_SERVICE] ❌ Error en transferencia: {e}")
+        log.warning("Transferencia revertida", from_account=from_account_id,
+                    to_account=to_account_id, amount=amount, error=e)
         # ROLLBACK de toda la transacción en caso de error
         if conn:
             try:
                 conn.rollback()
-                print(f"[TX_SERVICE] ✅ Rollback exitoso - ningún cambio fue persistido")
             except Exception as rb_err:
-                print(f"[TX_SERVICE] ❌ Error en rollback: {rb_err}")
+                log.error("Error en rollback", error=rb_err)
         return {"success": False, "error": str(e)}
 
     finally:
@@ -154,7 +313,6 @@ def create_transfer(from_account_id: int, to_account_id: int,
             cursor.close()
         if conn:
             conn.close()
-        print(f"[TX_SERVICE] ── Fin de transferencia ───────────────────────────\n")
 
 
 # ─────────────────────────────────────────────
@@ -184,9 +342,6 @@ def create_simple_transaction(account_id: int, amount: float,
     Returns:
         dict con 'success', 'transaction_id', 'ledger_entry_id' o 'error'.
     """
-    print(f"\n[TX_SERVICE] ── Iniciando tx simple ({entry_type}) ATÓMICA ──────")
-    print(f"[TX_SERVICE] Cuenta={account_id}, monto={amount}")
-
     # Validaciones previas
     if amount <= 0:
         return {"success": False, "error": "El monto debe ser mayor a cero."}
@@ -194,50 +349,48 @@ def create_simple_transaction(account_id: int, amount: float,
     if entry_type not in (DEBIT, CREDIT):
         return {"success": False, "error": f"entry_type inválido: '{entry_type}'."}
 
+    # Con group commit activo, la escritura la hace el hilo escritor
+    writer = _group_writer()
+    if writer is not None:
+        return _wait_group_result(writer.submit_simple_transaction(
+            account_id, amount, entry_type, description,
+            created_by_user_id, transaction_type_id, status_id
+        ))
+
     conn = None
     cursor = None
 
     try:
+        # PASO 0: Reservar IDs antes de abrir la transacción
+        ids = (next_id(TRANSACTION_TABLE), next_id(LEDGER_TABLE))
+
         # PASO 1: Obtener conexión única para toda la transacción
         conn = get_connection()
         cursor = conn.cursor()
 
-        # PASO 2: Insertar transacción principal
-        tx_id = _insert_transaction(
-            cursor, transaction_type_id, status_id,
-            description, created_by_user_id
-        )
-
-        # PASO 3: Insertar entrada de ledger
-        ledger_id = create_ledger_entry(
-            cursor=cursor,
-            transaction_id=tx_id,
-            account_id=account_id,
-            amount=amount,
-            entry_type=entry_type
+        # PASO 2-3: Transacción principal y su entrada de ledger
+        result = _write_simple_transaction(
+            cursor, ids, account_id, amount, entry_type,
+            description, created_by_user_id, transaction_type_id, status_id
         )
 
         # PASO 4: COMMIT ÚNICO - Todo fue exitoso
         conn.commit()
         
-        print(f"[TX_SERVICE] ✅ Tx simple ATÓMICA completada → tx={tx_id}, ledger={ledger_id}")
+        log.debug("Tx simple completada", tx=ids[0], account=account_id,
+                  amount=amount, type=entry_type)
 
-        return {
-            "success": True,
-            "transaction_id": tx_id,
-            "ledger_entry_id": ledger_id,
-            "entry_type": entry_type,
-        }
+        return result
 
     except Exception as e:
-        print(f"[TX_SERVICE] ❌ Error en tx simple: {e}")
+        log.warning("Tx simple revertida", account=account_id, amount=amount,
+                    type=entry_type, error=e)
         # ROLLBACK de toda la transacción en caso de error
         if conn:
             try:
                 conn.rollback()
-                print(f"[TX_SERVICE] ✅ Rollback exitoso - ningún cambio fue persistido")
             except Exception as rb_err:
-                print(f"[TX_SERVICE] ❌ Error en rollback: {rb_err}")
+                log.error("Error en rollback", error=rb_err)
         return {"success": False, "error": str(e)}
 
     finally:
@@ -246,4 +399,208 @@ def create_simple_transaction(account_id: int, amount: float,
             cursor.close()
         if conn:
             conn.close()
-        print(f"[TX_SERVICE] ── Fin de tx simple ──────────────────────────────\n")
\ No newline at end of file
+
+
+# ─────────────────────────────────────────────
+# Servicio principal - Transferencias masivas
+# ─────────────────────────────────────────────
+
+def _validate_transfer_row(row: Any) -> dict[str, Any]:
+    """
+    Normaliza y valida una fila de create_transfers_bulk.
+
+    Acepta un dict con las claves de create_transfer o una tupla en el
+    orden de TRANSFER_FIELDS (los dos últimos campos son opcionales).
+
+    Raises:
+        ValueError: Si la fila está incompleta o es inválida.
+    """
+    if isinstance(row, dict):
+        data = dict(row)
+    else:
+        values = tuple(row)
+        if len(values) > len(TRANSFER_FIELDS):
+            raise ValueError(f"Se esperaban a lo sumo {len(TRANSFER_FIELDS)} campos, "
+                             f"se recibieron {len(values)}.")
+        data = dict(zip(TRANSFER_FIELDS, values))
+
+    data.setdefault("transaction_type_id", 1)
+    data.setdefault("status_id", 1)
+
+    missing = [f for f in TRANSFER_FIELDS if data.get(f) is None]
+    if missing:
+        raise ValueError(f"Faltan campos: {', '.join(missing)}.")
+
+    try:
+        data["amount"] = float(data["amount"])
+    except (TypeError, ValueError):
+        raise ValueError(f"Monto inválido: {data['amount']!r}.")
+
+    if data["amount"] <= 0:
+        raise ValueError("El monto debe ser mayor a cero.")
+
+    if data["from_account_id"] == data["to_account_id"]:
+        raise ValueError("Las cuentas de origen y destino no pueden ser iguales.")
+
+    return data
+
+
+def _write_transfer_batch(cursor: Any, batch: list[tuple[int, dict[str, Any]]]) -> dict[int, dict[str, Any]]:
+    """
+    Inserta un lote de transferencias ya validadas sin hacer commit.
+
+    Los IDs vienen reservados en data["ids"] = (tx, débito, crédito), así
+    que el lote completo son dos executemany: uno para [transaction] y
+    otro para todas sus entradas de ledger.
+
+    Returns:
+        dict índice_de_fila → resultado de la fila
+    """
+    transactions = []
+    entries = []
+    written = {}
+    for index, data in batch:
+        tx_id, debit_id, credit_id = data["ids"]
+        transactions.append((tx_id, data["transaction_type_id"], data["status_id"],
+                             data["description"], data["created_by_user_id"]))
+        entries.append((debit_id,  tx_id, data["from_account_id"], data["amount"], DEBIT))
+        entries.append((credit_id, tx_id, data["to_account_id"],   data["amount"], CREDIT))
+        written[index] = {
+            "row": index,
+            "success": True,
+            "transaction_id": tx_id,
+            "ledger_entries": {"debit": debit_id, "credit": credit_id},
+        }
+
+    _insert_transactions(cursor, transactions)
+    create_ledger_entries(cursor, entries, allow_overdraft=_allow_overdraft(cursor))
+    return written
+
+
+def create_transfers_bulk(transfers: Iterable[Any], batch_size: int = BULK_BATCH_SIZE,
+                          all_or_nothing: bool = False) -> dict[str, Any]:
+    """
+    Crea muchas transferencias sobre una sola conexión, con un commit por lote.
+
+    Todas las filas se validan antes de escribir nada. Cada transferencia
+    genera su registro en [transaction] y sus dos entradas de ledger
+    (débito en origen, crédito en destino), igual que create_transfer.
+
+    Semántica de fallos:
+      - all_or_nothing=False (por defecto): las filas inválidas se reportan
+        y se omiten; cada lote hace su propio commit. Si un lote falla en la
+        base de datos, se revierte y sus filas se reintentan una a una para
+        que solo fallen las filas problemáticas.
+      - all_or_nothing=True: si alguna fila es inválida no se escribe nada;
+        los lotes se escriben sobre una misma transacción con un único
+        commit al final, y cualquier error revierte todo.
+
+    Args:
+        transfers     : Iterable de filas (dict o tupla, ver TRANSFER_FIELDS)
+        batch_size    : Filas por lote (por defecto BULK_BATCH_SIZE)
+        all_or_nothing: Ver semántica de fallos
+
+    Returns:
+        dict con 'success', 'total', 'succeeded', 'failed', 'batches' y
+        'results': una entrada por fila, en orden, con 'row', 'success' y
+        'transaction_id' + 'ledger_entries' ({'debit', 'credit'}) o 'error'.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size debe ser al menos 1.")
+
+    # Validación previa de todas las filas
+    valid: list[tuple[int, dict[str, Any]]] = []
+    results: list[dict[str, Any]] = []
+    for index, row in enumerate(transfers):
+        try:
+            valid.append((index, _validate_transfer_row(row)))
+            results.append({"row": index, "success": False, "error": "No procesada."})
+        except ValueError as e:
+            results.append({"row": index, "success": False, "error": str(e)})
+
+    report = {
+        "success": False,
+        "total": len(results),
+        "succeeded": 0,
+        "failed": len(results),
+        "batches": 0,
+        "results": results,
+    }
+
+    log.info("Carga masiva iniciada", rows=len(results), valid=len(valid),
+             batch_size=batch_size, all_or_nothing=all_or_nothing)
+
+    if not valid or (all_or_nothing and len(valid) != len(results)):
+        return report
+
+    batches = [valid[i:i + batch_size] for i in range(0, len(valid), batch_size)]
+
+    conn = None
+    cursor = None
+    try:
+        # Reservar todos los IDs antes de abrir la transacción (una ida por tabla)
+        tx_ids = next_ids(TRANSACTION_TABLE, len(valid))
+        entry_ids = next_ids(LEDGER_TABLE, 2 * len(valid))
+        for n, (_, data) in enumerate(valid):
+            data["ids"] = (tx_ids[n], entry_ids[2 * n], entry_ids[2 * n + 1])
+
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        if all_or_nothing:
+            written = {}
+            try:
+                for batch in batches:
+                    written.update(_write_transfer_batch(cursor, batch))
+                    report["batches"] += 1
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                log.error("Error en carga masiva, rollback total", error=e)
+                for index, _ in valid:
+                    results[index]["error"] = str(e)
+                return report
+
+            for index, result in written.items():
+                results[index] = result
+
+        else:
+            for batch in batches:
+                try:
+                    written = _write_transfer_batch(cursor, batch)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    log.warning("Lote fallido; reintentando fila por fila", error=e)
+                    written = {}
+                    for index, data in batch:
+                        try:
+                            written.update(_write_transfer_batch(cursor, [(index, data)]))
+                            conn.commit()
+                        except Exception as row_err:
+                            conn.rollback()
+                            results[index]["error"] = str(row_err)
+
+                report["batches"] += 1
+                for index, result in written.items():
+                    results[index] = result
+
+    except Exception as e:
+        log.error("Error en carga masiva", error=e)
+        for index, _ in valid:
+            if not results[index]["success"]:
+                results[index]["error"] = str(e)
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+    report["succeeded"] = sum(1 for r in results if r["success"])
+    report["failed"] = report["total"] - report["succeeded"]
+    report["success"] = report["failed"] == 0
+
+    log.info("Carga masiva finalizada", succeeded=report["succeeded"],
+             failed=report["failed"], batches=report["batches"])
+    return report
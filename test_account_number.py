@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from utils.account_number import (
+    ACCOUNT_NUMBER_SPACE,
+    format_account_number,
+    is_valid_account_number,
+    permute,
+)
+
+
+def test_permute_es_inyectiva_en_una_muestra():
+    rng = random.Random(42)
+    sample = set(range(5000)) | set(rng.sample(range(ACCOUNT_NUMBER_SPACE), 5000))
+    sample.add(ACCOUNT_NUMBER_SPACE - 1)
+
+    images = {permute(counter) for counter in sample}
+
+    assert len(images) == len(sample)
+    assert all(0 <= value < ACCOUNT_NUMBER_SPACE for value in images)
+
+
+def test_permute_fuera_de_rango():
+    with pytest.raises(ValueError):
+        permute(-1)
+    with pytest.raises(ValueError):
+        permute(ACCOUNT_NUMBER_SPACE)
+
+
+def test_numero_formateado_es_valido():
+    for counter in list(range(2000)) + [ACCOUNT_NUMBER_SPACE - 1]:
+        number = format_account_number(counter)
+        assert is_valid_account_number(number), number
+
+
+def test_digito_verificador_detecta_un_digito_cambiado():
+    number = format_account_number(123)
+    last = int(number[-1])
+    assert not is_valid_account_number(number[:-1] + str((last + 1) % 10))
+    assert not is_valid_account_number(number[:-1])
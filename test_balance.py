@@ -0,0 +1,102 @@
+import sqlite3
+
+from config.backends import SQLiteBackend
+from config.database import get_backend, get_cursor
+from config.migrations import migrate
+from config.schema import create_table_sql
+from models.balance_model import apply_balance_delta, get_account_balance
+from services.transaction_service import (
+    ENTRY_CREDIT,
+    ENTRY_DEBIT,
+    create_simple_transaction,
+    create_transfer,
+    create_transfers_bulk,
+)
+
+LEGACY_TABLES = ("user", "account", "transaction", "ledger_entry")
+
+
+def _ledger_balance(account_id):
+    with get_cursor() as cursor:
+        cursor.execute(
+            "SELECT SUM(CASE WHEN entry_type = 'credit' THEN amount ELSE -amount END) "
+            "FROM ledger_entry WHERE account_id = ?", (account_id,))
+        return float(cursor.fetchone()[0] or 0)
+
+
+def test_base_sin_migrar_sigue_aceptando_movimientos(sqlite_db, monkeypatch):
+    # Base Access anterior a account_balance: solo las tablas originales
+    monkeypatch.setenv("SQLITE_BOOTSTRAP", "0")
+    legacy = sqlite3.connect(sqlite_db)
+    for table in LEGACY_TABLES:
+        legacy.execute(create_table_sql(table, SQLiteBackend(sqlite_db, bootstrap=False)))
+    legacy.commit()
+    legacy.close()
+
+    assert create_simple_transaction(1, 100.0, ENTRY_CREDIT, "depósito", 1)["success"]
+    # Sin carga inicial no se exigen fondos
+    assert create_transfer(1, 2, 150.0, "transferencia", 1)["success"]
+    bulk = create_transfers_bulk([(2, 1, 20.0, "a", 1), (1, 2, 5.0, "b", 1)])
+    assert bulk["success"] and bulk["succeeded"] == 2
+
+    with get_cursor() as cursor:
+        assert not get_backend().table_exists(cursor, "account_balance")
+
+    # La migración carga los saldos desde el ledger y activa la verificación
+    conn = get_backend().connect()
+    try:
+        assert 5 in migrate(conn, get_backend())
+    finally:
+        conn.close()
+    assert get_account_balance(1) == _ledger_balance(1) == -35.0
+    assert get_account_balance(2) == _ledger_balance(2) == 135.0
+    assert not create_transfer(1, 2, 1.0, "sin fondos", 1)["success"]
+
+
+def test_debito_sin_fondos_se_rechaza(sqlite_db):
+    assert create_simple_transaction(1, 100.0, ENTRY_CREDIT, "depósito", 1)["success"]
+
+    result = create_transfer(1, 2, 150.0, "transferencia", 1)
+    assert not result["success"]
+    assert "Fondos insuficientes" in result["error"]
+    assert not create_simple_transaction(2, 1.0, ENTRY_DEBIT, "retiro", 1)["success"]
+
+    # Nada de lo rechazado quedó escrito
+    assert get_account_balance(1) == _ledger_balance(1) == 100.0
+    assert get_account_balance(2) == _ledger_balance(2) == 0.0
+
+    assert create_transfer(1, 2, 100.0, "exacto", 1)["success"]
+    assert get_account_balance(1) == 0.0
+    assert get_account_balance(2) == 100.0
+
+
+class _RacingCursor:
+    """
+    Cursor que, justo antes del primer INSERT en account_balance, crea la
+    fila como lo haría otra transacción que ganó la carrera.
+    """
+
+    def __init__(self, cursor, account_id, concurrent_delta):
+        self._cursor = cursor
+        self._row = (account_id, concurrent_delta)
+        self.raced = False
+
+    def execute(self, sql, params=()):
+        if not self.raced and sql.startswith("INSERT INTO account_balance"):
+            self.raced = True
+            self._cursor.execute(
+                "INSERT INTO account_balance (account_id, balance, updated_at) VALUES (?, ?, Now())",
+                self._row)
+        return self._cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def test_primer_credito_concurrente_reintenta_el_update(sqlite_db):
+    with get_cursor(commit=True) as cursor:
+        racing = _RacingCursor(cursor, account_id=7, concurrent_delta=50.0)
+        apply_balance_delta(racing, 7, 25.0)
+        assert racing.raced
+
+    assert get_account_balance(7) == 75.0
@@ -0,0 +1,80 @@
+import threading
+
+from config.database import get_cursor
+from models.balance_model import get_account_balance
+from services.group_commit import GroupCommitWriter
+from services.transaction_service import ENTRY_CREDIT, create_simple_transaction
+
+
+def _ledger_count():
+    with get_cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM ledger_entry")
+        return cursor.fetchone()[0]
+
+
+def test_solicitud_fallida_no_arrastra_al_grupo(sqlite_db):
+    assert create_simple_transaction(1, 100.0, ENTRY_CREDIT, "depósito", 1)["success"]
+
+    # Ventana larga y lote de 3: las tres solicitudes van en un mismo grupo
+    writer = GroupCommitWriter(window=5.0, max_batch=3).start()
+    try:
+        futures = [
+            writer.submit_transfer(1, 2, 30.0, "ok", 1, 1, 1),
+            writer.submit_transfer(1, 3, 500.0, "sin fondos", 1, 1, 1),
+            writer.submit_simple_transaction(4, 10.0, ENTRY_CREDIT, "ok", 1, 2, 1),
+        ]
+        results = [f.result(timeout=10) for f in futures]
+    finally:
+        writer.stop()
+
+    assert [r["success"] for r in results] == [True, False, True]
+    assert "Fondos insuficientes" in results[1]["error"]
+    stats = writer.stats()
+    assert stats["groups"] == 1 and stats["fallbacks"] == 1 and stats["failed"] == 1
+
+    # Solo lo exitoso quedó escrito: depósito + transferencia + crédito
+    assert _ledger_count() == 1 + 2 + 1
+    assert get_account_balance(1) == 70.0
+    assert get_account_balance(2) == 30.0
+    assert get_account_balance(3) == 0.0
+    assert get_account_balance(4) == 10.0
+
+
+def test_stop_resuelve_todas_las_solicitudes(sqlite_db):
+    for _ in range(3):
+        writer = GroupCommitWriter(window=0.002, max_batch=8).start()
+        futures = []
+        futures_lock = threading.Lock()
+        started = threading.Barrier(5)
+
+        def submitter():
+            started.wait()
+            for _ in range(100):
+                future = writer.submit_simple_transaction(1, 1.0, ENTRY_CREDIT, "carrera", 1, 2, 1)
+                with futures_lock:
+                    futures.append(future)
+
+        threads = [threading.Thread(target=submitter) for _ in range(4)]
+        for t in threads:
+            t.start()
+        # stop() llega con los hilos todavía enviando
+        started.wait()
+        writer.stop()
+        for t in threads:
+            t.join()
+
+        # Ninguna queda pendiente: ni las encoladas antes de stop ni las posteriores
+        assert futures and all(f.done() for f in futures)
+        committed = sum(f.result()["success"] for f in futures)
+        assert committed == writer.stats()["requests"] - writer.stats()["failed"]
+
+    assert get_account_balance(1) == _ledger_count()
+
+
+def test_solicitud_tras_stop_se_rechaza_de_inmediato(sqlite_db):
+    writer = GroupCommitWriter().start()
+    writer.stop()
+
+    result = writer.submit_transfer(1, 2, 5.0, "tarde", 1, 1, 1).result(timeout=0)
+    assert not result["success"]
+    assert "detenido" in result["error"]
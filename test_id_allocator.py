@@ -0,0 +1,60 @@
+import threading
+
+from config.backends import SQLiteBackend
+from config.id_allocator import IdAllocator
+
+
+def _reserve_in_parallel(table, allocators, calls, count):
+    """Cada asignador pide `calls` veces `count` IDs desde su propio hilo."""
+    results = [[] for _ in allocators]
+    barrier = threading.Barrier(len(allocators))
+
+    def worker(slot, allocator):
+        barrier.wait()   # que la primera reserva de ambos coincida
+        for _ in range(calls):
+            results[slot].extend(allocator.next_ids(table, count))
+
+    threads = [threading.Thread(target=worker, args=(i, a)) for i, a in enumerate(allocators)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for allocator in allocators:
+        allocator.reset()
+    return results
+
+
+def test_bloques_disjuntos_entre_dos_asignadores(tmp_path):
+    path = str(tmp_path / "ids.db")
+    allocators = [IdAllocator(block_size=5, backend=SQLiteBackend(path)) for _ in range(2)]
+
+    first, second = _reserve_in_parallel("ledger_entry", allocators, calls=40, count=3)
+
+    assert len(first) == len(set(first)) == 120
+    assert len(second) == len(set(second)) == 120
+    assert not set(first) & set(second)
+    # Tabla vacía: la secuencia arranca en 1
+    assert min(first + second) == 1
+
+
+def test_secuencia_con_nombre_empieza_en_cero(tmp_path):
+    path = str(tmp_path / "ids.db")
+    allocators = [IdAllocator(block_size=7, backend=SQLiteBackend(path)) for _ in range(2)]
+
+    first, second = _reserve_in_parallel("account_number", allocators, calls=25, count=2)
+
+    ids = first + second
+    assert len(ids) == len(set(ids)) == 100
+    assert min(ids) == 0
+
+
+def test_asignador_nuevo_continua_despues_de_otro(tmp_path):
+    path = str(tmp_path / "ids.db")
+    old = IdAllocator(block_size=10, backend=SQLiteBackend(path))
+    used = old.next_ids("ledger_entry", 4)
+    old.reset()
+
+    # El resto del bloque de `old` se pierde (hueco), pero nunca se repite
+    new = IdAllocator(block_size=10, backend=SQLiteBackend(path))
+    assert min(new.next_ids("ledger_entry", 4)) > max(used)
+    new.reset()
@@ -0,0 +1,119 @@
+import pytest
+
+from config.database import get_cursor
+from models.balance_model import get_account_balance
+from services.transaction_service import (
+    ENTRY_CREDIT,
+    create_simple_transaction,
+    create_transfers_bulk,
+)
+
+
+def _count(table):
+    with get_cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM [{table}]")
+        return cursor.fetchone()[0]
+
+
+@pytest.fixture
+def funded_db(sqlite_db):
+    """Base con 100.00 en la cuenta 1."""
+    assert create_simple_transaction(1, 100.0, ENTRY_CREDIT, "depósito", 1)["success"]
+    return sqlite_db
+
+
+def test_filas_invalidas_se_reportan_en_orden(funded_db):
+    rows = [
+        (1, 2, 10.0, "ok", 1),
+        (1, 2, -5.0, "monto negativo", 1),
+        {"from_account_id": 1, "to_account_id": 3, "amount": "20", "description": "dict",
+         "created_by_user_id": 1},
+        (1, 1, 5.0, "misma cuenta", 1),
+        (1, 2, "abc", "monto inválido", 1),
+        (1, 2, 5.0),
+        (1, 2, 5.0, "de más", 1, 1, 1, "extra"),
+    ]
+
+    report = create_transfers_bulk(rows)
+
+    assert [r["row"] for r in report["results"]] == list(range(len(rows)))
+    assert [r["success"] for r in report["results"]] == [True, False, True, False, False, False, False]
+    assert "mayor a cero" in report["results"][1]["error"]
+    assert "iguales" in report["results"][3]["error"]
+    assert "Monto inválido" in report["results"][4]["error"]
+    assert "Faltan campos" in report["results"][5]["error"]
+    assert report["total"] == 7 and report["succeeded"] == 2 and report["failed"] == 5
+    assert not report["success"]
+
+    assert get_account_balance(1) == 70.0
+    assert get_account_balance(2) == 10.0
+    assert get_account_balance(3) == 20.0
+
+
+def test_todo_o_nada_con_fila_invalida_no_escribe(funded_db):
+    entries = _count("ledger_entry")
+
+    report = create_transfers_bulk([(1, 2, 10.0, "ok", 1), (1, 2, 0, "inválida", 1)],
+                                   all_or_nothing=True)
+
+    assert not report["success"] and report["succeeded"] == 0 and report["batches"] == 0
+    assert report["results"][0]["error"] == "No procesada."
+    assert _count("ledger_entry") == entries
+
+
+def test_lote_fallido_se_reintenta_fila_por_fila(funded_db):
+    rows = [
+        (1, 2, 30.0, "ok", 1),
+        (1, 3, 500.0, "sin fondos", 1),
+        (2, 4, 10.0, "usa lo recibido en la fila 0", 1),
+        (1, 5, 20.0, "ok", 1),
+    ]
+
+    report = create_transfers_bulk(rows, batch_size=10)
+
+    results = report["results"]
+    assert [r["success"] for r in results] == [True, False, True, True]
+    assert "Fondos insuficientes" in results[1]["error"]
+    assert report["batches"] == 1 and report["succeeded"] == 3
+    # IDs reservados en el orden de las filas
+    tx_ids = [r["transaction_id"] for r in results if r["success"]]
+    assert tx_ids == sorted(tx_ids)
+
+    assert get_account_balance(1) == 50.0
+    assert get_account_balance(2) == 20.0
+    assert get_account_balance(3) == 0.0
+    assert get_account_balance(4) == 10.0
+    assert get_account_balance(5) == 20.0
+    # La fila fallida no dejó ni transacción ni entradas
+    assert _count("transaction") == 1 + 3
+    assert _count("ledger_entry") == 1 + 2 * 3
+
+
+def test_lotes_independientes_confirman_lo_anterior(funded_db):
+    rows = [(1, 2, 40.0, "lote 1", 1), (1, 2, 40.0, "lote 1", 1),
+            (1, 2, 40.0, "lote 2 sin fondos", 1), (2, 1, 5.0, "lote 2", 1)]
+
+    report = create_transfers_bulk(rows, batch_size=2)
+
+    assert [r["success"] for r in report["results"]] == [True, True, False, True]
+    assert report["batches"] == 2
+    assert get_account_balance(1) == 25.0
+    assert get_account_balance(2) == 75.0
+
+
+def test_todo_o_nada_revierte_ante_error_de_base(funded_db):
+    entries = _count("ledger_entry")
+    rows = [(1, 2, 30.0, "ok", 1), (1, 3, 500.0, "sin fondos", 1), (1, 4, 10.0, "ok", 1)]
+
+    report = create_transfers_bulk(rows, batch_size=1, all_or_nothing=True)
+
+    assert not report["success"] and report["succeeded"] == 0 and report["failed"] == 3
+    assert all("Fondos insuficientes" in r["error"] for r in report["results"])
+    assert _count("ledger_entry") == entries
+    assert get_account_balance(1) == 100.0
+    assert get_account_balance(2) == 0.0
+
+
+def test_batch_size_invalido():
+    with pytest.raises(ValueError):
+        create_transfers_bulk([], batch_size=0)
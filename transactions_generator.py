@@ -1,76 +1,98 @@
 import random
 from services.transaction_service import (
-    create_transfer, 
+    create_transfer,
     create_simple_transaction,
-    ENTRY_DEBIT, 
+    ENTRY_DEBIT,
     ENTRY_CREDIT
 )
 from config.database import get_cursor
 
+# Tipos de operación y su peso por defecto (30% / 20% / 50%)
+TRANSFER   = "transfer"
+WITHDRAWAL = "withdrawal"
+DEPOSIT    = "deposit"
+DEFAULT_MIX = {TRANSFER: 30, WITHDRAWAL: 20, DEPOSIT: 50}
+
 def get_user_id_by_account(account_id: int):
     """
     Busca el ID del usuario dueño de una cuenta específica.
     Asegúrate de que la columna PK de 'account' se llame 'id' (o ajústalo si es distinto).
     """
     query = "SELECT [user_id] FROM [account] WHERE [Id_account] = ?"
-    
+
     with get_cursor() as cursor:
         cursor.execute(query, (account_id,))
         row = cursor.fetchone()
-        
+
         if row:
             return row[0]
         else:
             raise Exception(f"La cuenta {account_id} no tiene un usuario asociado.")
 def get_all_account_ids():
-    # Eliminamos la restricción de status_id = 1 temporalmente 
+    # Eliminamos la restricción de status_id = 1 temporalmente
     # por si tus cuentas se crearon con un estado diferente o nulo.
-    query = "SELECT Id_account FROM [account]" 
-    
+    query = "SELECT Id_account FROM [account]"
+
     with get_cursor() as cursor:
         cursor.execute(query)
         rows = cursor.fetchall()
         return [row[0] for row in rows]
 
+def get_account_owners():
+    """
+    Retorna {Id_account: user_id} de todas las cuentas en una sola consulta,
+    para no buscar el dueño de la cuenta en cada operación.
+    """
+    query = "SELECT Id_account, [user_id] FROM [account]"
+
+    with get_cursor() as cursor:
+        cursor.execute(query)
+        return {row[0]: row[1] for row in cursor.fetchall()}
+
+def pick_operation(rng: random.Random, account_ids: list, mix: dict = DEFAULT_MIX):
+    """
+    Elige (tipo, cuenta origen, cuenta destino, monto) según el mix.
+    El destino se elige por desplazamiento de índice: nunca es el origen y
+    no hace falta recorrer la lista de cuentas.
+    """
+    kind = rng.choices(list(mix), weights=list(mix.values()), k=1)[0]
+    amount = round(rng.uniform(10.0, 150.0), 2)
+
+    index = rng.randrange(len(account_ids))
+    acc_id = account_ids[index]
+    to_id = None
+    if kind == TRANSFER:
+        to_id = account_ids[(index + rng.randrange(1, len(account_ids))) % len(account_ids)]
+    return kind, acc_id, to_id, amount
+
+def execute_operation(kind: str, acc_id: int, to_id: int | None, amount: float, owner_user_id: int):
+    """Ejecuta una operación del simulador y retorna el dict del servicio."""
+    if kind == TRANSFER:
+        return create_transfer(acc_id, to_id, amount, "Simulación Transfer", owner_user_id)
+    if kind == WITHDRAWAL:
+        return create_simple_transaction(acc_id, amount, ENTRY_DEBIT, "Simulación Retiro", owner_user_id)
+    return create_simple_transaction(acc_id, amount, ENTRY_CREDIT, "Simulación Depósito", owner_user_id)
+
 def run_multi_type_simulation(iterations):
     print(f"🚀 Iniciando simulación de {iterations} operaciones...")
-    
-    account_ids = get_all_account_ids()
+
+    owners = get_account_owners()
+    account_ids = list(owners)
     if len(account_ids) < 2:
         print("❌ Error: Necesitas al menos 2 cuentas para simular.")
         return
 
+    rng = random.Random()
+    labels = {TRANSFER: "🔄 TRANSFER", WITHDRAWAL: "💸 WITHDRAWAL", DEPOSIT: "💰 DEPOSIT"}
+
     for i in range(iterations):
-        res = {"success": False, "error": "No se ejecutó ninguna acción"}
-        
-        tx_type = random.choices([1, 2, 3], weights=[30, 20, 50], k=1)[0]
-        amount = round(random.uniform(10.0, 150.0), 2)
-        
-        # 1. Elegir la cuenta origen
-        acc_id = random.choice(account_ids)
-        
+        kind, acc_id, to_id, amount = pick_operation(rng, account_ids)
+
         try:
-            # 2. Obtener el DUEÑO REAL de la cuenta origen
-            owner_user_id = get_user_id_by_account(acc_id)
-
-            if tx_type == 1:
-                # TRANSFERENCIA
-                to_id = random.choice([id for id in account_ids if id != acc_id])
-                print(f"🔄 [{i+1}] TRANSFER: Acc {acc_id} -> Acc {to_id} | ${amount}")
-                # Usamos owner_user_id aquí
-                res = create_transfer(acc_id, to_id, amount, "Simulación Transfer", owner_user_id)
-
-            elif tx_type == 2:
-                # RETIRO
-                print(f"💸 [{i+1}] WITHDRAWAL: Acc {acc_id} | ${amount}")
-                # Usamos owner_user_id aquí
-                res = create_simple_transaction(acc_id, amount, ENTRY_DEBIT, "Simulación Retiro", owner_user_id)
-
-            elif tx_type == 3:
-                # DEPÓSITO
-                print(f"💰 [{i+1}] DEPOSIT: Acc {acc_id} | ${amount}")
-                # Usamos owner_user_id aquí
-                res = create_simple_transaction(acc_id, amount, ENTRY_CREDIT, "Simulación Depósito", owner_user_id)
+            target = f" -> Acc {to_id}" if to_id is not None else ""
+            print(f"{labels[kind]} [{i+1}]: Acc {acc_id}{target} | ${amount}")
+            # Usamos el DUEÑO REAL de la cuenta origen
+            res = execute_operation(kind, acc_id, to_id, amount, owners[acc_id])
 
             # Mostrar resultado
             if res is not None and res.get("success"):
@@ -85,4 +107,4 @@ def run_multi_type_simulation(iterations):
     print("\n--- Simulación Finalizada ---")
 
 if __name__ == "__main__":
-    run_multi_type_simulation(100)
\ No newline at end of file
+    run_multi_type_simulation(100)
@@ -19,9 +19,15 @@ from models.ledger_model import get_ledger_entries_by_transaction
 # Helpers de UI
 # ─────────────────────────────────────────────
 
-def _show_ledger_entries(transaction_id: int):
-    """Muestra en pantalla las entradas de ledger de una transacción."""
-    entries = get_ledger_entries_by_transaction(transaction_id)
+def _show_ledger_entries(transaction_id: int, entries: list | None = None):
+    """
+    Muestra en pantalla las entradas de ledger de una transacción.
+
+    Para listar varias transacciones, obtén sus entradas de una vez con
+    get_ledger_entries_by_transactions y pásalas en `entries`.
+    """
+    if entries is None:
+        entries = get_ledger_entries_by_transaction(transaction_id)
     if not entries:
         st.warning("No se encontraron entradas de ledger para esta transacción.")
         return
@@ -0,0 +1,87 @@
+"""
+account_number.py
+Números de cuenta a partir de un contador: permutación con llave que
+conserva el formato + dígito verificador.
+
+    contador (0, 1, 2, ...) → permutación de 7 dígitos → + Luhn
+    → "SV_synapse" + 8 dígitos
+
+La permutación es una red de Feistel de 24 bits con HMAC-SHA256 como
+función de ronda y "cycle walking" para quedarse en [0, 10^7): es una
+biyección, así que contadores distintos dan números distintos sin
+consultar la base, y números consecutivos no se parecen entre sí. El
+dígito verificador (Luhn) detecta errores de tipeo de un dígito y las
+transposiciones adyacentes.
+
+Los números anteriores ("SV_synapse" + 7 dígitos al azar) tienen otro
+largo, así que nunca chocan con los nuevos.
+
+IMPORTANTE: ACCOUNT_NUMBER_KEY no debe cambiar una vez emitidos números;
+con otra llave la permutación es otra y podría repetir uno ya asignado.
+La llave solo oculta el orden de emisión, no es un control de seguridad.
+"""
+
+import hashlib
+import hmac
+import os
+
+from utils.card_validator import is_luhn_valid, luhn_check_digit
+
+
+ACCOUNT_NUMBER_PREFIX = "SV_synapse"
+ACCOUNT_NUMBER_DIGITS = 7                      # sin el dígito verificador
+ACCOUNT_NUMBER_SPACE  = 10 ** ACCOUNT_NUMBER_DIGITS
+ACCOUNT_NUMBER_KEY    = os.getenv("ACCOUNT_NUMBER_KEY", "synapse-account-number-v1").encode("utf-8")
+
+_HALF_BITS = 12                                # 2^24 ≥ 10^7
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_ROUNDS = 8
+
+
+def _round_keys(key: bytes) -> list[bytes]:
+    return [hmac.new(key, f"round-{i}".encode(), hashlib.sha256).digest() for i in range(_ROUNDS)]
+
+
+_KEYS = _round_keys(ACCOUNT_NUMBER_KEY)
+
+
+def _feistel(value: int, keys: list[bytes]) -> int:
+    left, right = value >> _HALF_BITS, value & _HALF_MASK
+    for round_key in keys:
+        digest = hmac.new(round_key, right.to_bytes(2, "big"), hashlib.sha256).digest()
+        left, right = right, left ^ (int.from_bytes(digest[:2], "big") & _HALF_MASK)
+    return (left << _HALF_BITS) | right
+
+
+def permute(counter: int, keys: list[bytes] | None = None) -> int:
+    """
+    Imagen de `counter` por la permutación con llave de [0, 10^7).
+    """
+    if not 0 <= counter < ACCOUNT_NUMBER_SPACE:
+        raise ValueError(f"El contador debe estar entre 0 y {ACCOUNT_NUMBER_SPACE - 1}.")
+    keys = keys or _KEYS
+    value = _feistel(counter, keys)
+    # Cycle walking: se reaplica hasta caer dentro del dominio (≈1.7 veces en promedio)
+    while value >= ACCOUNT_NUMBER_SPACE:
+        value = _feistel(value, keys)
+    return value
+
+
+def format_account_number(counter: int) -> str:
+    """
+    Número de cuenta para el contador dado: prefijo + 7 dígitos
+    permutados + dígito verificador.
+    """
+    body = f"{permute(counter):0{ACCOUNT_NUMBER_DIGITS}d}"
+    return f"{ACCOUNT_NUMBER_PREFIX}{body}{luhn_check_digit(body)}"
+
+
+def is_valid_account_number(number: str) -> bool:
+    """
+    True si `number` tiene el formato actual y su dígito verificador es
+    correcto.
+    """
+    if not number or not number.startswith(ACCOUNT_NUMBER_PREFIX):
+        return False
+    digits = number[len(ACCOUNT_NUMBER_PREFIX):]
+    return len(digits) == ACCOUNT_NUMBER_DIGITS + 1 and digits.isdigit() and is_luhn_valid(digits)
@@ -0,0 +1,57 @@
+"""
+bloom_filter.py
+Filtro de Bloom: pertenencia aproximada a un conjunto en poca memoria.
+
+"No está" es siempre correcto; "puede estar" se equivoca con probabilidad
+cercana a fp_rate mientras no se superen `capacity` elementos. Útil para
+saltarse una consulta cuando casi todas las búsquedas son de valores
+nuevos (p. ej. el email de un usuario que se registra).
+"""
+
+import hashlib
+import math
+import threading
+
+
+class BloomFilter:
+    """
+    Arreglo de bits con k posiciones por elemento (doble hash sobre un
+    único blake2b de 128 bits).
+    """
+
+    def __init__(self, capacity: int, fp_rate: float = 0.01):
+        if capacity < 1:
+            raise ValueError("capacity debe ser al menos 1.")
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate debe estar entre 0 y 1.")
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.size = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, item: str) -> list[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        positions = self._positions(item)
+        with self._lock:
+            for p in positions:
+                self._bits[p >> 3] |= 1 << (p & 7)
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def is_saturated(self) -> bool:
+        """True si ya se superó la capacidad (la tasa de falsos positivos sube)."""
+        return self.count > self.capacity
+
+    def nbytes(self) -> int:
+        return len(self._bits)
@@ -23,4 +23,24 @@ def is_luhn_valid(card_number: str) -> bool:
     total_sum = sum(digits) + check_digit
     
     # 5. If total % 10 == 0, it's valid
-    return total_sum % 10 == 0
\ No newline at end of file
+    return total_sum % 10 == 0
+
+
+def luhn_check_digit(number: str) -> str:
+    """
+    Returns the Luhn check digit to append to `number`.
+    """
+    if not number.isdigit():
+        raise ValueError("number must contain only digits.")
+
+    total_sum = 0
+    # Starting from the rightmost digit, every other digit is doubled
+    for i, d in enumerate(reversed(number)):
+        digit = int(d)
+        if i % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total_sum += digit
+
+    return str((10 - total_sum % 10) % 10)
\ No newline at end of file
@@ -1,22 +1,28 @@
+import os
+
 import bcrypt
 
+from config.logger import get_logger
+
+
+# Factor de trabajo de bcrypt (2^rounds iteraciones); cada +1 duplica el costo
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+log = get_logger(__name__, "SECURITY")
 
-def hash_password(password: str) -> str:
+
+def hash_password(password: str, rounds: int | None = None) -> str:
     """
     Genera un hash seguro usando bcrypt.
     """
-    print("[DEBUG] Iniciando hash de contraseña...")
-
     if not password:
         raise ValueError("La contraseña no puede estar vacía.")
 
     password_bytes = password.encode("utf-8")
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds or BCRYPT_ROUNDS)
 
     hashed = bcrypt.hashpw(password_bytes, salt)
 
-    print("[DEBUG] Hash generado correctamente.")
-
     # Guardamos como string para almacenar en Access
     return hashed.decode("utf-8")
 
@@ -25,10 +31,8 @@ def verify_password(password: str, stored_hash: str) -> bool:
     """
     Verifica si la contraseña coincide con el hash almacenado.
     """
-    print("[DEBUG] Verificando contraseña...")
-
     if not password or not stored_hash:
-        print("[DEBUG] Password o hash vacío.")
+        log.debug("Password o hash vacío")
         return False
 
     # Strip whitespace from stored_hash (common issue with Access database)
@@ -40,10 +44,29 @@ def verify_password(password: str, stored_hash: str) -> bool:
     try:
         result = bcrypt.checkpw(password_bytes, stored_hash_bytes)
     except ValueError as e:
-        print(f"[DEBUG] Error verificando hash: {e}")
-        print(f"[DEBUG] Hash recibido: {stored_hash[:20]}...")
+        # El hash no se registra: solo su longitud para diagnosticar truncados
+        log.warning("Error verificando hash", error=e, hash_length=len(stored_hash))
         return False
 
-    print(f"[DEBUG] Resultado verificación: {result}")
+    log.debug("Verificación de contraseña", result=result)
 
-    return result
\ No newline at end of file
+    return result
+
+
+def get_hash_rounds(stored_hash: str) -> int | None:
+    """
+    Factor de trabajo de un hash bcrypt ("$2b$12$..." → 12), o None si el
+    hash no tiene ese formato.
+    """
+    parts = (stored_hash or "").strip().split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(stored_hash: str, rounds: int | None = None) -> bool:
+    """
+    True si el hash se generó con un factor distinto al configurado.
+    """
+    current = get_hash_rounds(stored_hash)
+    return current is not None and current != (rounds or BCRYPT_ROUNDS)